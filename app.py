@@ -49,6 +49,18 @@ def init_session_state():
         st.session_state.last_indicator_configs = []
 
 
+@st.cache_resource
+def get_data_fetcher() -> DataFetcher:
+    """获取进程内共享的数据获取器，所有会话复用同一个缓存和限流器"""
+    return DataFetcher()
+
+
+@st.cache_resource
+def get_indicator_calculator() -> IndicatorCalculator:
+    """获取共享的指标计算器，只读复用预热进程提前计算的指标缓存（交互计算的结果不写入磁盘）"""
+    return IndicatorCalculator(cache_dir=get_data_fetcher().indicator_cache_dir, read_only=True)
+
+
 def sidebar_data_input():
     """侧边栏数据输入区域"""
     st.sidebar.markdown("## 📊 数据获取")
@@ -99,8 +111,7 @@ def sidebar_data_input():
         if symbol:
             try:
                 with st.spinner(f"正在获取股票 {symbol} 的数据..."):
-                    # 初始化数据获取器
-                    data_fetcher = DataFetcher()
+                    data_fetcher = get_data_fetcher()
 
                     # 格式化日期
                     start_str = start_date_input.strftime("%Y%m%d")
@@ -136,7 +147,7 @@ def sidebar_indicators_config():
         return
 
     # 初始化指标计算器
-    indicator_calc = IndicatorCalculator()
+    indicator_calc = get_indicator_calculator()
     available_indicators = indicator_calc.get_available_indicators()
 
     # 检查是否已配置指标
@@ -376,6 +387,11 @@ def sidebar_backtest_config():
         value=5,
         help="信号触发后持有股票的天数"
     )
+    trading_days = st.sidebar.checkbox(
+        "按交易日计算",
+        value=False,
+        help="勾选后持有期按交易所交易日计算（跳过周末和节假日），否则按自然日计算"
+    )
 
     # 运行回测按钮
     if st.sidebar.button("🚀 运行回测", type="primary"):
@@ -388,7 +404,9 @@ def sidebar_backtest_config():
                 result = backtest_analyzer.run_backtest(
                     st.session_state.indicators_data,
                     st.session_state.condition,
-                    holding_period=holding_period
+                    holding_period=holding_period,
+                    trading_days=trading_days,
+                    calendar=get_data_fetcher().get_trading_calendar() if trading_days else None
                 )
 
                 # 保存结果
@@ -713,7 +731,8 @@ def backtest_results_display():
         st.write(f"- **收益标准差**: {result.std_return:.2%}")
         st.write(f"- **盈利信号数**: {result.profitable_signals}")
         st.write(f"- **亏损信号数**: {result.losing_signals}")
-        st.write(f"- **平均持有期**: {result.avg_holding_period:.1f} 天")
+        unit = "个交易日" if result.parameters.get('holding_unit') == 'trading_days' else "天"
+        st.write(f"- **平均持有期**: {result.avg_holding_period:.1f} {unit}")
 
     with col2:
         st.markdown("### ⚙️ 回测参数")
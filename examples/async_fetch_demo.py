@@ -0,0 +1,103 @@
+"""
+异步数据获取示例
+用一个注入延迟的本地模拟数据源代替akshare，演示 aget_stock_data / aget_many
+在事件循环中的并发行为：下载受并发上限约束，命中缓存的请求不需要排队等待下载。
+
+用法:
+    python examples/async_fetch_demo.py --symbols 50 --latency 0.2 --concurrency 8
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, project_root)
+
+from src.data_fetcher import DataFetcher
+
+
+class LatencyDataFetcher(DataFetcher):
+    """用本地生成的模拟数据代替akshare下载，并注入网络延迟"""
+
+    def __init__(self, latency: float, jitter: float = 0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.remote_calls = 0
+
+    def _fetch_remote(self, symbol, start_date, end_date, period, adjust, allow_empty=False):
+        self.remote_calls += 1
+        time.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+        index = pd.bdate_range(start_date or self.DEFAULT_START_DATE,
+                               end_date or pd.Timestamp.today(), name='date')
+        rng = np.random.default_rng(int(symbol))
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+        return pd.DataFrame({
+            'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+            'volume': rng.integers(1_000, 100_000, len(index)).astype(float),
+        }, index=index)
+
+    def _fetch_adjust_factors(self, symbol):
+        self.remote_calls += 1
+        time.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+        return pd.DataFrame({'hfq_factor': [1.0, 1.2]},
+                            index=pd.DatetimeIndex(['1900-01-01', '2024-06-20'], name='date'))
+
+
+async def run(args):
+    fetcher = LatencyDataFetcher(latency=args.latency,
+                                 cache_dir=tempfile.mkdtemp(prefix='async_demo_'),
+                                 async_concurrency=args.concurrency)
+    symbols = [f"{i:06d}" for i in range(1, args.symbols + 1)]
+
+    # 冷启动：全部需要下载
+    start = time.perf_counter()
+    errors = {}
+    data = await fetcher.aget_many(symbols, "20240101", "20241231", errors=errors)
+    cold = time.perf_counter() - start
+    print(f"冷启动: {len(data)} 只股票, 失败 {len(errors)}, 耗时 {cold:.2f}秒, "
+          f"远程调用 {fetcher.remote_calls} 次")
+    print(f"  串行理论耗时约 {fetcher.remote_calls * args.latency:.2f}秒, "
+          f"并发上限 {args.concurrency} 时理论耗时约 "
+          f"{fetcher.remote_calls * args.latency / args.concurrency:.2f}秒")
+
+    # 缓存命中与下载混合：命中缓存的请求不应被正在进行的下载阻塞
+    fresh = [f"{i:06d}" for i in range(args.symbols + 1, args.symbols + 1 + args.concurrency * 2)]
+    hit_latencies = []
+
+    async def timed_hit(symbol):
+        t0 = time.perf_counter()
+        await fetcher.aget_stock_data(symbol, "20240101", "20241231")
+        hit_latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(fetcher.aget_stock_data(symbol, "20240101", "20241231") for symbol in fresh),
+        *(timed_hit(symbol) for symbol in symbols)
+    )
+    print(f"混合负载: {len(fresh)} 次下载 + {len(symbols)} 次缓存命中, "
+          f"总耗时 {time.perf_counter() - start:.2f}秒, "
+          f"缓存命中最大耗时 {max(hit_latencies) * 1000:.1f}毫秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步数据获取示例")
+    parser.add_argument('--symbols', type=int, default=50, help='股票数量')
+    parser.add_argument('--latency', type=float, default=0.2, help='模拟的单次下载延迟（秒）')
+    parser.add_argument('--concurrency', type=int, default=8, help='下载并发上限')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+缓存格式性能对比
+对比旧版pickle缓存与列式(.npy + mmap)缓存的加载耗时和进程内存占用(RSS)
+
+用法:
+    python examples/cache_benchmark.py --symbols 2000 --rows 2500
+"""
+
+import sys
+import os
+import argparse
+import json
+import pickle
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, project_root)
+
+from src.cache_store import ColumnarCacheStore
+
+
+COLUMNS = ['open', 'close', 'high', 'low', 'volume', 'amount',
+           'amplitude', 'change_pct', 'change_amount', 'turnover']
+
+
+def current_rss_mb() -> float:
+    """读取当前进程的常驻内存(MB)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # 非Linux平台退化为峰值RSS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def make_frame(rows: int, seed: int) -> pd.DataFrame:
+    """生成与akshare标准化结果同结构的模拟行情数据"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=rows, name='date')
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    data = {col: rng.random(rows) for col in COLUMNS}
+    data['close'] = close
+    return pd.DataFrame(data, index=index)
+
+
+def prepare(workdir: str, symbols: int, rows: int):
+    """生成两种格式的缓存文件"""
+    pickle_dir = os.path.join(workdir, 'pickle')
+    os.makedirs(pickle_dir)
+    store = ColumnarCacheStore(os.path.join(workdir, 'columnar'))
+
+    for i in range(symbols):
+        frame = make_frame(rows, i)
+        key = f"{i:06d}_daily"
+        with open(os.path.join(pickle_dir, f"{key}.pkl"), 'wb') as f:
+            pickle.dump(frame, f)
+        store.save(key, frame)
+
+
+def run_scenario(workdir: str, scenario: str, symbols: int) -> dict:
+    """在独立进程中运行的单个加载场景"""
+    rss_before = current_rss_mb()
+    keys = [f"{i:06d}_daily" for i in range(symbols)]
+    store = ColumnarCacheStore(os.path.join(workdir, 'columnar'))
+
+    start = time.perf_counter()
+    loaded = []
+    for key in keys:
+        if scenario == 'pickle_close':
+            with open(os.path.join(workdir, 'pickle', f"{key}.pkl"), 'rb') as f:
+                loaded.append(pickle.load(f)['close'])
+        elif scenario == 'columnar_all':
+            loaded.append(store.load(key))
+        elif scenario == 'columnar_close':
+            loaded.append(store.load(key, columns=['close'])['close'])
+        elif scenario == 'columnar_close_mmap':
+            # 内存映射只建立映射，求和时才真正读入页面
+            loaded.append(float(store.load(key, columns=['close'], mmap=True)['close'].sum()))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'scenario': scenario,
+        'seconds': round(elapsed, 3),
+        'rss_delta_mb': round(current_rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pickle与列式缓存加载性能对比")
+    parser.add_argument('--symbols', type=int, default=2000, help='股票数量')
+    parser.add_argument('--rows', type=int, default=2500, help='每只股票的行数')
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.workdir, args.scenario, args.symbols)))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='cache_bench_')
+    try:
+        print(f"生成测试数据: {args.symbols} 只股票 x {args.rows} 行 ...")
+        prepare(workdir, args.symbols, args.rows)
+
+        print(f"{'场景':<22}{'耗时(秒)':>10}{'RSS增量(MB)':>14}")
+        for scenario in ['pickle_close', 'columnar_all', 'columnar_close', 'columnar_close_mmap']:
+            # 每个场景使用新进程，避免相互影响RSS
+            output = subprocess.run(
+                [sys.executable, __file__, '--scenario', scenario,
+                 '--workdir', workdir, '--symbols', str(args.symbols)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['scenario']:<22}{result['seconds']:>10}{result['rss_delta_mb']:>14}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
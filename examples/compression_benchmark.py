@@ -0,0 +1,116 @@
+"""
+缓存压缩性能对比
+对比列式缓存各压缩算法的压缩率和解码吞吐量（按列统计，日期索引和成交量使用差分编码）
+
+用法:
+    python examples/compression_benchmark.py --symbols 200 --rows 2500
+    python examples/compression_benchmark.py --codecs zlib lzma --compact
+"""
+
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, project_root)
+
+from src.cache_store import ColumnarCacheStore
+from src.column_codecs import available_codecs, decode_column, default_filters, encode_column
+from src.data_sources import add_derived_columns, compact_frame
+
+
+def make_frame(rows: int, seed: int) -> pd.DataFrame:
+    """生成与akshare标准化结果同结构的模拟日线（价格保留两位小数，成交量为整数）"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=rows, name='date')
+    close = np.round(10 * np.exp(np.cumsum(rng.normal(0, 0.02, rows))), 2)
+    open_ = np.round(close * (1 + rng.normal(0, 0.005, rows)), 2)
+    high = np.maximum(open_, close) + np.round(rng.random(rows) * 0.1, 2)
+    low = np.minimum(open_, close) - np.round(rng.random(rows) * 0.1, 2)
+    volume = rng.lognormal(13, 0.5, rows).astype(np.int64)
+    data = pd.DataFrame({'open': open_, 'close': close, 'high': high, 'low': low,
+                         'volume': volume, 'amount': np.round(volume * close * 100, 2),
+                         'turnover': np.round(rng.random(rows) * 3, 2)}, index=index)
+    return add_derived_columns(data)
+
+
+def column_stats(frames, codec: str, repeat: int):
+    """逐列统计原始字节数、压缩后字节数和解码耗时"""
+    stats = {}
+    for frame in frames:
+        arrays = {'__index__': np.asarray(frame.index.values)}
+        arrays.update({col: ColumnarCacheStore._to_storable(frame[col]) for col in frame.columns})
+        for name, values in arrays.items():
+            filters = default_filters(values, delta=name in ColumnarCacheStore.DELTA_COLUMNS)
+            blob = encode_column(values, codec, filters)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                decode_column(blob, values.dtype.str, len(values), codec, filters)
+            elapsed = (time.perf_counter() - start) / repeat
+            raw, packed, seconds = stats.get(name, (0, 0, 0.0))
+            stats[name] = (raw + values.nbytes, packed + len(blob), seconds + elapsed)
+    return stats
+
+
+def load_throughput(workdir: str, frames, codec: str) -> dict:
+    """通过 ColumnarCacheStore 写入并读取全部条目，统计磁盘占用和整条目读取吞吐量"""
+    store = ColumnarCacheStore(os.path.join(workdir, codec), compression=codec)
+    raw_bytes = 0
+    disk_bytes = 0
+    for i, frame in enumerate(frames):
+        disk_bytes += store.save(f"{i:06d}", frame)['bytes']
+        raw_bytes += frame.memory_usage(index=True, deep=False).sum()
+
+    start = time.perf_counter()
+    for i in range(len(frames)):
+        store.load(f"{i:06d}")
+    elapsed = time.perf_counter() - start
+    return {'disk_mb': disk_bytes / 2 ** 20, 'raw_mb': raw_bytes / 2 ** 20,
+            'load_mb_s': raw_bytes / 2 ** 20 / elapsed if elapsed else float('inf')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列式缓存压缩率与解码吞吐量对比")
+    parser.add_argument('--symbols', type=int, default=200, help='股票数量')
+    parser.add_argument('--rows', type=int, default=2500, help='每只股票的行数')
+    parser.add_argument('--codecs', nargs='+', default=None,
+                        help=f"参与对比的压缩算法，默认为全部可用的算法: {available_codecs()}")
+    parser.add_argument('--compact', action='store_true', help='使用紧凑数据类型（float32/int32）')
+    parser.add_argument('--repeat', type=int, default=3, help='每列解码的重复次数')
+    args = parser.parse_args()
+
+    codecs = args.codecs or available_codecs()
+    frames = [make_frame(args.rows, seed) for seed in range(args.symbols)]
+    if args.compact:
+        frames = [compact_frame(frame) for frame in frames]
+
+    workdir = tempfile.mkdtemp(prefix='compression_bench_')
+    try:
+        print(f"测试数据: {args.symbols} 只股票 x {args.rows} 行, 压缩算法: {codecs}")
+        print(f"\n{'算法':<8}{'磁盘(MB)':>10}{'压缩率':>8}{'整条目读取(MB/s)':>18}")
+        baseline = load_throughput(workdir, frames, 'none')
+        print(f"{'none':<8}{baseline['disk_mb']:>10.2f}{1.0:>8.2f}{baseline['load_mb_s']:>18.0f}")
+        for codec in codecs:
+            result = load_throughput(workdir, frames, codec)
+            print(f"{codec:<8}{result['disk_mb']:>10.2f}"
+                  f"{baseline['disk_mb'] / result['disk_mb']:>8.2f}{result['load_mb_s']:>18.0f}")
+
+        for codec in codecs:
+            stats = column_stats(frames, codec, args.repeat)
+            print(f"\n[{codec}] {'列':<14}{'压缩率':>8}{'解码(MB/s)':>12}")
+            for name, (raw, packed, seconds) in stats.items():
+                throughput = raw / 2 ** 20 / seconds if seconds else float('inf')
+                print(f"       {name:<14}{raw / packed:>8.2f}{throughput:>12.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
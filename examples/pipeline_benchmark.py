@@ -0,0 +1,119 @@
+"""
+离线全流程吞吐量基准
+用本地CSV文件数据源代替akshare，测量 数据加载(冷/热缓存) -> 技术指标 -> 回测 各阶段的吞吐量。
+模拟数据由固定随机种子生成，不访问网络，结果可重复。
+
+用法:
+    python examples/pipeline_benchmark.py --symbols 200 --rows 2500
+    python examples/pipeline_benchmark.py --data-dir /path/to/csv_dir   # 使用已有的本地行情文件
+"""
+
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, project_root)
+
+from src.data_fetcher import DataFetcher
+from src.data_sources import LocalFileDataSource
+from src.indicators import IndicatorCalculator
+from src.conditions import ConditionBuilder
+from src.backtest import BacktestAnalyzer
+
+
+INDICATOR_CONFIGS = [
+    {'code': 'SMA', 'params': {'timeperiod': 5}},
+    {'code': 'SMA', 'params': {'timeperiod': 20}},
+    {'code': 'RSI', 'params': {'timeperiod': 14}},
+    {'code': 'MACD', 'params': {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9}},
+]
+
+
+def write_synthetic_files(data_dir: str, symbols: int, rows: int, seed: int):
+    """按固定随机种子生成模拟日线CSV文件"""
+    index = pd.bdate_range('2010-01-04', periods=rows, name='date')
+    for i in range(symbols):
+        rng = np.random.default_rng(seed + i)
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+        open_ = close * (1 + rng.normal(0, 0.005, rows))
+        frame = pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + rng.random(rows) * 0.01),
+            'low': np.minimum(open_, close) * (1 - rng.random(rows) * 0.01),
+            'close': close,
+            'volume': rng.integers(1_000, 1_000_000, rows).astype(float),
+        }, index=index)
+        frame.to_csv(os.path.join(data_dir, f"{i:06d}.csv"))
+
+
+def timed(label: str, count: int, func):
+    """运行一个阶段并打印耗时和吞吐量"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18}{elapsed:>10.3f}{count / elapsed if elapsed else float('inf'):>14.1f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线全流程吞吐量基准")
+    parser.add_argument('--symbols', type=int, default=200, help='模拟股票数量')
+    parser.add_argument('--rows', type=int, default=2500, help='每只股票的交易日数')
+    parser.add_argument('--seed', type=int, default=42, help='模拟数据随机种子')
+    parser.add_argument('--data-dir', help='已有的本地行情文件目录（不生成模拟数据）')
+    parser.add_argument('--workers', type=int, default=8, help='批量加载的线程数')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pipeline_bench_')
+    try:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = os.path.join(workdir, 'data')
+            os.makedirs(data_dir)
+            write_synthetic_files(data_dir, args.symbols, args.rows, args.seed)
+        symbols = sorted(
+            name.split('.')[0] for name in os.listdir(data_dir)
+            if name.endswith(('.csv', '.parquet')) and not name.endswith('.hfq_factor.csv')
+        )
+
+        source = LocalFileDataSource(data_dir)
+        cache_dir = os.path.join(workdir, 'cache')
+        # 关闭内存缓存，热缓存阶段测量的是磁盘列式缓存
+        cold_fetcher = DataFetcher(cache_dir=cache_dir, source=source, use_memory_cache=False)
+        warm_fetcher = DataFetcher(cache_dir=cache_dir, source=source, use_memory_cache=False)
+
+        calculator = IndicatorCalculator()
+        condition = ConditionBuilder().create_cross_condition("SMA_5", "SMA_20", "golden")
+        analyzer = BacktestAnalyzer()
+
+        print(f"股票数: {len(symbols)}, 数据目录: {data_dir}")
+        print(f"{'阶段':<18}{'耗时(秒)':>10}{'股票数/秒':>14}")
+
+        timed("冷缓存加载", len(symbols), lambda: cold_fetcher.get_many(
+            symbols, "20000101", "20991231", adjust="", max_workers=args.workers))
+        data = timed("热缓存加载", len(symbols), lambda: warm_fetcher.get_many(
+            symbols, "20000101", "20991231", adjust="", max_workers=args.workers))
+        with_indicators = timed("技术指标", len(data), lambda: {
+            symbol: calculator.calculate_multiple_indicators(frame, INDICATOR_CONFIGS)
+            for symbol, frame in data.items()
+        })
+        results = timed("回测", len(with_indicators), lambda: [
+            analyzer.run_backtest(frame, condition, holding_period=10)
+            for frame in with_indicators.values()
+        ])
+
+        print(f"信号总数: {sum(r.total_signals for r in results)}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
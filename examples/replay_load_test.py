@@ -0,0 +1,132 @@
+"""
+akshare录制/回放压测示例
+
+先在能联网的机器上录制夹具：
+    python examples/replay_load_test.py record --fixtures fixtures/ak --symbols 000001 600000 000858
+
+再在无网络的CI机器上回放压测（延迟为对数正态分布，注入5%错误率和每秒20次的上游限流）：
+    python examples/replay_load_test.py replay --fixtures fixtures/ak --latency 0.2 \\
+        --error-rate 0.05 --max-rate 20 --workers 8 --rounds 3
+
+加上 --timeout 2 --hedge 95 对比单次请求超时和对冲请求对长尾延迟的影响。
+"""
+
+import sys
+import os
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+project_root = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, project_root)
+
+from src.akshare_replay import RecordingAkshare, ReplayAkshare, lognormal_latency
+from src.data_fetcher import DataFetcher
+from src.data_sources import AkshareDataSource
+from src.memory_cache import MemoryLRUCache
+
+
+def record(args):
+    """通过真实的akshare获取数据并录制夹具"""
+    source = AkshareDataSource(ak_module=RecordingAkshare(args.fixtures))
+    cache_dir = tempfile.mkdtemp(prefix='replay_record_')
+    try:
+        fetcher = DataFetcher(cache_dir=cache_dir, source=source, rate_limit=args.max_rate)
+        errors = {}
+        data = fetcher.get_many(args.symbols, args.start, args.end,
+                                max_workers=args.workers, errors=errors)
+        print(f"已录制 {len(data)} 只股票到 {args.fixtures}，失败 {len(errors)}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def replay(args):
+    """回放夹具，测量下载线程池、重试和缓存命中率"""
+    fixture_files = [name for name in os.listdir(args.fixtures)
+                     if name.startswith('stock_zh_a_hist-')]
+    if not fixture_files:
+        print(f"夹具目录中没有录制的日线数据: {args.fixtures}")
+        return
+
+    ak_replay = ReplayAkshare(args.fixtures,
+                              latency=lognormal_latency(args.latency, args.sigma) if args.latency else None,
+                              error_rate=args.error_rate,
+                              max_rate=args.max_rate,
+                              seed=args.seed)
+    source = AkshareDataSource(ak_module=ak_replay)
+    symbols = args.symbols or _recorded_symbols(args.fixtures)
+
+    cache_dir = tempfile.mkdtemp(prefix='replay_load_')
+    try:
+        fetcher = DataFetcher(cache_dir=cache_dir, source=source,
+                              max_retries=args.retries, retry_backoff=args.backoff,
+                              memory_cache=MemoryLRUCache(),
+                              request_timeout=args.timeout, hedge_percentile=args.hedge)
+        print(f"股票数: {len(symbols)}, 线程数: {args.workers}, 轮数: {args.rounds}")
+        print(f"{'轮次':<6}{'耗时(秒)':>10}{'成功':>8}{'失败':>8}")
+        for round_no in range(1, args.rounds + 1):
+            errors = {}
+            start = time.perf_counter()
+            data = fetcher.get_many(symbols, args.start, args.end,
+                                    max_workers=args.workers, errors=errors)
+            elapsed = time.perf_counter() - start
+            print(f"{round_no:<6}{elapsed:>10.3f}{len(data):>8}{len(errors):>8}")
+
+        replay_stats = ak_replay.stats()
+        memory_stats = fetcher.memory_cache.stats()
+        print(f"上游调用: {replay_stats['total_calls']} 次 {replay_stats['calls']}")
+        print(f"注入错误: {replay_stats['errors']} 次, 触发限流: {replay_stats['throttled']} 次")
+        print(f"内存缓存命中率: {memory_stats['hit_rate']:.1%} "
+              f"(命中 {memory_stats['hits']}, 未命中 {memory_stats['misses']})")
+        metrics = fetcher.get_fetch_metrics()
+        latency = metrics['latency']
+        if latency['window']:
+            print(f"请求延迟: p50 {latency['p50']:.3f}秒, p95 {latency['p95']:.3f}秒, "
+                  f"p99 {latency['p99']:.3f}秒")
+        print(f"超时: {metrics['timeouts']} 次, 对冲请求: {metrics['hedged']} 次"
+              f"（先返回 {metrics['hedge_wins']} 次）, 熔断器: {metrics['circuit_state']}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def _recorded_symbols(fixture_dir: str):
+    """从夹具索引中读取已录制日线数据的股票代码"""
+    with open(os.path.join(fixture_dir, 'index.json'), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    return sorted({entry['params']['symbol'] for entry in index.values()
+                   if entry['function'] == 'stock_zh_a_hist'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="akshare录制/回放压测")
+    parser.add_argument('mode', choices=['record', 'replay'], help='录制或回放')
+    parser.add_argument('--fixtures', required=True, help='夹具文件目录')
+    parser.add_argument('--symbols', nargs='*', default=None, help='股票代码，回放时默认使用全部已录制的股票')
+    parser.add_argument('--start', default='20200101', help='开始日期')
+    parser.add_argument('--end', default='20231231', help='结束日期')
+    parser.add_argument('--workers', type=int, default=8, help='下载线程数')
+    parser.add_argument('--latency', type=float, default=0.2, help='回放延迟中位数（秒），0表示无延迟')
+    parser.add_argument('--sigma', type=float, default=0.5, help='回放延迟的对数标准差')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回放注入的错误率')
+    parser.add_argument('--max-rate', type=float, default=None, help='上游每秒允许的请求数')
+    parser.add_argument('--retries', type=int, default=2, help='失败重试次数')
+    parser.add_argument('--backoff', type=float, default=0.5, help='重试初始退避时间（秒）')
+    parser.add_argument('--timeout', type=float, default=None, help='单次请求超时时间（秒），0表示不限制')
+    parser.add_argument('--hedge', type=float, default=None, help='对冲请求的延迟分位数（如95），默认不对冲')
+    parser.add_argument('--rounds', type=int, default=3, help='回放轮数（第一轮之后应全部命中缓存）')
+    parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    args = parser.parse_args()
+
+    if args.mode == 'record':
+        if not args.symbols:
+            parser.error("录制时需要通过 --symbols 指定股票代码")
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@
 
 主要模块：
 - data_fetcher: 数据获取模块
+- data_sources: 数据源模块
 - indicators: 技术指标计算模块
 - conditions: 条件配置模块
 - backtest: 回测分析模块
@@ -18,6 +19,7 @@ __email__ = "contact@example.com"
 __license__ = "GPL-3.0"
 
 from src.data_fetcher import DataFetcher
+from src.data_sources import DataSource, AkshareDataSource, LocalFileDataSource
 from src.indicators import IndicatorCalculator, TechnicalSignalDetector
 from src.conditions import ConditionBuilder, ConditionValidator
 from src.backtest import BacktestAnalyzer, PerformanceAnalyzer
@@ -25,6 +27,9 @@ from src.utils import *
 
 __all__ = [
     'DataFetcher',
+    'DataSource',
+    'AkshareDataSource',
+    'LocalFileDataSource',
     'IndicatorCalculator',
     'TechnicalSignalDetector',
     'ConditionBuilder',
@@ -0,0 +1,264 @@
+"""
+akshare录制/回放模块
+录制DataFetcher发起的akshare调用结果为本地夹具文件，并在无网络环境下回放，
+回放时可注入延迟分布、错误率和限流，用于压测下载线程池、重试逻辑和缓存命中率
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+import logging
+
+from src.concurrency import TokenBucket
+
+
+# 不参与夹具匹配的日期参数，回放时按这些参数过滤录制的数据
+DATE_PARAMS = ('start_date', 'end_date')
+# 返回数据中可能的日期列名
+DATE_COLUMNS = ('日期', 'date', '时间', 'day')
+
+
+def constant_latency(seconds: float) -> Callable[[random.Random], float]:
+    """固定延迟"""
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> Callable[[random.Random], float]:
+    """在 [low, high] 秒之间均匀分布的延迟"""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """
+    对数正态分布的延迟（长尾，接近真实网络请求的延迟分布）
+
+    Args:
+        median: 延迟中位数（秒）
+        sigma: 对数标准差，越大长尾越明显
+    """
+    return lambda rng: median * rng.lognormvariate(0.0, sigma)
+
+
+class ReplayError(ConnectionError):
+    """回放时注入的网络错误"""
+
+
+class ReplayThrottledError(ReplayError):
+    """回放时超出限流速率（模拟上游返回429）"""
+
+
+class _FixtureStore:
+    """夹具文件目录，每个 (函数, 非日期参数) 组合对应一个pickle文件"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fixture_name(func_name: str, params: Dict[str, Any]) -> str:
+        """根据函数名和非日期参数生成夹具文件名"""
+        key_params = {k: v for k, v in sorted(params.items()) if k not in DATE_PARAMS}
+        digest = hashlib.sha1(json.dumps(key_params, sort_keys=True, default=str).encode('utf-8'))
+        return f"{func_name}-{digest.hexdigest()[:16]}.pkl"
+
+    def load(self, func_name: str, params: Dict[str, Any]) -> Optional[Any]:
+        """读取夹具，不存在时返回None"""
+        path = os.path.join(self.fixture_dir, self.fixture_name(func_name, params))
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+
+    def save(self, func_name: str, params: Dict[str, Any], result: Any):
+        """保存夹具；同一夹具多次录制的DataFrame按日期合并"""
+        name = self.fixture_name(func_name, params)
+        path = os.path.join(self.fixture_dir, name)
+
+        with self._lock:
+            if isinstance(result, pd.DataFrame) and os.path.exists(path):
+                existing = pd.read_pickle(path)
+                date_col = _find_date_column(result)
+                if isinstance(existing, pd.DataFrame) and date_col in existing.columns:
+                    merged = pd.concat([existing, result], ignore_index=True)
+                    merged = merged.drop_duplicates(subset=[date_col], keep='last')
+                    result = merged.sort_values(date_col).reset_index(drop=True)
+
+            pd.to_pickle(result, path)
+
+            index_path = os.path.join(self.fixture_dir, self.INDEX_FILE)
+            index = {}
+            if os.path.exists(index_path):
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            index[name] = {
+                'function': func_name,
+                'params': {k: v for k, v in params.items() if k not in DATE_PARAMS},
+                'recorded_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            with open(index_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=2, default=str)
+
+
+def _find_date_column(data: pd.DataFrame) -> Optional[str]:
+    """查找DataFrame中的日期列"""
+    for col in DATE_COLUMNS:
+        if col in data.columns:
+            return col
+    return None
+
+
+def _filter_by_dates(result: Any, params: Dict[str, Any]) -> Any:
+    """按调用参数中的开始/结束日期过滤录制的数据"""
+    if not isinstance(result, pd.DataFrame):
+        return result
+    date_col = _find_date_column(result)
+    if date_col is None:
+        return result
+
+    dates = pd.to_datetime(result[date_col])
+    mask = pd.Series(True, index=result.index)
+    if params.get('start_date'):
+        mask &= dates >= pd.Timestamp(str(params['start_date']))
+    if params.get('end_date'):
+        end = pd.Timestamp(str(params['end_date']))
+        if end == end.normalize():
+            # 只给出日期时包含当天的全部数据（分钟线）
+            end += pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        mask &= dates <= end
+    return result[mask.to_numpy()].reset_index(drop=True)
+
+
+class RecordingAkshare:
+    """
+    录制用的akshare替身
+
+    把调用转发给真实的akshare模块，并将返回结果保存为夹具文件。
+    通过 AkshareDataSource(ak_module=RecordingAkshare(...)) 使用。
+    """
+
+    def __init__(self, fixture_dir: str, ak_module: Any = None):
+        """
+        初始化录制器
+
+        Args:
+            fixture_dir: 夹具文件目录
+            ak_module: 被录制的akshare模块，默认导入akshare
+        """
+        if ak_module is None:
+            import akshare as ak_module
+        self._ak = ak_module
+        self._fixtures = _FixtureStore(fixture_dir)
+        self.logger = logging.getLogger(__name__)
+
+    def __getattr__(self, func_name: str) -> Callable:
+        func = getattr(self._ak, func_name)
+
+        def recorded(**params):
+            result = func(**params)
+            self._fixtures.save(func_name, params, result)
+            return result
+
+        recorded.__name__ = func_name
+        return recorded
+
+
+class ReplayAkshare:
+    """
+    回放用的akshare替身（线程安全）
+
+    按函数名和非日期参数查找录制的夹具，再按开始/结束日期过滤后返回。
+    每次调用依次经过：限流检查 -> 延迟 -> 随机错误，随机数由种子决定，结果可重复
+    （多线程并发时各线程取得随机数的先后顺序可能不同）。
+    通过 AkshareDataSource(ak_module=ReplayAkshare(...)) 使用。
+    """
+
+    def __init__(self,
+                 fixture_dir: str,
+                 latency: Optional[Callable[[random.Random], float]] = None,
+                 error_rate: float = 0.0,
+                 max_rate: Optional[float] = None,
+                 seed: Optional[int] = 0):
+        """
+        初始化回放器
+
+        Args:
+            fixture_dir: 夹具文件目录
+            latency: 延迟分布，参数为随机数生成器、返回延迟秒数的函数，
+                如 lognormal_latency(0.2)；None表示没有延迟
+            error_rate: 每次调用抛出 ReplayError 的概率
+            max_rate: 每秒允许的调用数，超出时抛出 ReplayThrottledError；None表示不限流
+            seed: 随机数种子
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"错误率必须在0到1之间: {error_rate}")
+
+        self._fixtures = _FixtureStore(fixture_dir)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle = TokenBucket(max_rate) if max_rate else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        self.calls = Counter()
+        self.errors = 0
+        self.throttled = 0
+
+    def __getattr__(self, func_name: str) -> Callable:
+        if func_name.startswith('_'):
+            raise AttributeError(func_name)
+
+        def replayed(**params):
+            return self._replay(func_name, params)
+
+        replayed.__name__ = func_name
+        return replayed
+
+    def _replay(self, func_name: str, params: Dict[str, Any]) -> Any:
+        """回放一次调用"""
+        with self._lock:
+            self.calls[func_name] += 1
+            delay = self.latency(self._rng) if self.latency else 0.0
+            fail = self._rng.random() < self.error_rate
+
+        if self.throttle is not None and not self.throttle.try_acquire():
+            with self._lock:
+                self.throttled += 1
+            raise ReplayThrottledError(f"请求过于频繁: {func_name}")
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail:
+            with self._lock:
+                self.errors += 1
+            raise ReplayError(f"注入的网络错误: {func_name}")
+
+        result = self._fixtures.load(func_name, params)
+        if result is None:
+            raise ValueError(f"没有录制的响应: {func_name} {params}")
+        return _filter_by_dates(result, params)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取回放统计信息
+
+        Returns:
+            包含各函数调用次数、注入错误数和限流次数的字典
+        """
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'total_calls': sum(self.calls.values()),
+                'errors': self.errors,
+                'throttled': self.throttled,
+            }
@@ -5,11 +5,12 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from datetime import datetime
 import logging
 from dataclasses import dataclass
 from src.conditions import Condition
+from src.trading_calendar import TradingCalendar
 
 
 @dataclass
@@ -50,7 +51,9 @@ class BacktestAnalyzer:
                     data: pd.DataFrame,
                     condition: Condition,
                     holding_period: int = 5,
-                    price_column: str = 'close') -> BacktestResult:
+                    price_column: str = 'close',
+                    trading_days: bool = False,
+                    calendar: Optional[TradingCalendar] = None) -> BacktestResult:
         """
         运行回测分析
 
@@ -59,6 +62,9 @@ class BacktestAnalyzer:
             condition: 触发条件
             holding_period: 持有天数
             price_column: 价格列名
+            trading_days: 持有期是否按交易日计算，默认按自然日
+            calendar: 按交易日计算时使用的交易日历（停牌日也计入持有期），
+                None表示以数据中的K线为交易日
 
         Returns:
             回测结果对象
@@ -72,7 +78,7 @@ class BacktestAnalyzer:
         if price_column not in data.columns:
             raise ValueError(f"数据中缺少价格列: {price_column}")
 
-        self.logger.info(f"开始回测分析，持有期: {holding_period}天")
+        self.logger.info(f"开始回测分析，持有期: {holding_period}{'个交易日' if trading_days else '天'}")
 
         # 计算条件信号
         signals = self._calculate_signals(data, condition)
@@ -83,7 +89,7 @@ class BacktestAnalyzer:
 
         # 计算每个信号的收益
         signal_events, returns, holding_periods = self._calculate_signal_returns(
-            data, signals, holding_period, price_column
+            data, signals, holding_period, price_column, trading_days, calendar
         )
 
         # 计算统计指标
@@ -105,6 +111,7 @@ class BacktestAnalyzer:
             parameters={
                 'condition': condition.description,
                 'holding_period': holding_period,
+                'holding_unit': 'trading_days' if trading_days else 'days',
                 'price_column': price_column,
                 'data_period': f"{data.index[0]} to {data.index[-1]}"
             }
@@ -113,6 +120,129 @@ class BacktestAnalyzer:
         self.logger.info(f"回测完成，总信号数: {result.total_signals}, 胜率: {result.win_rate:.2%}")
         return result
 
+    def run_backtest_chunked(self,
+                             chunks: Iterable[pd.DataFrame],
+                             condition: Condition,
+                             holding_period: int = 5,
+                             price_column: str = 'close',
+                             by_bars: bool = True,
+                             lookback_bars: int = 5) -> BacktestResult:
+        """
+        逐块运行回测（如逐月的分钟线及其指标，见 IndicatorCalculator.iter_indicators）
+
+        条件在"前一块末尾 lookback_bars 行 + 当前块"上计算，使交叉类条件在块边界处
+        也能判断；持有期跨块的信号挂起，到达目标K线所在的块时再计算收益。
+        结果与把所有块拼接后调用 run_backtest 一致，但同一时刻只保留一块数据。
+
+        Args:
+            chunks: 按时间顺序排列的数据块（需已包含条件用到的指标列）
+            condition: 触发条件
+            holding_period: 持有期
+            price_column: 价格列名
+            by_bars: 持有期是否按K线根数计算（分钟线通常如此），False时按自然日
+            lookback_bars: 计算条件时带上的前一块末尾行数
+
+        Returns:
+            回测结果对象
+
+        Raises:
+            ValueError: 当输入数据无效时
+        """
+        unit = '根K线' if by_bars else '天'
+        self.logger.info(f"开始分块回测分析，持有期: {holding_period}{unit}")
+
+        signal_events: List[SignalEvent] = []
+        returns: List[Optional[float]] = []
+        # 挂起的信号：信号序号、信号价格，以及目标K线的全局序号（按K线）或目标时间（按自然日）
+        pending_ids = np.empty(0, dtype=np.int64)
+        pending_prices = np.empty(0, dtype=np.float64)
+        pending_targets = np.empty(0, dtype=np.int64 if by_bars else 'datetime64[ns]')
+
+        carry: Optional[pd.DataFrame] = None
+        offset = 0
+        first_index, last_index, last_price = None, None, None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if price_column not in chunk.columns:
+                raise ValueError(f"数据中缺少价格列: {price_column}")
+
+            frame = chunk if carry is None else pd.concat([carry, chunk])
+            signals = self._calculate_signals(frame, condition)
+            mask = signals.reindex(frame.index).fillna(False).to_numpy(dtype=bool)
+            positions = np.flatnonzero(mask[len(frame) - len(chunk):])
+            prices = chunk[price_column].to_numpy(dtype=np.float64)
+
+            # 新信号加入挂起列表
+            for timestamp, price in zip(chunk.index[positions], prices[positions]):
+                signal_events.append(SignalEvent(timestamp=timestamp, signal_price=price,
+                                                 signal_type="buy", condition_description=""))
+                returns.append(None)
+            pending_ids = np.concatenate([pending_ids,
+                                          np.arange(len(returns) - len(positions), len(returns))])
+            pending_prices = np.concatenate([pending_prices, prices[positions]])
+            if by_bars:
+                targets = offset + positions + holding_period
+            else:
+                targets = (chunk.index[positions] + pd.Timedelta(days=holding_period)).values
+            pending_targets = np.concatenate([pending_targets, targets])
+
+            # 目标K线落在本块内的信号计算收益
+            if by_bars:
+                local = pending_targets - offset
+            else:
+                local = chunk.index.searchsorted(pending_targets, side='left')
+            resolved = local < len(chunk)
+            resolved_returns = (prices[local[resolved]] - pending_prices[resolved]) / pending_prices[resolved]
+            for signal_id, value in zip(pending_ids[resolved], resolved_returns):
+                returns[signal_id] = float(value)
+            pending_ids = pending_ids[~resolved]
+            pending_prices = pending_prices[~resolved]
+            pending_targets = pending_targets[~resolved]
+
+            if first_index is None:
+                first_index = chunk.index[0]
+            last_index, last_price = chunk.index[-1], prices[-1]
+            carry = frame.iloc[-lookback_bars:] if lookback_bars > 0 else None
+            offset += len(chunk)
+
+        if first_index is None:
+            raise ValueError("输入数据为空")
+        if not signal_events:
+            self.logger.warning("未找到满足条件的信号")
+            return self._create_empty_result(condition, holding_period)
+
+        # 超出数据范围的信号与 run_backtest 相同，以最后一根K线的价格计算
+        for signal_id, signal_price in zip(pending_ids, pending_prices):
+            returns[signal_id] = float((last_price - signal_price) / signal_price)
+
+        holding_periods = [holding_period] * len(returns)
+        stats = self._calculate_statistics(returns, holding_periods)
+        result = BacktestResult(
+            signals=signal_events,
+            returns=returns,
+            holding_periods=holding_periods,
+            win_rate=stats['win_rate'],
+            avg_return=stats['avg_return'],
+            max_return=stats['max_return'],
+            min_return=stats['min_return'],
+            std_return=stats['std_return'],
+            total_signals=len(returns),
+            profitable_signals=stats['profitable_count'],
+            losing_signals=stats['losing_count'],
+            avg_holding_period=stats['avg_holding_period'],
+            parameters={
+                'condition': condition.description,
+                'holding_period': holding_period,
+                'holding_unit': 'bars' if by_bars else 'days',
+                'price_column': price_column,
+                'data_period': f"{first_index} to {last_index}"
+            }
+        )
+
+        self.logger.info(f"分块回测完成，总信号数: {result.total_signals}, 胜率: {result.win_rate:.2%}")
+        return result
+
     def _calculate_signals(self, data: pd.DataFrame, condition: Condition) -> pd.Series:
         """
         计算条件信号
@@ -134,57 +264,62 @@ class BacktestAnalyzer:
                                 data: pd.DataFrame,
                                 signals: pd.Series,
                                 holding_period: int,
-                                price_column: str) -> Tuple[List[SignalEvent], List[float], List[int]]:
+                                price_column: str,
+                                trading_days: bool = False,
+                                calendar: Optional[TradingCalendar] = None
+                                ) -> Tuple[List[SignalEvent], List[float], List[int]]:
         """
         计算每个信号的收益
 
+        信号日和目标日都换算为K线序号（按已排序的日期索引二分查找），收益率一次向量化计算。
+
         Args:
             data: 股票数据
             signals: 信号序列
             holding_period: 持有天数
             price_column: 价格列名
+            trading_days: 持有期是否按交易日计算
+            calendar: 交易日历
 
         Returns:
             信号事件列表、收益率列表、持有期列表
         """
-        signal_events = []
-        returns = []
-        holding_periods = []
-
-        # 获取信号日期
-        signal_dates = signals[signals].index
-
-        for signal_date in signal_dates:
-            if signal_date not in data.index:
-                continue
-
-            signal_price = data.loc[signal_date, price_column]
-
-            # 计算目标日期
-            target_date = signal_date + timedelta(days=holding_period)
-
-            # 找到目标日期或最接近的交易日
-            target_price = self._find_target_price(data, target_date, price_column)
-
-            if target_price is None:
-                continue
+        if data.empty:
+            return [], [], []
 
-            # 计算收益率
-            return_rate = (target_price - signal_price) / signal_price
+        # 获取信号所在的K线序号
+        mask = signals.reindex(data.index).fillna(False).to_numpy(dtype=bool)
+        signal_positions = np.flatnonzero(mask)
+        signal_dates = data.index[signal_positions]
 
-            # 创建信号事件
-            signal_event = SignalEvent(
+        # 计算目标K线序号：目标日期当天，或之后最近的交易日；超出数据范围时取最后一根K线
+        if trading_days and calendar is None:
+            target_positions = signal_positions + holding_period
+        else:
+            if trading_days:
+                target_dates = calendar.offset(signal_dates, holding_period)
+            else:
+                target_dates = signal_dates + pd.Timedelta(days=holding_period)
+            target_positions = data.index.searchsorted(target_dates, side='left')
+            # 超出交易日历范围的目标日期（NaT）视为超出数据范围
+            target_positions[pd.isna(target_dates)] = len(data)
+        target_positions = np.minimum(target_positions, len(data) - 1)
+
+        prices = data[price_column].to_numpy()
+        signal_prices = prices[signal_positions]
+        returns = (prices[target_positions] - signal_prices) / signal_prices
+
+        signal_events = [
+            SignalEvent(
                 timestamp=signal_date,
                 signal_price=signal_price,
                 signal_type="buy",  # 默认为买入信号
                 condition_description=""
             )
+            for signal_date, signal_price in zip(signal_dates, signal_prices)
+        ]
 
-            signal_events.append(signal_event)
-            returns.append(return_rate)
-            holding_periods.append(holding_period)
-
-        return signal_events, returns, holding_periods
+        return signal_events, returns.tolist(), [holding_period] * len(signal_events)
 
     def _find_target_price(self,
                           data: pd.DataFrame,
@@ -199,23 +334,14 @@ class BacktestAnalyzer:
             price_column: 价格列名
 
         Returns:
-            目标价格或None（如果找不到）
+            目标日期或之后最近一个交易日的价格；没有未来的日期时使用最后一个可用日期，
+            数据为空时返回None
         """
-        # 尝试精确匹配
-        if target_date in data.index:
-            return data.loc[target_date, price_column]
-
-        # 寻找最接近的日期
-        available_dates = data.index[data.index >= target_date]
-        if not available_dates.empty:
-            closest_date = available_dates[0]
-            return data.loc[closest_date, price_column]
-
-        # 如果没有未来的日期，使用最后一个可用日期
-        if not data.empty:
-            return data.iloc[-1][price_column]
+        if data.empty:
+            return None
 
-        return None
+        position = min(data.index.searchsorted(target_date, side='left'), len(data) - 1)
+        return data[price_column].iloc[position]
 
     def _calculate_statistics(self,
                             returns: List[float],
@@ -291,7 +417,9 @@ class BacktestAnalyzer:
     def run_multiple_backtests(self,
                              data: pd.DataFrame,
                              conditions: List[Condition],
-                             holding_periods: List[int] = None) -> List[BacktestResult]:
+                             holding_periods: List[int] = None,
+                             trading_days: bool = False,
+                             calendar: Optional[TradingCalendar] = None) -> List[BacktestResult]:
         """
         运行多个回测
 
@@ -299,6 +427,8 @@ class BacktestAnalyzer:
             data: 股票数据
             conditions: 条件列表
             holding_periods: 持有期列表
+            trading_days: 持有期是否按交易日计算
+            calendar: 按交易日计算时使用的交易日历
 
         Returns:
             回测结果列表
@@ -316,7 +446,8 @@ class BacktestAnalyzer:
             for holding_period in holding_periods:
                 test_count += 1
                 try:
-                    result = self.run_backtest(data, condition, holding_period)
+                    result = self.run_backtest(data, condition, holding_period,
+                                               trading_days=trading_days, calendar=calendar)
                     results.append(result)
                     self.logger.info(f"完成测试 {test_count}/{total_tests}")
                 except Exception as e:
@@ -370,12 +501,13 @@ class BacktestAnalyzer:
         Returns:
             报告字符串
         """
+        unit = {'trading_days': '个交易日', 'bars': '根K线'}.get(result.parameters.get('holding_unit'), '天')
         report = f"""
 ## 回测分析报告
 
 ### 基本信息
 - **条件**: {result.parameters['condition']}
-- **持有期**: {result.parameters['holding_period']} 天
+- **持有期**: {result.parameters['holding_period']} {unit}
 - **数据期间**: {result.parameters['data_period']}
 - **价格列**: {result.parameters['price_column']}
 
@@ -383,7 +515,7 @@ class BacktestAnalyzer:
 - **总信号数**: {result.total_signals}
 - **盈利信号数**: {result.profitable_signals}
 - **亏损信号数**: {result.losing_signals}
-- **平均持有期**: {result.avg_holding_period:.1f} 天
+- **平均持有期**: {result.avg_holding_period:.1f} {unit}
 
 ### 收益统计
 - **胜率**: {result.win_rate:.2%}
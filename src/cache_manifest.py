@@ -0,0 +1,273 @@
+"""
+缓存清单模块
+使用SQLite记录每个缓存条目的元信息，缓存统计和新鲜度检查无需扫描缓存目录
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import logging
+
+
+class CacheManifest:
+    """
+    缓存清单类
+
+    每个缓存条目一行，记录数据源、股票代码、周期、复权方式、已覆盖区间、最后一根K线日期、
+    行数、字节数、内容哈希以及访问统计。清单与缓存数据放在同一目录下，多个进程可以同时读写。
+    另有一张表记录固定（不参与淘汰）的股票代码，以及一张单行表记录条目数和总字节数
+    （由触发器在写入/删除条目的同一事务中更新，配额检查无需每次汇总整张表）。
+    """
+
+    FILE_NAME = "manifest.sqlite3"
+
+    # 列名 -> SQL类型；covered 以JSON文本保存
+    COLUMNS = {
+        'key': 'TEXT PRIMARY KEY',
+        'source': 'TEXT',
+        'symbol': 'TEXT',
+        'period': 'TEXT',
+        'adjust': 'TEXT',
+        'kind': 'TEXT',
+        'covered': 'TEXT',
+        'first_date': 'TEXT',
+        'last_date': 'TEXT',
+        'rows': 'INTEGER',
+        'bytes': 'INTEGER',
+        'content_hash': 'TEXT',
+        'checked': 'TEXT',
+        'updated_at': 'REAL',
+        'last_access': 'REAL',
+        'access_count': 'INTEGER DEFAULT 0',
+    }
+    # 支持的淘汰策略及对应的排序方式（先淘汰排在前面的条目）
+    EVICTION_ORDER = {
+        'lru': "COALESCE(last_access, updated_at) ASC",
+        'lfu': "access_count ASC, COALESCE(last_access, updated_at) ASC",
+    }
+
+    def __init__(self, cache_dir: str):
+        """
+        初始化缓存清单
+
+        Args:
+            cache_dir: 缓存目录，清单文件保存在该目录下
+        """
+        self.db_path = os.path.join(cache_dir, self.FILE_NAME)
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+
+        self.created = not os.path.exists(self.db_path)
+        with self._connect() as conn:
+            columns = ", ".join(f"{name} {sql_type}" for name, sql_type in self.COLUMNS.items())
+            conn.execute(f"CREATE TABLE IF NOT EXISTS entries ({columns})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_symbol ON entries(symbol)")
+            conn.execute("CREATE TABLE IF NOT EXISTS pinned (symbol TEXT PRIMARY KEY)")
+
+            # 旧版清单缺少的列直接补上
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(entries)")}
+            for name, sql_type in self.COLUMNS.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {sql_type}")
+
+            self._create_totals(conn)
+
+    @staticmethod
+    def _create_totals(conn: sqlite3.Connection):
+        """创建条目数/总字节数汇总表及维护它的触发器，旧版清单按现有条目初始化一次"""
+        conn.execute("CREATE TABLE IF NOT EXISTS totals "
+                     "(id INTEGER PRIMARY KEY CHECK (id = 0), count INTEGER, bytes INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO totals (id, count, bytes) "
+                     "SELECT 0, COUNT(*), COALESCE(SUM(bytes), 0) FROM entries")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS totals_insert AFTER INSERT ON entries BEGIN "
+                     "UPDATE totals SET count = count + 1, bytes = bytes + COALESCE(NEW.bytes, 0) "
+                     "WHERE id = 0; END")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS totals_delete AFTER DELETE ON entries BEGIN "
+                     "UPDATE totals SET count = count - 1, bytes = bytes - COALESCE(OLD.bytes, 0) "
+                     "WHERE id = 0; END")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS totals_update AFTER UPDATE OF bytes ON entries BEGIN "
+                     "UPDATE totals SET bytes = bytes - COALESCE(OLD.bytes, 0) + COALESCE(NEW.bytes, 0) "
+                     "WHERE id = 0; END")
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接（SQLite连接不能跨线程共享）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, key: str, **fields):
+        """
+        新增或更新缓存条目记录
+
+        Args:
+            key: 缓存键
+            **fields: 要写入的字段（未传入的字段保持原值）
+        """
+        unknown = set(fields) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"未知的清单字段: {sorted(unknown)}")
+
+        if 'covered' in fields and not isinstance(fields['covered'], str):
+            fields['covered'] = json.dumps(fields['covered'])
+        fields.setdefault('updated_at', time.time())
+
+        names = ['key'] + list(fields)
+        placeholders = ", ".join("?" for _ in names)
+        updates = ", ".join(f"{name}=excluded.{name}" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO entries ({', '.join(names)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(key) DO UPDATE SET {updates}",
+                [key] + list(fields.values())
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目记录
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            字段字典，covered 已解析为列表；不存在时返回None
+        """
+        row = self._connect().execute("SELECT * FROM entries WHERE key=?", (key,)).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+
+    def delete(self, key: str) -> bool:
+        """删除缓存条目记录，返回是否存在该记录"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM entries WHERE key=?", (key,)).rowcount > 0
+
+    def keys(self, symbol: Optional[str] = None, source: Optional[str] = None) -> List[str]:
+        """
+        列出缓存键
+
+        Args:
+            symbol: 只列出该股票的条目，None表示全部
+            source: 只列出该数据源的条目，None表示全部
+
+        Returns:
+            缓存键列表
+        """
+        conditions, params = [], []
+        if symbol is not None:
+            conditions.append("symbol=?")
+            params.append(symbol)
+        if source is not None:
+            conditions.append("source=?")
+            params.append(source)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connect().execute(f"SELECT key FROM entries{where} ORDER BY key", params)
+        return [row['key'] for row in rows]
+
+    def entries(self,
+                source: Optional[str] = None,
+                kind: Optional[str] = None,
+                period: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        按条件列出缓存条目记录
+
+        Args:
+            source: 数据源，None表示全部
+            kind: 条目类型（'bars' 或 'factor'），None表示全部
+            period: 数据周期，None表示全部
+
+        Returns:
+            条目记录列表（与get()的返回格式相同）
+        """
+        conditions, params = [], []
+        for name, value in (('source', source), ('kind', kind), ('period', period)):
+            if value is not None:
+                conditions.append(f"{name}=?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connect().execute(f"SELECT * FROM entries{where} ORDER BY key", params)
+        return [self._row_to_dict(row) for row in rows]
+
+    def touch(self, keys: List[str], accessed_at: Optional[float] = None):
+        """
+        记录缓存条目被访问（更新最近访问时间并累加访问次数）
+
+        Args:
+            keys: 被访问的缓存键
+            accessed_at: 访问时间戳，默认为当前时间
+        """
+        accessed_at = accessed_at or time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE entries SET last_access=?, access_count=COALESCE(access_count, 0)+1 "
+                "WHERE key=?",
+                [(accessed_at, key) for key in keys]
+            )
+
+    def eviction_candidates(self,
+                            policy: str = 'lru',
+                            exclude: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        按淘汰策略列出可淘汰的条目（不含固定的股票）
+
+        Args:
+            policy: 淘汰策略，'lru'（最近最少使用）或 'lfu'（最不经常使用）
+            exclude: 不参与淘汰的缓存键
+
+        Returns:
+            按淘汰先后排序的 {'key', 'symbol', 'bytes'} 列表
+        """
+        if policy not in self.EVICTION_ORDER:
+            raise ValueError(f"不支持的淘汰策略: {policy}")
+
+        rows = self._connect().execute(
+            "SELECT key, symbol, bytes FROM entries "
+            "WHERE symbol IS NULL OR symbol NOT IN (SELECT symbol FROM pinned) "
+            f"ORDER BY {self.EVICTION_ORDER[policy]}"
+        )
+        exclude = set(exclude or [])
+        return [dict(row) for row in rows if row['key'] not in exclude]
+
+    def pin(self, symbols: List[str]):
+        """固定股票，其缓存条目不参与淘汰"""
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO pinned (symbol) VALUES (?)",
+                             [(symbol,) for symbol in symbols])
+
+    def unpin(self, symbols: List[str]):
+        """取消固定股票"""
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM pinned WHERE symbol=?", [(symbol,) for symbol in symbols])
+
+    def pinned(self) -> List[str]:
+        """列出固定的股票代码"""
+        rows = self._connect().execute("SELECT symbol FROM pinned ORDER BY symbol")
+        return [row['symbol'] for row in rows]
+
+    def summary(self) -> Dict[str, int]:
+        """
+        汇总缓存统计
+
+        Returns:
+            包含条目数 count 和总字节数 bytes 的字典
+        """
+        row = self._connect().execute("SELECT count, bytes FROM totals WHERE id = 0").fetchone()
+        return {'count': row['count'], 'bytes': row['bytes']}
+
+    def clear(self):
+        """删除全部条目记录（固定的股票保留）"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """将查询结果转换为字典"""
+        record = dict(row)
+        record['covered'] = json.loads(record['covered']) if record.get('covered') else []
+        return record
@@ -0,0 +1,766 @@
+"""
+列式缓存存储模块
+以"每列一个.npy文件"的方式持久化行情数据，支持内存映射与按列读取，以及可选的按列压缩
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import logging
+
+from src.column_codecs import column_spec, decode_column, encode_column, get_codec
+from src.concurrency import FileLock
+
+
+class CacheCorruptionError(ValueError):
+    """缓存条目损坏（文件缺失、被截断或校验和不一致）"""
+
+    def __init__(self, key: str, reason: str):
+        super().__init__(f"缓存条目损坏: {key}, {reason}")
+        self.key = key
+        self.reason = reason
+
+
+class ColumnarCacheStore:
+    """
+    列式缓存存储类
+
+    每个缓存条目对应缓存目录下的一个子目录：
+        {key}/meta.json        列名、数据类型、行数等元信息
+        {key}/__index__.npy    日期索引
+        {key}/{column}.npy     每列一个文件
+
+    读取时只打开被请求的列；可选使用 numpy 的内存映射（mmap），按需读入页面。
+    注意每个内存映射的列都会占用一个文件句柄，批量持有大量DataFrame时应关闭mmap。
+
+    写入时先在临时目录中写完全部文件，再整体重命名为条目目录，进程在写入中途被杀死
+    只会留下临时目录（由 recover() 清理）。写入期间持有 .writers/ 下的写入锁，
+    recover() 据此判断临时目录的写入者是否仍在运行（不依赖pid，容器和多主机共享目录时同样可靠）。每个文件的长度和CRC32记录在meta.json中，
+    整列读取时校验CRC32，只读取窗口时校验窗口所在数据块（每 CHECKSUM_BLOCK_ROWS 行）的CRC32，
+    显式的内存映射读取只校验文件长度；不一致时抛出 CacheCorruptionError，
+    调用方可用 quarantine() 将条目移入隔离目录。
+
+    启用压缩时，列保存为 {column}.bin（索引为 __index__.bin），编码方式记录在meta.json中；
+    压缩的列不能内存映射，读取时整列解压。压缩与未压缩的条目可以混合存在，
+    切换压缩配置后旧条目仍可读取，重新写入时才转换。
+    """
+
+    META_FILE = "meta.json"
+    INDEX_FILE = "__index__.npy"
+    INDEX_NAME = "__index__"
+    COMPRESSED_SUFFIX = ".bin"
+    QUARANTINE_DIR = ".quarantine"
+    # 隔离目录最多保留的条目数和天数，超出的最早隔离的条目被删除
+    QUARANTINE_MAX_ENTRIES = 20
+    QUARANTINE_MAX_AGE_DAYS = 7
+    WRITERS_DIR = ".writers"
+    # 没有写入锁的临时目录（旧版本写入的）超过该时间未修改才视为被中断
+    RECOVER_GRACE_SECONDS = 3600
+    # 未压缩列按数据块记录校验和的行数，只读取窗口时只需校验窗口所在的数据块
+    CHECKSUM_BLOCK_ROWS = 1024
+    FORMAT_VERSION = 1
+    # 压缩时做差分编码的列（日期索引单调递增，成交量为整数）
+    DELTA_COLUMNS = (INDEX_NAME, 'volume')
+
+    def __init__(self,
+                 root_dir: str,
+                 compression: Optional[Union[str, Dict[str, str]]] = None,
+                 fsync: bool = False):
+        """
+        初始化列式缓存存储
+
+        Args:
+            root_dir: 缓存根目录
+            compression: 压缩算法，None或 'none' 表示不压缩；可以是算法名称（'zlib'、'lzma'，
+                安装了对应的包时还有 'zstd'、'lz4'），或按列指定的字典
+                （如 {'*': 'zstd', 'close': 'lzma'}，'*' 为其他列及索引的算法）
+            fsync: 重命名前是否把文件刷到磁盘。进程被杀死时临时目录加重命名已能保证
+                不留下写了一半的条目；需要防止断电丢失刚写入的数据时开启（写入变慢）
+
+        Raises:
+            ValueError: 压缩算法不可用时
+        """
+        self.root_dir = root_dir
+        self.logger = logging.getLogger(__name__)
+        if isinstance(compression, str):
+            compression = {'*': compression}
+        for codec in (compression or {}).values():
+            if codec != 'none':
+                get_codec(codec)
+        self.compression = compression or None
+        self.fsync = fsync
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def entry_path(self, key: str) -> str:
+        """
+        获取缓存条目目录路径
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            条目目录的完整路径
+        """
+        return os.path.join(self.root_dir, key)
+
+    def exists(self, key: str) -> bool:
+        """检查缓存条目是否存在"""
+        return os.path.exists(os.path.join(self.entry_path(key), self.META_FILE))
+
+    def mtime(self, key: str) -> Optional[float]:
+        """获取缓存条目的最后写入时间（时间戳），不存在时返回None"""
+        meta_path = os.path.join(self.entry_path(key), self.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        return os.path.getmtime(meta_path)
+
+    def read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目的元信息
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            元信息字典或None
+        """
+        meta_path = os.path.join(self.entry_path(key), self.META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError as e:
+            raise CacheCorruptionError(key, f"元信息无法解析: {e}")
+
+    def save(self,
+             key: str,
+             data: pd.DataFrame,
+             extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        保存DataFrame为列式缓存条目
+
+        先写入临时目录，全部写完后再替换旧条目，避免读到写了一半的数据。
+
+        Args:
+            key: 缓存键
+            data: 以日期为索引的DataFrame
+            extra: 随条目一起保存的附加元信息（如复权方式、覆盖的日期区间）
+
+        Returns:
+            条目统计信息：行数 rows、占用字节数 bytes、内容哈希 content_hash
+        """
+        entry_dir = self.entry_path(key)
+        token = f"{os.getpid()}-{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        with self._writer_lock(key, token):
+            return self._save_locked(key, data, extra, entry_dir, token)
+
+    def _save_locked(self,
+                     key: str,
+                     data: pd.DataFrame,
+                     extra: Optional[Dict[str, Any]],
+                     entry_dir: str,
+                     token: str) -> Dict[str, Any]:
+        """持有写入锁时写入临时目录并替换条目（见 save）"""
+        tmp_dir = f"{entry_dir}.tmp-{token}"
+        os.makedirs(tmp_dir)
+
+        try:
+            columns = []
+            arrays = {}
+            for col in data.columns:
+                values = self._to_storable(data[col])
+                spec = self._write_array(tmp_dir, str(col), values)
+                columns.append({'name': str(col), 'dtype': values.dtype.str, **spec})
+                arrays[str(col)] = values
+
+            index_values = np.asarray(data.index.values)
+            index_spec = self._write_array(tmp_dir, self.INDEX_NAME, index_values)
+
+            meta = {
+                'format_version': self.FORMAT_VERSION,
+                'index_name': data.index.name,
+                'index_dtype': index_values.dtype.str,
+                'index_file': index_spec,
+                'columns': columns,
+                'rows': int(len(data)),
+                'extra': extra or {},
+            }
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+                self._sync(f)
+
+            nbytes = self._dir_size(tmp_dir)
+            self._replace_dir(tmp_dir, entry_dir, token)
+            if self.fsync:
+                self._sync_dir(self.root_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        return {
+            'rows': int(len(data)),
+            'bytes': nbytes,
+            'content_hash': self._content_hash(index_values, arrays),
+        }
+
+    def load(self,
+             key: str,
+             columns: Optional[List[str]] = None,
+             mmap: bool = False,
+             start: Optional[Any] = None,
+             end: Optional[Any] = None) -> Optional[pd.DataFrame]:
+        """
+        读取列式缓存条目
+
+        指定日期窗口时，先在（内存映射的）日期索引上二分查找窗口的行号范围，
+        每列只读取窗口内的行，不读入整列。
+
+        Args:
+            key: 缓存键
+            columns: 需要读取的列，None表示全部列
+            mmap: 是否使用内存映射读取（零拷贝，但每列占用一个文件句柄）
+            start: 窗口开始日期（含），None表示从第一行开始
+            end: 窗口结束日期（含），None表示到最后一行
+
+        Returns:
+            DataFrame，条目不存在时返回None
+
+        Raises:
+            CacheCorruptionError: 条目的文件缺失、被截断或校验和不一致时
+        """
+        meta = self.read_meta(key)
+        if meta is None:
+            return None
+        try:
+            return self._load_entry(key, meta, columns, mmap, start, end)
+        except CacheCorruptionError:
+            raise
+        except (OSError, ValueError, KeyError) as e:
+            # 读取中途条目被删除也会到这里，由调用方确认后再隔离
+            raise CacheCorruptionError(key, f"读取失败: {e}")
+
+    def _load_entry(self,
+                    key: str,
+                    meta: Dict[str, Any],
+                    columns: Optional[List[str]],
+                    mmap: bool,
+                    start: Optional[Any],
+                    end: Optional[Any]) -> pd.DataFrame:
+        """按元信息读取条目（见 load）"""
+
+        entry_dir = self.entry_path(key)
+        has_rows = meta['rows'] > 0
+        windowed = has_rows and (start is not None or end is not None)
+        mmap_mode = 'r' if (mmap or windowed) and has_rows else None
+
+        specs = {c['name']: c for c in meta['columns']}
+        if columns is None:
+            selected = list(specs)
+        else:
+            selected = [c for c in columns if c in specs]
+
+        index_spec = meta.get('index_file')
+        if windowed:
+            first, last, index_values = self._window_index(key, index_spec, meta['rows'], start, end)
+        else:
+            index_values = self._read_array(key, self.INDEX_NAME, index_spec, meta['rows'])
+            first, last = 0, len(index_values)
+        index = pd.Index(index_values, name=meta.get('index_name'))
+
+        data = {}
+        for col in selected:
+            values = self._read_array(key, col, specs[col], meta['rows'], mmap_mode,
+                                      window=(first, last) if windowed and not mmap else None)
+            if windowed:
+                values = values[first:last]
+                if not mmap:
+                    # 复制出窗口内的行，只读取这部分页面，并释放文件映射
+                    values = np.array(values)
+            data[col] = values
+        return pd.DataFrame(data, index=index, columns=selected, copy=False)
+
+    def _window_index(self,
+                      key: str,
+                      spec: Optional[Dict[str, Any]],
+                      rows: int,
+                      start: Optional[Any],
+                      end: Optional[Any]) -> Tuple[int, int, np.ndarray]:
+        """
+        在日期索引上二分查找窗口的行号范围
+
+        未压缩的索引以内存映射方式查找，只读取二分查找经过的页面；之后校验窗口及其前后
+        各一行所在数据块的CRC32，并确认窗口边界两侧的日期满足查找条件（索引其他位置的
+        损坏会使查找落到错误的位置，此时边界条件不成立）。压缩的索引整列解压并校验。
+
+        Returns:
+            (起始行号, 结束行号（不含）, 窗口内的索引值)
+
+        Raises:
+            CacheCorruptionError: 索引损坏时
+        """
+        spec = spec or {}
+        mapped = not spec.get('codec')
+        values = self._read_array(key, self.INDEX_NAME, spec, rows, 'r' if mapped else None)
+        lower = np.datetime64(pd.Timestamp(start)) if start is not None else None
+        upper = np.datetime64(pd.Timestamp(end)) if end is not None else None
+        first = int(np.searchsorted(values, lower, side='left')) if lower is not None else 0
+        last = int(np.searchsorted(values, upper, side='right')) if upper is not None else rows
+        last = max(first, last)
+
+        if mapped and 'block_crc32' in spec:
+            self._verify_blocks(key, self.INDEX_NAME, values, spec, max(first - 1, 0), min(last + 1, rows))
+            bounds_ok = (
+                (lower is None or ((first == 0 or values[first - 1] < lower) and
+                                   (first == rows or values[first] >= lower))) and
+                (upper is None or ((last == 0 or values[last - 1] <= upper or last == first) and
+                                   (last == rows or values[last] > upper)))
+            )
+            if not bounds_ok:
+                raise CacheCorruptionError(key, "日期索引与窗口边界不一致")
+        return first, last, np.array(values[first:last])
+
+    def delete(self, key: str) -> bool:
+        """
+        删除缓存条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否删除了条目
+        """
+        entry_dir = self.entry_path(key)
+        if not os.path.isdir(entry_dir):
+            return False
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        return True
+
+    def describe(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        重新计算已有缓存条目的统计信息（需要读取全部数据，用于重建缓存清单）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            与save()返回值相同的统计信息，另含 extra 和 index（日期索引）；
+            条目不存在时返回None
+        """
+        meta = self.read_meta(key)
+        if meta is None:
+            return None
+
+        entry_dir = self.entry_path(key)
+        index_values = self._read_array(key, self.INDEX_NAME, meta.get('index_file'), meta['rows'])
+        arrays = {
+            c['name']: self._read_array(key, c['name'], c, meta['rows'])
+            for c in meta['columns']
+        }
+        return {
+            'rows': meta['rows'],
+            'bytes': self._dir_size(entry_dir),
+            'content_hash': self._content_hash(index_values, arrays),
+            'extra': meta.get('extra', {}),
+            'index': pd.Index(index_values),
+        }
+
+    def verify(self, key: str) -> Optional[str]:
+        """
+        完整校验缓存条目（读取并校验全部文件）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            损坏原因，条目完好或不存在时返回None
+        """
+        try:
+            self.load(key)
+        except CacheCorruptionError as e:
+            return e.reason
+        return None
+
+    def quarantine(self, key: str) -> Optional[str]:
+        """
+        将损坏的条目移入隔离目录（保留现场以便排查），之后该键视为不存在
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            隔离后的目录路径，条目不存在时返回None
+        """
+        entry_dir = self.entry_path(key)
+        if not os.path.isdir(entry_dir):
+            return None
+        target = os.path.join(self.root_dir, self.QUARANTINE_DIR, f"{key}-{time.time_ns()}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.rename(entry_dir, target)
+        except FileNotFoundError:
+            return None
+        self.prune_quarantine(keep=target)
+        return target
+
+    def _quarantined_dirs(self) -> List[Tuple[float, str]]:
+        """隔离目录中的条目，按隔离时间从早到晚排列的 (隔离时间, 路径) 列表"""
+        quarantine_dir = os.path.join(self.root_dir, self.QUARANTINE_DIR)
+        try:
+            names = os.listdir(quarantine_dir)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            path = os.path.join(quarantine_dir, name)
+            # 目录名以隔离时的纳秒时间戳结尾（重命名不改变目录的修改时间）
+            suffix = name.rpartition('-')[2]
+            if suffix.isdigit():
+                entries.append((int(suffix) / 1e9, path))
+                continue
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def prune_quarantine(self,
+                         max_entries: Optional[int] = None,
+                         max_age_days: Optional[float] = None,
+                         keep: Optional[str] = None) -> int:
+        """
+        删除隔离目录中过旧或超出数量的条目
+
+        Args:
+            max_entries: 最多保留的条目数，默认 QUARANTINE_MAX_ENTRIES
+            max_age_days: 最多保留的天数，默认 QUARANTINE_MAX_AGE_DAYS
+            keep: 不删除的条目路径（如刚隔离的条目）
+
+        Returns:
+            删除的条目数
+        """
+        if max_entries is None:
+            max_entries = self.QUARANTINE_MAX_ENTRIES
+        if max_age_days is None:
+            max_age_days = self.QUARANTINE_MAX_AGE_DAYS
+
+        entries = self._quarantined_dirs()
+        cutoff = time.time() - max_age_days * 86400
+        excess = len(entries) - max_entries
+        removed = 0
+        for quarantined_at, path in entries:
+            if path == keep:
+                continue
+            if removed < excess or quarantined_at < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        if removed:
+            self.logger.info(f"清理隔离的缓存条目: {removed} 个")
+        return removed
+
+    def quarantine_size(self) -> int:
+        """隔离目录占用的字节数"""
+        total = 0
+        for _, path in self._quarantined_dirs():
+            try:
+                total += self._dir_size(path)
+            except OSError:
+                continue
+        return total
+
+    def recover(self) -> int:
+        """
+        清理被中断的写入留下的目录
+
+        - 写入者仍持有写入锁的目录跳过（写入还在进行）；
+        - 写入锁可以获取（写入者已退出）时，临时目录（.tmp-）直接删除；
+          替换条目时在两次重命名之间中断，条目目录不存在而旧目录（.old-）还在时，
+          把旧目录恢复为条目；条目存在时删除旧目录；
+        - 没有写入锁文件的目录（旧版本写入的）超过 RECOVER_GRACE_SECONDS 未修改时才处理。
+
+        Returns:
+            处理的目录数
+        """
+        handled = 0
+        for name in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, name)
+            marker = '.tmp-' if '.tmp-' in name else '.old-' if '.old-' in name else None
+            if marker is None:
+                continue
+            entry_name, _, token = name.rpartition(marker)
+            lock_path = self._writer_lock_path(entry_name, token)
+
+            if os.path.exists(lock_path):
+                lock = FileLock(lock_path, timeout=0)
+                try:
+                    lock.acquire()
+                except TimeoutError:
+                    continue
+                try:
+                    handled += self._recover_dir(path, marker, entry_name)
+                    self._remove_file(lock_path)
+                finally:
+                    lock.release()
+            else:
+                try:
+                    age = time.time() - os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                if age >= self.RECOVER_GRACE_SECONDS:
+                    handled += self._recover_dir(path, marker, entry_name)
+
+        self._remove_stale_writer_locks()
+        return handled
+
+    def _recover_dir(self, path: str, marker: str, entry_name: str) -> int:
+        """删除被中断写入的临时目录，或恢复/删除旧目录；目录已不存在时返回0"""
+        if not os.path.exists(path):
+            return 0
+        if marker == '.tmp-':
+            shutil.rmtree(path, ignore_errors=True)
+            return 1
+        entry_dir = os.path.join(self.root_dir, entry_name)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(path, ignore_errors=True)
+            return 1
+        try:
+            os.rename(path, entry_dir)
+        except FileNotFoundError:
+            return 0
+        self.logger.warning(f"恢复被中断替换的缓存条目: {entry_name}")
+        return 1
+
+    def _remove_stale_writer_locks(self):
+        """删除写入者已退出的写入锁文件（写入者在删除锁文件前被杀死时留下）"""
+        writers_dir = os.path.join(self.root_dir, self.WRITERS_DIR)
+        try:
+            names = os.listdir(writers_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            lock_path = os.path.join(writers_dir, name)
+            lock = FileLock(lock_path, timeout=0)
+            try:
+                lock.acquire()
+            except (TimeoutError, OSError):
+                continue
+            try:
+                self._remove_file(lock_path)
+            finally:
+                lock.release()
+
+    def _writer_lock_path(self, entry_name: str, token: str) -> str:
+        """写入锁文件路径（每次写入一个，与临时目录使用同一个标识）"""
+        return os.path.join(self.root_dir, self.WRITERS_DIR, f"{entry_name}.{token}.lock")
+
+    @contextmanager
+    def _writer_lock(self, key: str, token: str):
+        """
+        写入期间持有的写入锁
+
+        锁文件在临时目录和旧目录都清理完之后、释放锁之前删除，
+        recover() 获取到已删除的锁文件时对应的目录也已不存在。
+        """
+        lock_path = self._writer_lock_path(os.path.basename(self.entry_path(key)), token)
+        lock = FileLock(lock_path)
+        lock.acquire()
+        try:
+            yield
+        finally:
+            self._remove_file(lock_path)
+            lock.release()
+
+    @staticmethod
+    def _remove_file(path: str):
+        """删除文件，不存在或无法删除（Windows上仍被打开）时忽略"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def list_keys(self) -> List[str]:
+        """列出所有缓存条目的键（扫描缓存目录，日常统计应使用缓存清单）"""
+        return sorted(
+            name for name in os.listdir(self.root_dir)
+            if '.tmp-' not in name and '.old-' not in name
+            and os.path.exists(os.path.join(self.root_dir, name, self.META_FILE))
+        )
+
+    def entry_size(self, key: str) -> int:
+        """获取缓存条目占用的字节数"""
+        entry_dir = self.entry_path(key)
+        if not os.path.isdir(entry_dir):
+            return 0
+        return self._dir_size(entry_dir)
+
+    def _write_array(self, entry_dir: str, name: str, values: np.ndarray) -> Dict[str, Any]:
+        """
+        按压缩配置写入一列（或索引）
+
+        Returns:
+            写入meta.json的文件信息：长度 size、校验和 crc32，压缩时另有 dtype、codec、filters
+        """
+        spec = column_spec(name, values, self.compression, self.DELTA_COLUMNS)
+        if spec is None:
+            buffer = io.BytesIO()
+            np.save(buffer, values, allow_pickle=False)
+            payload = buffer.getbuffer()
+            path = os.path.join(entry_dir, f"{name}.npy")
+            raw = np.ascontiguousarray(values).view(np.uint8)
+            block_bytes = self.CHECKSUM_BLOCK_ROWS * values.dtype.itemsize
+            spec = {'block_rows': self.CHECKSUM_BLOCK_ROWS,
+                    'block_crc32': [zlib.crc32(raw[i:i + block_bytes])
+                                    for i in range(0, len(raw), block_bytes)]}
+        else:
+            payload = encode_column(values, spec['codec'], spec['filters'])
+            path = os.path.join(entry_dir, f"{name}{self.COMPRESSED_SUFFIX}")
+            spec = {'dtype': values.dtype.str, **spec}
+
+        with open(path, 'wb') as f:
+            f.write(payload)
+            self._sync(f)
+        return {'size': len(payload), 'crc32': zlib.crc32(payload), **spec}
+
+    def _read_array(self,
+                    key: str,
+                    name: str,
+                    spec: Optional[Dict[str, Any]],
+                    rows: int,
+                    mmap_mode: Optional[str] = None,
+                    window: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        读取并校验一列（或索引），压缩的列整列解压（忽略mmap_mode）
+
+        整列读入时校验长度和CRC32；内存映射时校验文件长度，指定窗口时另外校验
+        窗口所在数据块的CRC32（不读入整列）。旧版条目的meta.json中没有校验信息，不做校验。
+
+        Args:
+            key: 缓存键
+            name: 列名，索引为 INDEX_NAME
+            spec: meta.json中该文件的信息
+            rows: 行数
+            mmap_mode: 未压缩列的内存映射模式
+            window: 将要读取的行号范围 [first, last)
+
+        Returns:
+            一维数组
+
+        Raises:
+            CacheCorruptionError: 文件长度或校验和不一致时
+        """
+        spec = spec or {}
+        compressed = bool(spec.get('codec'))
+        path = os.path.join(self.entry_path(key),
+                            f"{name}{self.COMPRESSED_SUFFIX if compressed else '.npy'}")
+
+        if mmap_mode and not compressed:
+            if 'size' in spec and os.path.getsize(path) != spec['size']:
+                raise CacheCorruptionError(key, f"{name} 文件长度不一致")
+            values = np.load(path, mmap_mode=mmap_mode)
+            if window is not None and 'block_crc32' in spec:
+                self._verify_blocks(key, name, values, spec, *window)
+            return values
+
+        with open(path, 'rb') as f:
+            payload = bytearray(f.read())
+        if 'size' in spec and (len(payload) != spec['size'] or zlib.crc32(payload) != spec['crc32']):
+            raise CacheCorruptionError(key, f"{name} 校验和不一致")
+
+        if compressed:
+            return decode_column(bytes(payload), spec['dtype'], rows, spec['codec'], spec['filters'])
+        return self._array_from_npy(payload)
+
+    @staticmethod
+    def _verify_blocks(key: str,
+                       name: str,
+                       values: np.ndarray,
+                       spec: Dict[str, Any],
+                       first: int,
+                       last: int):
+        """校验行号范围 [first, last) 所在数据块的CRC32"""
+        if last <= first:
+            return
+        block_rows = spec['block_rows']
+        raw = values.view(np.uint8)
+        block_bytes = block_rows * values.dtype.itemsize
+        for block in range(first // block_rows, (last - 1) // block_rows + 1):
+            chunk = raw[block * block_bytes:(block + 1) * block_bytes]
+            if zlib.crc32(chunk) != spec['block_crc32'][block]:
+                raise CacheCorruptionError(key, f"{name} 第{block}个数据块校验和不一致")
+
+    @staticmethod
+    def _array_from_npy(payload: bytearray) -> np.ndarray:
+        """从已读入内存的.npy文件内容构造数组（不再复制数据）"""
+        buffer = io.BytesIO(payload)
+        version = np.lib.format.read_magic(buffer)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(buffer)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(buffer)
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(payload, dtype=dtype, count=count, offset=buffer.tell()).reshape(shape)
+
+    def _sync(self, f):
+        """开启fsync时把文件内容刷到磁盘"""
+        if self.fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _sync_dir(path: str):
+        """把目录项（重命名）刷到磁盘（Windows不支持，忽略）"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        """计算目录下文件的总字节数"""
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+    @classmethod
+    def _content_hash(cls, index_values: np.ndarray, arrays: Dict[str, np.ndarray]) -> str:
+        """计算条目内容哈希（覆盖索引、列名、数据类型和数据）"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name, values in [(cls.INDEX_FILE, index_values)] + list(arrays.items()):
+            digest.update(name.encode('utf-8'))
+            digest.update(values.dtype.str.encode('ascii'))
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _to_storable(series: pd.Series) -> np.ndarray:
+        """将列转换为可直接mmap的numpy数组（字符串列转换为定长unicode）"""
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return np.ascontiguousarray(series.to_numpy())
+        if pd.api.types.is_datetime64_dtype(series):
+            return np.ascontiguousarray(series.to_numpy())
+        return series.astype(str).to_numpy(dtype=str)
+
+    @staticmethod
+    def _replace_dir(src_dir: str, dst_dir: str, token: str):
+        """用新目录替换旧目录（旧目录与临时目录使用同一个写入标识）"""
+        if os.path.exists(dst_dir):
+            old_dir = f"{dst_dir}.old-{token}"
+            os.rename(dst_dir, old_dir)
+            os.rename(src_dir, dst_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.rename(src_dir, dst_dir)
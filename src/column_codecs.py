@@ -0,0 +1,178 @@
+"""
+列压缩编解码模块
+为列式缓存的每一列提供可选的压缩算法（zlib/lzma，安装了zstandard、lz4时还有zstd、lz4），
+以及压缩前的差分编码（日期索引、成交量）和字节重排
+"""
+
+import lzma
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# 压缩算法：名称 -> 返回 (压缩函数, 解压函数) 的工厂；可选依赖在首次使用时导入
+def _zlib_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    return (lambda raw: zlib.compress(raw, 6)), zlib.decompress
+
+
+def _lzma_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    return (lambda raw: lzma.compress(raw, preset=6)), lzma.decompress
+
+
+def _zstd_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import zstandard
+    compressor = zstandard.ZstdCompressor(level=3)
+    decompressor = zstandard.ZstdDecompressor()
+    return compressor.compress, decompressor.decompress
+
+
+def _lz4_codec() -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    import lz4.frame
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+CODEC_FACTORIES: Dict[str, Callable[[], Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]] = {
+    'zlib': _zlib_codec,
+    'lzma': _lzma_codec,
+    'zstd': _zstd_codec,
+    'lz4': _lz4_codec,
+}
+
+_codecs: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+
+
+def get_codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """
+    获取压缩算法
+
+    Args:
+        name: 算法名称（'zlib'、'lzma'、'zstd'、'lz4'）
+
+    Returns:
+        (压缩函数, 解压函数)
+
+    Raises:
+        ValueError: 算法不存在或所需的包未安装时
+    """
+    if name not in _codecs:
+        if name not in CODEC_FACTORIES:
+            raise ValueError(f"不支持的压缩算法: {name}")
+        try:
+            _codecs[name] = CODEC_FACTORIES[name]()
+        except ImportError as e:
+            raise ValueError(f"压缩算法 {name} 需要安装额外的包: {e}")
+    return _codecs[name]
+
+
+def available_codecs() -> List[str]:
+    """当前环境可用的压缩算法"""
+    names = []
+    for name in CODEC_FACTORIES:
+        try:
+            get_codec(name)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
+
+
+def default_filters(values: np.ndarray, delta: bool = False) -> List[str]:
+    """
+    列的默认预处理
+
+    差分编码只用于整数和日期列（按原数据类型回绕运算，无损）；
+    多字节的定长类型再做字节重排，把各元素的同一字节排在一起，利于压缩。
+
+    Args:
+        values: 列数据
+        delta: 是否差分编码（日期索引、成交量等单调或平滑的整数列）
+
+    Returns:
+        预处理名称列表，按编码顺序排列
+    """
+    filters = []
+    if delta and (np.issubdtype(values.dtype, np.integer) or np.issubdtype(values.dtype, np.datetime64)):
+        filters.append('delta')
+    if values.dtype.itemsize > 1:
+        filters.append('shuffle')
+    return filters
+
+
+def encode_column(values: np.ndarray, codec: str, filters: List[str]) -> bytes:
+    """
+    编码并压缩一列
+
+    Args:
+        values: 一维定长类型数组
+        codec: 压缩算法名称
+        filters: 预处理名称列表（见 default_filters）
+
+    Returns:
+        压缩后的字节串
+    """
+    values = np.ascontiguousarray(values)
+    if 'delta' in filters and len(values):
+        integers = values.view(np.int64) if values.dtype.kind == 'M' else values
+        encoded = np.empty_like(integers)
+        encoded[0] = integers[0]
+        np.subtract(integers[1:], integers[:-1], out=encoded[1:])
+        values = encoded
+    raw = values.view(np.uint8)
+    if 'shuffle' in filters:
+        raw = raw.reshape(-1, values.dtype.itemsize).T
+    compress, _ = get_codec(codec)
+    return compress(np.ascontiguousarray(raw).tobytes())
+
+
+def decode_column(blob: bytes, dtype: str, rows: int, codec: str, filters: List[str]) -> np.ndarray:
+    """
+    解压并解码 encode_column 生成的一列
+
+    Args:
+        blob: 压缩后的字节串
+        dtype: 列的numpy数据类型字符串
+        rows: 行数
+        codec: 压缩算法名称
+        filters: 编码时使用的预处理名称列表
+
+    Returns:
+        一维数组
+    """
+    dtype = np.dtype(dtype)
+    _, decompress = get_codec(codec)
+    raw = np.frombuffer(decompress(blob), dtype=np.uint8)
+    if 'shuffle' in filters:
+        raw = raw.reshape(dtype.itemsize, rows).T
+    values = np.ascontiguousarray(raw).view(dtype).reshape(rows)
+    if 'delta' in filters and rows:
+        integers = values.view(np.int64) if dtype.kind == 'M' else values
+        values = np.cumsum(integers, dtype=integers.dtype).view(dtype)
+    elif not values.flags.writeable:
+        values = values.copy()
+    return values
+
+
+def column_spec(name: str,
+                values: np.ndarray,
+                compression: Optional[Dict[str, Any]],
+                delta_columns: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """
+    按压缩配置确定一列的编码方式
+
+    Args:
+        name: 列名
+        values: 列数据
+        compression: 压缩配置，{列名: 算法名称, '*': 其他列的算法名称}；
+            算法为 'none' 或配置为None时不压缩
+        delta_columns: 需要差分编码的列名
+
+    Returns:
+        包含 codec 和 filters 的字典，不压缩时返回None
+    """
+    if not compression:
+        return None
+    codec = compression.get(name, compression.get('*', 'none'))
+    if codec == 'none':
+        return None
+    return {'codec': codec, 'filters': default_filters(values, delta=name in delta_columns)}
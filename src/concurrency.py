@@ -0,0 +1,501 @@
+"""
+并发控制模块
+提供数据下载所需的限流、重试、超时与对冲请求、熔断、延迟统计、并发调用合并和跨进程文件锁等并发控制工具
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Type
+import logging
+
+
+class TokenBucket:
+    """
+    令牌桶限流器（线程安全）
+
+    以固定速率补充令牌，每次请求消耗一个令牌；令牌不足时阻塞等待。
+    桶容量决定允许的瞬时突发请求数。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（即平均每秒允许的请求数）
+            capacity: 桶容量，默认等于rate（至少为1）
+        """
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于0: {rate}")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按经过的时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        尝试获取令牌，不阻塞
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            是否获取成功
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_call(func: Callable,
+               *args,
+               max_retries: int = 2,
+               backoff: float = 0.5,
+               max_backoff: float = 10.0,
+               retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+               before_attempt: Optional[Callable[[], Any]] = None,
+               logger: Optional[logging.Logger] = None,
+               **kwargs) -> Any:
+    """
+    带指数退避的重试调用
+
+    第n次重试前等待 backoff * 2**(n-1) 秒（不超过max_backoff），并加入随机抖动，
+    避免大量并发请求在同一时刻集中重试。
+
+    Args:
+        func: 要调用的函数
+        *args: 函数位置参数
+        max_retries: 最大重试次数（不含第一次调用）
+        backoff: 初始退避时间（秒）
+        max_backoff: 最大退避时间（秒）
+        retry_on: 需要重试的异常类型
+        before_attempt: 每次调用前执行的回调（如限流器的acquire）
+        logger: 日志记录器
+        **kwargs: 函数关键字参数
+
+    Returns:
+        函数返回值
+
+    Raises:
+        最后一次调用抛出的异常
+    """
+    logger = logger or logging.getLogger(__name__)
+    attempt = 0
+    while True:
+        if before_attempt is not None:
+            before_attempt()
+        try:
+            return func(*args, **kwargs)
+        except retry_on as e:
+            if attempt >= max_retries:
+                raise
+            attempt += 1
+            delay = min(max_backoff, backoff * (2 ** (attempt - 1)))
+            delay *= random.uniform(0.5, 1.5)
+            logger.warning(f"调用 {getattr(func, '__name__', func)} 失败: {e}，"
+                           f"{delay:.2f}秒后第{attempt}次重试")
+            time.sleep(delay)
+
+
+class UpstreamTimeoutError(TimeoutError):
+    """上游数据请求超过了单次请求的超时时间"""
+
+
+class CircuitOpenError(ConnectionError):
+    """熔断器处于打开状态，请求未发出"""
+
+
+def hedged_call(executor: Executor,
+                func: Callable,
+                *args,
+                timeout: Optional[float] = None,
+                hedge_delay: Optional[float] = None,
+                allow_hedge: Optional[Callable[[], bool]] = None,
+                on_event: Optional[Callable[[str], Any]] = None,
+                **kwargs) -> Any:
+    """
+    带超时和对冲请求的调用
+
+    在线程池中执行函数，调用方最多等待timeout秒；超过hedge_delay秒仍未返回时
+    再发出一个相同的请求，取先成功返回的结果。超时后调用方不再等待，
+    仍在执行的请求由其自身的网络超时结束。
+
+    Args:
+        executor: 执行请求的线程池
+        func: 要调用的函数
+        *args: 函数位置参数
+        timeout: 最长等待时间（秒），None表示一直等待
+        hedge_delay: 发出对冲请求前的等待时间（秒），None表示不对冲
+        allow_hedge: 发出对冲请求前的检查（如限流器的try_acquire），返回False时不对冲
+        on_event: 事件回调，参数为 'hedged'（发出了对冲请求）、'hedge_won'（对冲请求先返回）
+            或 'timeout'（超时）
+        **kwargs: 函数关键字参数
+
+    Returns:
+        函数返回值
+
+    Raises:
+        UpstreamTimeoutError: 超时时
+        所有请求都失败时，最后一个请求抛出的异常
+    """
+    notify = on_event or (lambda event: None)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    primary = executor.submit(func, *args, **kwargs)
+    pending = {primary}
+
+    if hedge_delay is not None and (timeout is None or hedge_delay < timeout):
+        done, _ = wait(pending, timeout=hedge_delay)
+        if not done and (allow_hedge is None or allow_hedge()):
+            pending.add(executor.submit(func, *args, **kwargs))
+            notify('hedged')
+
+    error: Optional[BaseException] = None
+    while pending:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is not primary:
+                    notify('hedge_won')
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+
+    if not pending and error is not None:
+        raise error
+    for future in pending:
+        future.cancel()
+    notify('timeout')
+    raise UpstreamTimeoutError(f"调用 {getattr(func, '__name__', func)} 超时（{timeout}秒）")
+
+
+class LatencyTracker:
+    """
+    延迟统计（线程安全）
+
+    保留最近window次调用的耗时，按最近邻秩法计算分位数。
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        初始化延迟统计
+
+        Args:
+            window: 参与统计的最近调用次数
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        """记录一次调用的耗时（秒）"""
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        最近调用耗时的分位数
+
+        Args:
+            q: 百分位（0-100）
+            min_samples: 样本数少于该值时返回None
+
+        Returns:
+            分位数（秒），样本不足时返回None
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(1, min_samples):
+            return None
+        return self._nearest_rank(samples, q)
+
+    @staticmethod
+    def _nearest_rank(samples: List[float], q: float) -> Optional[float]:
+        """已排序样本的最近邻秩分位数，没有样本时返回None"""
+        if not samples:
+            return None
+        rank = int(-(-q * len(samples) // 100))
+        return samples[min(len(samples), max(1, rank)) - 1]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """
+        获取 p50/p95/p99 延迟
+
+        Returns:
+            包含总调用次数、窗口样本数和各分位数（秒）的字典
+        """
+        with self._lock:
+            samples: List[float] = sorted(self._samples)
+            count = self.count
+        info: Dict[str, Optional[float]] = {'count': count, 'window': len(samples)}
+        for q in (50, 95, 99):
+            info[f'p{q}'] = self._nearest_rank(samples, q)
+        return info
+
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）
+
+    连续失败达到阈值后打开，打开期间的请求直接拒绝；经过冷却时间后进入半开状态，
+    只放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 打开熔断器的连续失败次数
+            reset_timeout: 打开后进入半开状态前的冷却时间（秒）
+        """
+        if failure_threshold < 1:
+            raise ValueError(f"熔断阈值必须大于0: {failure_threshold}")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        """当前状态（冷却时间已过的打开状态视为半开）"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        是否放行一次请求
+
+        Returns:
+            关闭状态时为True；半开状态时只有第一个探测请求为True
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        """记录一次成功的请求"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                self.logger.info("上游恢复，熔断器关闭")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """记录一次失败的请求"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or \
+                    (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                if self._state == self.CLOSED:
+                    self.logger.warning(f"上游连续失败 {self._failures} 次，熔断器打开"
+                                        f"（{self.reset_timeout:.0f}秒后重试）")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self.opened_count += 1
+
+
+class _FlightCall:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    相同键的并发调用合并（线程安全）
+
+    同一时刻对同一个键只执行一次函数，其他并发调用者等待这次调用结束并共享
+    其返回值（或异常）。调用结束后再来的调用会重新执行。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _FlightCall] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行或加入对key的调用
+
+        Args:
+            key: 合并调用的键
+            func: 要调用的函数
+            *args: 函数位置参数
+            **kwargs: 函数关键字参数
+
+        Returns:
+            函数返回值（等待者与执行者得到同一个对象）
+
+        Raises:
+            函数抛出的异常
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _FlightCall()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """是否有对key的调用正在进行"""
+        with self._lock:
+            return key in self._calls
+
+
+class FileLock:
+    """
+    跨进程的文件锁（排他锁）
+
+    POSIX系统使用 fcntl.flock，Windows使用 msvcrt.locking。持有锁的进程退出时
+    操作系统会自动释放锁，不会留下死锁。同一进程内的不同线程也会互斥。
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        """
+        初始化文件锁
+
+        Args:
+            path: 锁文件路径（不存在时自动创建）
+            timeout: 获取锁的最长等待时间（秒），None表示一直等待
+            poll_interval: 轮询间隔（秒）
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self):
+        """
+        获取锁
+
+        Raises:
+            TimeoutError: 超过timeout仍未获取到锁时
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(self.path, 'a+b')
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                _lock_file(lock_file)
+                self._file = lock_file
+                return
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    lock_file.close()
+                    raise TimeoutError(f"获取文件锁超时: {self.path}")
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+try:
+    import fcntl
+
+    def _lock_file(lock_file):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(lock_file):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+except ImportError:
+    import msvcrt
+
+    def _lock_file(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
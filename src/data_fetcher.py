@@ -1,120 +1,655 @@
 """
 数据获取模块
-使用akshare库获取股票历史行情数据，支持缓存机制
+从数据源（默认akshare）获取股票历史行情数据，支持缓存机制
 """
 
-import akshare as ak
 import pandas as pd
+import numpy as np
 import os
 import pickle
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import shutil
+import time
+import asyncio
+import functools
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
+from src.cache_manifest import CacheManifest
+from src.cache_store import CacheCorruptionError, ColumnarCacheStore
+from src.concurrency import (CircuitBreaker, CircuitOpenError, FileLock, LatencyTracker, SingleFlight,
+                             TokenBucket, hedged_call, retry_call)
+from src.data_sources import AkshareDataSource, DataSource, compact_frame, to_exchange_symbol
+from src.http_session import HttpResponseCache, PooledHttpClient
+from src.intraday import resample_minute_bars
+from src.memory_cache import MemoryLRUCache, frame_nbytes, get_shared_memory_cache
+from src.shared_cache import SharedCache
+from src.trading_calendar import TradingCalendar
+
 
 class DataFetcher:
-    """数据获取器类，负责从akshare获取股票数据并实现缓存机制"""
+    """数据获取器类，负责从数据源获取股票数据并实现缓存机制"""
+
+    # 未指定开始日期时的默认开始日期
+    DEFAULT_START_DATE = "20200101"
+    # A股收盘时间（15:00），之前获取的当天K线视为未走完
+    MARKET_CLOSE_MINUTES = 15 * 60
+    # A股开盘集合竞价开始时间（9:15），之后行情快照不再是上一交易日的收盘行情
+    MARKET_OPEN_MINUTES = 9 * 60 + 15
+    # 由日线聚合得到的周期及其对应的pandas周期频率（周线按自然周，即周一至周日）
+    PERIOD_FREQS = {'weekly': 'W', 'monthly': 'M'}
+    # 数据源提供的分钟线周期及其分钟数；分钟线按 股票+周期+月份 分区缓存，
+    # 其他N分钟周期（如 '10min'）由1分钟线按交易时段聚合得到
+    MINUTE_PERIODS = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '60min': 60}
+    # 需要按复权因子调整的价格列
+    PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'change_amount']
+    # 同一缓存条目两次记录访问统计的最小间隔（秒），避免每次命中都写清单
+    ACCESS_TOUCH_INTERVAL = 60
+    # 超出磁盘配额时淘汰到配额的该比例以下，避免每次写入都触发淘汰
+    EVICTION_LOW_WATERMARK = 0.9
+    # 等待其他进程完成同一缓存条目补齐的最长时间（秒）
+    FILL_LOCK_TIMEOUT = 300
+    # 交易日历缓存的有效天数（交易所每年底公布下一年的休市安排）
+    CALENDAR_REFRESH_DAYS = 30
+    # akshare HTTP响应缓存的默认有效期（秒）：同一轮股票池扫描中的重复请求直接复用响应，
+    # 盘中的新数据最多延迟这么久
+    HTTP_CACHE_TTL = 300
+    HTTP_CACHE_FILE = "http_cache.sqlite3"
+    # 单次上游数据请求的默认超时时间（秒）
+    REQUEST_TIMEOUT = 30
+    # 计算对冲请求的延迟阈值至少需要的请求数
+    HEDGE_MIN_SAMPLES = 20
+    # 执行带超时/对冲的上游请求的线程数（超时的请求在其网络超时之前仍占用线程）
+    UPSTREAM_WORKERS = 32
 
-    def __init__(self, cache_dir: str = "cache"):
+    def __init__(self,
+                 cache_dir: str = "cache",
+                 rate_limit: Optional[float] = None,
+                 max_retries: int = 2,
+                 retry_backoff: float = 0.5,
+                 async_concurrency: int = 8,
+                 use_memory_cache: bool = True,
+                 memory_cache: Optional[MemoryLRUCache] = None,
+                 cache_max_mb: Optional[float] = None,
+                 eviction_policy: Optional[str] = None,
+                 source: Optional[DataSource] = None,
+                 shared_cache: Optional[SharedCache] = None,
+                 compact: bool = False,
+                 cache_compression: Optional[str] = None,
+                 http_cache_ttl: Optional[float] = None,
+                 request_timeout: Optional[float] = None,
+                 hedge_percentile: Optional[float] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         """
         初始化数据获取器
 
         Args:
             cache_dir: 缓存目录路径
+            rate_limit: 每秒最多发起的数据请求数，None表示不限流；
+                同一个DataFetcher的所有线程共享这一限额
+            max_retries: 单次数据请求失败后的最大重试次数
+            retry_backoff: 重试的初始退避时间（秒），之后每次翻倍
+            async_concurrency: 异步接口同时进行的下载数上限
+            use_memory_cache: 是否在磁盘缓存之前使用进程内LRU内存缓存
+            memory_cache: 使用的内存缓存实例，默认使用进程内共享的实例
+            cache_max_mb: 磁盘缓存配额（MB），默认读取环境变量 STOCK_CACHE_MAX_MB，
+                未设置时不限制
+            eviction_policy: 超出配额时的淘汰策略，'lru' 或 'lfu'，默认读取环境变量
+                STOCK_CACHE_EVICTION，未设置时为 'lru'
+            source: 行情数据源，默认为akshare；不同数据源的缓存互不覆盖
+            shared_cache: 多个应用副本共享的缓存层（Redis协议服务器），本地缓存未命中时
+                先查询共享缓存再访问数据源；默认在设置了环境变量 STOCK_REDIS_URL 时启用
+            compact: 是否返回紧凑数据类型的数据（价格float32、成交量int32，不含派生列和
+                文本列，见 data_sources.compact_frame），内存缓存同样保存紧凑数据
+            cache_compression: 磁盘缓存的压缩算法（'zlib'、'lzma'、'zstd'、'lz4'，见
+                ColumnarCacheStore），默认读取环境变量 STOCK_CACHE_COMPRESSION，未设置时不压缩；
+                缓存目录位于网络文件系统时可减少读取的数据量
+            http_cache_ttl: 默认akshare数据源的HTTP响应缓存有效期（秒），缓存文件位于缓存目录下；
+                默认读取环境变量 STOCK_HTTP_CACHE_TTL，未设置时为 HTTP_CACHE_TTL，0表示不缓存响应
+                （仍使用连接池）；传入 source 时不生效
+            request_timeout: 单次上游数据请求的超时时间（秒），超时后按max_retries重试；
+                默认读取环境变量 STOCK_REQUEST_TIMEOUT，未设置时为 REQUEST_TIMEOUT，0表示不限制
+            hedge_percentile: 对冲请求的延迟分位数（如95），请求耗时超过最近请求延迟的该分位数
+                仍未返回时再发出一个相同的请求，取先返回的结果；默认读取环境变量
+                STOCK_HEDGE_PERCENTILE，未设置时不对冲
+            circuit_breaker: 上游熔断器，默认连续5次网络错误或超时后打开60秒；
+                打开期间不再请求上游，已有缓存的股票返回缓存中的（可能过期的）数据
         """
+        if request_timeout is None:
+            request_timeout = float(os.environ.get('STOCK_REQUEST_TIMEOUT', self.REQUEST_TIMEOUT))
+        self.request_timeout = request_timeout or None
+        if hedge_percentile is None and os.environ.get('STOCK_HEDGE_PERCENTILE'):
+            hedge_percentile = float(os.environ['STOCK_HEDGE_PERCENTILE'])
+        if hedge_percentile is not None and not 0 < hedge_percentile < 100:
+            raise ValueError(f"对冲请求的延迟分位数必须在0到100之间: {hedge_percentile}")
+        self.hedge_percentile = hedge_percentile
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # 上游请求的延迟统计（每次成功请求的耗时）和超时、对冲、熔断等事件计数
+        self.fetch_latency = LatencyTracker()
+        self._upstream_events: Dict[str, int] = {}
+        self._upstream_lock = threading.Lock()
+        self._upstream_executor: Optional[ThreadPoolExecutor] = None
+
         self.cache_dir = cache_dir
         self._ensure_cache_dir()
+        self.source = source or AkshareDataSource(http_client=self._default_http_client(http_cache_ttl))
+        self.store = ColumnarCacheStore(self.cache_dir,
+                                        compression=cache_compression or
+                                        os.environ.get('STOCK_CACHE_COMPRESSION'))
+        self.manifest = CacheManifest(self.cache_dir)
+        # 技术指标结果缓存目录（见 IndicatorCalculator 的 cache_dir 参数）
+        self.indicator_cache_dir = os.path.join(self.cache_dir, "indicators")
+        if shared_cache is None and os.environ.get('STOCK_REDIS_URL'):
+            shared_cache = SharedCache()
+        self.shared_cache = shared_cache
+
+        if cache_max_mb is None and os.environ.get('STOCK_CACHE_MAX_MB'):
+            cache_max_mb = float(os.environ['STOCK_CACHE_MAX_MB'])
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024) if cache_max_mb else None
+        self.eviction_policy = (eviction_policy or os.environ.get('STOCK_CACHE_EVICTION', 'lru')).lower()
+        if self.eviction_policy not in CacheManifest.EVICTION_ORDER:
+            raise ValueError(f"不支持的淘汰策略: {self.eviction_policy}")
+        self._last_touch: Dict[str, float] = {}
+        self._touch_lock = threading.Lock()
+        # 同一缓存条目的并发补齐合并为一次下载
+        self._fill_flight = SingleFlight()
+        self._calendar: Optional[TradingCalendar] = None
+        self._calendar_loaded_on: Optional[pd.Timestamp] = None
+        self._calendar_lock = threading.Lock()
+        # 当前线程持有的条目文件锁（文件锁不可重入，持锁时读到损坏条目需要再次加锁）
+        self._held_locks = threading.local()
+        # 本进程隔离的损坏条目数
+        self.quarantined: Dict[str, int] = {}
+
+        if use_memory_cache:
+            self.memory_cache = memory_cache or get_shared_memory_cache()
+        else:
+            self.memory_cache = None
+        self.compact = compact
+        # 共享内存缓存时，用缓存目录和数据格式区分不同DataFetcher的条目
+        self._memory_namespace = os.path.abspath(self.cache_dir) + (":compact" if compact else "")
+
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.async_concurrency = async_concurrency
+        self._async_executor: Optional[ThreadPoolExecutor] = None
+        self._async_semaphores = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
 
         # 设置日志
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+        # 清理上次被中断的写入（进程在写缓存时被杀死）留下的临时目录
+        self.store.recover()
+        if self.manifest.created:
+            # 首次使用缓存清单时，为已有的缓存条目补建记录
+            self.rebuild_cache_manifest()
+        if self.source.name == AkshareDataSource.name and self._pickle_cache_files():
+            # 迁移需要联网获取复权因子，不在初始化时自动执行
+            self.logger.warning("缓存目录中有旧版pickle缓存，运行 python start.py --mode migrate "
+                                "（或 DataFetcher.migrate_pickle_cache）转换为列式缓存，否则这些数据会重新下载")
+
+    def _default_http_client(self, ttl: Optional[float]) -> PooledHttpClient:
+        """创建默认akshare数据源使用的HTTP客户端（共享连接池 + 缓存目录下的响应缓存）"""
+        if ttl is None:
+            ttl = float(os.environ.get('STOCK_HTTP_CACHE_TTL', self.HTTP_CACHE_TTL))
+        cache = HttpResponseCache(os.path.join(self.cache_dir, self.HTTP_CACHE_FILE), ttl) if ttl > 0 else None
+        return PooledHttpClient(cache=cache, timeout=self.request_timeout)
+
+    def _http_cache_size(self) -> int:
+        """数据源的HTTP响应缓存文件占用的字节数（没有HTTP缓存时为0）"""
+        http_client = getattr(self.source, 'http_client', None)
+        if http_client is None or http_client.cache is None:
+            return 0
+        return http_client.cache.file_size()
+
     def _ensure_cache_dir(self):
         """确保缓存目录存在"""
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
 
-    def _get_cache_file_path(self, symbol: str, period: str = "daily") -> str:
+    def _get_cache_key(self, symbol: str, period: str = "daily", adjust: str = "") -> str:
         """
-        获取缓存文件路径
+        获取缓存键
+
+        行情数据统一以不复权形式缓存，复权价格在读取时由复权因子计算得到。
 
         Args:
             symbol: 股票代码
-            period: 数据周期 (daily, weekly, monthly)
+            period: 数据周期
+            adjust: 复权方式（目前缓存只保存不复权数据）
 
         Returns:
-            缓存文件的完整路径
+            缓存键，以数据源名称开头，对应缓存目录下的一个列式缓存条目
         """
-        return os.path.join(self.cache_dir, f"{symbol}_{period}.pkl")
+        return f"{self.source.name}_{symbol}_{period}_{adjust or 'none'}"
 
-    def _is_cache_valid(self, cache_file_path: str, max_age_days: int = 1) -> bool:
+    def _get_minute_cache_key(self, symbol: str, period: str, month: pd.Period) -> str:
+        """获取分钟线月分区的缓存键（如 akshare_000001_5min_202401）"""
+        return f"{self.source.name}_{symbol}_{period}_{month.strftime('%Y%m')}"
+
+    def _get_factor_cache_key(self, symbol: str) -> str:
+        """获取复权因子表的缓存键"""
+        return f"{self.source.name}_{symbol}_hfq_factor"
+
+    def _get_calendar_cache_key(self) -> str:
+        """获取交易日历的缓存键"""
+        return f"{self.source.name}_trade_calendar"
+
+    @staticmethod
+    def _parse_cache_key(cache_key: str) -> Dict[str, str]:
         """
-        检查缓存是否有效
+        从缓存键解析数据源、股票代码、周期、复权方式和条目类型
 
         Args:
-            cache_file_path: 缓存文件路径
-            max_age_days: 缓存最大有效天数
+            cache_key: 缓存键
 
         Returns:
-            缓存是否有效
+            包含 source、symbol、period、adjust、kind 的字典
         """
-        if not os.path.exists(cache_file_path):
-            return False
+        source, _, rest = cache_key.partition('_')
+        if rest == "trade_calendar":
+            return {'source': source, 'symbol': '', 'period': '', 'adjust': '', 'kind': 'calendar'}
+        if rest.endswith("_hfq_factor"):
+            return {'source': source, 'symbol': rest[:-len("_hfq_factor")], 'period': '',
+                    'adjust': 'hfq', 'kind': 'factor'}
+        rest, _, adjust = rest.rpartition('_')
+        symbol, _, period = rest.rpartition('_')
+        if period in DataFetcher.MINUTE_PERIODS:
+            # 分钟线分区键的最后一段是月份，分钟线只缓存不复权数据
+            return {'source': source, 'symbol': symbol, 'period': period,
+                    'adjust': '', 'kind': 'minute'}
+        return {'source': source, 'symbol': symbol, 'period': period,
+                'adjust': '' if adjust == 'none' else adjust, 'kind': 'bars'}
 
-        file_mtime = datetime.fromtimestamp(os.path.getmtime(cache_file_path))
-        if datetime.now() - file_mtime > timedelta(days=max_age_days):
-            return False
+    def _save_entry(self, cache_key: str, data: pd.DataFrame, share: bool = True, **fields):
+        """
+        保存缓存条目并更新缓存清单
 
-        return True
+        Args:
+            cache_key: 缓存键
+            data: 以日期为索引的DataFrame
+            share: 是否同时写入共享缓存
+            **fields: 写入缓存清单的附加字段（如 covered、checked）
+        """
+        info = self.store.save(cache_key, data, extra=fields)
+        self.manifest.upsert(
+            cache_key,
+            first_date=data.index[0].strftime("%Y%m%d") if len(data) else None,
+            last_date=data.index[-1].strftime("%Y%m%d") if len(data) else None,
+            last_access=time.time(),
+            **self._parse_cache_key(cache_key),
+            **info,
+            **fields
+        )
+        if share and self.shared_cache is not None:
+            self.shared_cache.put(cache_key, data, fields)
+        if self.cache_max_bytes is not None:
+            self.enforce_cache_quota(protect=[cache_key])
+
+    def _touch(self, *cache_keys: str):
+        """
+        记录缓存条目被访问，供LRU/LFU淘汰使用
+
+        同一条目在 ACCESS_TOUCH_INTERVAL 秒内只记录一次，因此访问次数统计的是
+        有访问发生的时间窗口数。
+        """
+        now = time.time()
+        with self._touch_lock:
+            keys = [key for key in cache_keys
+                    if now - self._last_touch.get(key, 0) >= self.ACCESS_TOUCH_INTERVAL]
+            for key in keys:
+                self._last_touch[key] = now
+        if keys:
+            try:
+                self.manifest.touch(keys, accessed_at=now)
+            except Exception as e:
+                self.logger.warning(f"记录缓存访问失败: {e}")
+
+    def enforce_cache_quota(self, protect: Optional[List[str]] = None) -> int:
+        """
+        缓存超出磁盘配额时按淘汰策略删除条目
+
+        固定的股票不会被淘汰。超出配额时淘汰到配额的 EVICTION_LOW_WATERMARK 以下。
+        隔离的损坏条目和HTTP响应缓存文件同样计入配额（各自按数量、有效期清理，不参与淘汰）。
+
+        Args:
+            protect: 本次不淘汰的缓存键（如刚写入的条目）
+
+        Returns:
+            淘汰的条目数
+        """
+        if self.cache_max_bytes is None:
+            return 0
+
+        total = (self.manifest.summary()['bytes'] + self.store.quarantine_size()
+                 + self._http_cache_size())
+        if total <= self.cache_max_bytes:
+            return 0
+
+        target = self.cache_max_bytes * self.EVICTION_LOW_WATERMARK
+        evicted = 0
+        for candidate in self.manifest.eviction_candidates(self.eviction_policy, exclude=protect):
+            if total <= target:
+                break
+            self._delete_entry(candidate['key'])
+            total -= candidate['bytes'] or 0
+            evicted += 1
+
+        if total > self.cache_max_bytes:
+            self.logger.warning(f"缓存仍超出配额（固定的股票不参与淘汰）: "
+                                f"{total / (1024 * 1024):.1f}MB / "
+                                f"{self.cache_max_bytes / (1024 * 1024):.1f}MB")
+        if evicted:
+            self.logger.info(f"按{self.eviction_policy.upper()}策略淘汰 {evicted} 个缓存条目")
+        return evicted
+
+    def pin_symbols(self, symbols: List[str]):
+        """
+        固定股票（如自选股），其缓存不会因超出磁盘配额而被淘汰
+
+        Args:
+            symbols: 股票代码列表
+        """
+        self.manifest.pin(symbols)
+
+    def unpin_symbols(self, symbols: List[str]):
+        """
+        取消固定股票
+
+        Args:
+            symbols: 股票代码列表
+        """
+        self.manifest.unpin(symbols)
+
+    def _delete_entry(self, cache_key: str) -> bool:
+        """删除缓存条目及其清单记录，返回是否删除了条目"""
+        removed = self.store.delete(cache_key)
+        return self.manifest.delete(cache_key) or removed
 
-    def _load_from_cache(self, cache_file_path: str) -> Optional[pd.DataFrame]:
+    def rebuild_cache_manifest(self) -> int:
+        """
+        扫描缓存目录，重新建立缓存清单
+
+        需要读取每个条目的全部数据以计算内容哈希，只在清单丢失或与缓存目录
+        不一致时使用。
+
+        Returns:
+            清单中的条目数
+        """
+        self.manifest.clear()
+        for cache_key in self.store.list_keys():
+            try:
+                info = self.store.describe(cache_key)
+                if info is None:
+                    continue
+                index = info['index']
+                extra = info['extra']
+                self.manifest.upsert(
+                    cache_key,
+                    first_date=index[0].strftime("%Y%m%d") if len(index) else None,
+                    last_date=index[-1].strftime("%Y%m%d") if len(index) else None,
+                    rows=info['rows'],
+                    bytes=info['bytes'],
+                    content_hash=info['content_hash'],
+                    covered=extra.get('covered', []),
+                    checked=extra.get('checked'),
+                    **self._parse_cache_key(cache_key)
+                )
+            except CacheCorruptionError as e:
+                path = self.store.quarantine(cache_key)
+                self.logger.error(f"缓存条目损坏，已隔离到 {path}: {e}")
+            except Exception as e:
+                self.logger.warning(f"重建缓存清单记录失败: {cache_key}, 错误: {e}")
+
+        count = self.manifest.summary()['count']
+        if count:
+            self.logger.info(f"已重建缓存清单: {count} 个条目")
+        return count
+
+    def _get_covered_intervals(self, cache_key: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        读取缓存条目已覆盖的日期区间
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            按时间排序的 (开始日期, 结束日期) 列表，条目不存在时为空列表
+        """
+        record = self.manifest.get(cache_key)
+        if record is None:
+            return []
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in record['covered']]
+
+    def _load_from_cache(self,
+                         cache_key: str,
+                         columns: Optional[List[str]] = None,
+                         start: Optional[pd.Timestamp] = None,
+                         end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
         """
         从缓存加载数据
 
         Args:
-            cache_file_path: 缓存文件路径
+            cache_key: 缓存键
+            columns: 需要读取的列，None表示全部列
+            start: 只读取该日期及之后的行
+            end: 只读取该日期及之前的行
 
         Returns:
-            缓存的DataFrame或None
+            缓存的DataFrame或None；条目损坏时隔离条目并删除其清单记录后返回None，
+            调用方因此把该条目视为未缓存，重新下载一次即可修复
         """
-        try:
-            with open(cache_file_path, 'rb') as f:
-                return pickle.load(f)
-        except Exception as e:
-            self.logger.warning(f"加载缓存失败: {e}")
-            return None
+        for _ in range(2):
+            try:
+                return self.store.load(cache_key, columns=columns, start=start, end=end)
+            except CacheCorruptionError as e:
+                if self._quarantine(cache_key, e):
+                    return None
+                # 条目完好：读取时正好遇到其他进程替换条目，重新读取一次
+            except Exception as e:
+                self.logger.warning(f"加载缓存失败: {e}")
+                return None
+        return None
 
-    def _save_to_cache(self, data: pd.DataFrame, cache_file_path: str):
+    def _quarantine(self, cache_key: str, error: Exception) -> bool:
         """
-        保存数据到缓存
+        隔离损坏的缓存条目
+
+        持有条目的文件锁并重新完整校验后才隔离，避免把其他进程刚修复（或正在替换）
+        的条目当作损坏；隔离后删除清单记录，条目的覆盖区间随之清空。
+
+        Args:
+            cache_key: 缓存键
+            error: 读取时的错误
+
+        Returns:
+            是否隔离了条目（重新校验时条目完好则返回False）
+        """
+        with self._entry_lock(cache_key):
+            reason = self.store.verify(cache_key)
+            if reason is None:
+                return False
+            path = self.store.quarantine(cache_key)
+            self.manifest.delete(cache_key)
+        self.quarantined[cache_key] = self.quarantined.get(cache_key, 0) + 1
+        self.logger.error(f"缓存条目损坏，已隔离到 {path}，下次请求时重新下载: {error}")
+        return True
+
+    def verify_cache(self) -> List[str]:
+        """
+        完整校验清单中的全部缓存条目，隔离损坏的条目
+
+        读取时只校验被读取的列，定期运行本方法可以提前发现未被读取的列的损坏。
+
+        Returns:
+            被隔离的缓存键
+        """
+        quarantined = []
+        for cache_key in self.manifest.keys():
+            reason = self.store.verify(cache_key)
+            if reason is not None and self._quarantine(cache_key, CacheCorruptionError(cache_key, reason)):
+                quarantined.append(cache_key)
+        return quarantined
+
+    def _save_to_cache(self,
+                       data: pd.DataFrame,
+                       cache_key: str,
+                       covered: List[Tuple[pd.Timestamp, pd.Timestamp]],
+                       share: bool = True):
+        """
+        保存不复权行情数据到缓存，同时记录已覆盖的日期区间
 
         Args:
             data: 要缓存的数据
-            cache_file_path: 缓存文件路径
+            cache_key: 缓存键
+            covered: 已覆盖的日期区间
+            share: 是否同时写入共享缓存
         """
+        covered = [[start.strftime("%Y%m%d"), end.strftime("%Y%m%d")] for start, end in covered]
         try:
-            with open(cache_file_path, 'wb') as f:
-                pickle.dump(data, f)
+            self._save_entry(cache_key, data, share=share, covered=covered)
         except Exception as e:
             self.logger.warning(f"保存缓存失败: {e}")
 
+    def _pull_shared_bars(self, cache_key: str) -> bool:
+        """
+        从共享缓存拉取行情条目，合并到本地缓存
+
+        只有共享条目覆盖了本地缺少的日期时才写入本地。
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            本地缓存是否因此扩大了覆盖范围
+        """
+        if self.shared_cache is None:
+            return False
+        entry = self.shared_cache.get(cache_key)
+        if entry is None:
+            return False
+
+        shared_data, fields = entry
+        shared_covered = [(pd.Timestamp(start), pd.Timestamp(end))
+                          for start, end in fields.get('covered', [])]
+        local_covered = self._get_covered_intervals(cache_key)
+        covered = self._merge_intervals(local_covered + shared_covered)
+        if covered == local_covered:
+            return False
+
+        local_data = self._load_from_cache(cache_key) if local_covered else None
+        if local_data is None:
+            data, covered = shared_data, shared_covered
+        else:
+            data = pd.concat([local_data, shared_data])
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+
+        self.logger.info(f"从共享缓存获取数据: {cache_key}")
+        # 合并后的数据若比共享条目更完整，写回共享缓存供其他副本使用
+        self._save_to_cache(data, cache_key, covered, share=covered != shared_covered)
+        return True
+
+    def migrate_pickle_cache(self, adjust: str = "qfq", remove: bool = True) -> int:
+        """
+        将缓存目录中的旧版pickle缓存文件批量转换为列式缓存
+
+        旧版缓存来自akshare，且没有记录复权方式，需要通过adjust参数指定。复权数据会借助复权因子
+        还原为不复权价格（前复权以数据最后一天的因子为基准），因此需要联网获取因子。
+        已覆盖区间按数据的首尾日期记录，缺失部分会在之后的请求中自动补齐。
+        只迁移日线缓存，已存在列式缓存的股票不会被覆盖。
+
+        Args:
+            adjust: 旧版缓存数据对应的复权方式
+            remove: 转换成功后是否删除原pickle文件
+
+        Returns:
+            成功转换的文件数
+
+        Raises:
+            ValueError: 当前数据源不是akshare时
+        """
+        if self.source.name != AkshareDataSource.name:
+            raise ValueError(f"旧版pickle缓存只能迁移到akshare数据源，当前数据源: {self.source.name}")
+
+        migrated = 0
+        for filename in self._pickle_cache_files():
+            symbol, _, period = filename[:-len('.pkl')].rpartition('_')
+            if period != "daily":
+                # 周线/月线现在由日线聚合得到，不再缓存
+                continue
+
+            pickle_path = os.path.join(self.cache_dir, filename)
+            cache_key = self._get_cache_key(symbol)
+            try:
+                if self.store.exists(cache_key):
+                    self.logger.info(f"已存在列式缓存，跳过迁移: {symbol}")
+                    continue
+
+                with open(pickle_path, 'rb') as f:
+                    data = pickle.load(f)
+                if not isinstance(data, pd.DataFrame) or data.empty:
+                    raise ValueError("不是有效的行情DataFrame")
+
+                if adjust:
+                    factors = self._get_adjust_factors(symbol)
+                    ratio = self._adjustment_ratio(data.index, factors, adjust,
+                                                   anchor_date=data.index[-1])
+                    data = self._scale_prices(data, 1 / ratio)
+
+                self._save_to_cache(data, cache_key, [(data.index[0], data.index[-1])])
+            except Exception as e:
+                self.logger.warning(f"迁移pickle缓存失败: {pickle_path}, 错误: {e}")
+                continue
+
+            if remove:
+                os.remove(pickle_path)
+            migrated += 1
+
+        self.logger.info(f"已迁移 {migrated} 个pickle缓存文件")
+        return migrated
+
+    def _pickle_cache_files(self) -> List[str]:
+        """缓存目录中的旧版pickle缓存文件名"""
+        return sorted(filename for filename in os.listdir(self.cache_dir) if filename.endswith('.pkl'))
+
     def get_stock_data(self,
                       symbol: str,
                       start_date: Optional[str] = None,
                       end_date: Optional[str] = None,
                       period: str = "daily",
                       adjust: str = "qfq",
-                      use_cache: bool = True) -> pd.DataFrame:
+                      use_cache: bool = True,
+                      columns: Optional[List[str]] = None,
+                      incremental: bool = True) -> pd.DataFrame:
         """
         获取股票历史行情数据
 
+        缓存只保存不复权日线数据和后复权因子表，并记录已覆盖的日期区间。
+        请求的区间若有未覆盖的部分，只下载这些缺口并合并进缓存；
+        上游熔断时（见 circuit_breaker 参数）直接返回缓存中的已有数据。
+        前复权/后复权价格在读取时由因子向量化计算得到；除权除息只会使因子表失效。
+        周线、月线由日线数据在本地聚合得到，不单独下载和缓存。
+        分钟线按月分区缓存，数据量大时请用 iter_minute_chunks 逐月读取。
+
         Args:
             symbol: 股票代码 (如: '000001', '600000')
             start_date: 开始日期 (格式: '20200101')
             end_date: 结束日期 (格式: '20231231')
-            period: 数据周期 ('daily', 'weekly', 'monthly')
+            period: 数据周期 ('daily', 'weekly', 'monthly', '1min', '5min', '15min', '30min', '60min'，
+                或由1分钟线聚合的任意 'Nmin')
             adjust: 复权方式 ('qfq': 前复权, 'hfq': 后复权, '': 不复权)
             use_cache: 是否使用缓存
+            columns: 只返回指定的列（如 ['close']），None表示全部列；
+                命中缓存时只读取这些列
+            incremental: 是否只下载缓存未覆盖的缺口；为False时有缺口即重新下载整个请求区间
 
         Returns:
             包含股票数据的DataFrame
@@ -122,104 +657,1363 @@ class DataFetcher:
         Raises:
             ValueError: 当股票代码无效或数据获取失败时
         """
-        cache_file_path = self._get_cache_file_path(symbol, period)
+        if period in self.PERIOD_FREQS:
+            daily = self.get_stock_data(symbol, self._period_lookback_start(start_date, period),
+                                        end_date, "daily", adjust, use_cache,
+                                        incremental=incremental)
+            bars = self._compact(self._resample_bars(daily, period, start_date))
+            return self._select_columns(bars, columns)
+        if self._minute_count(period) is not None:
+            chunks = list(self.iter_minute_chunks(symbol, start_date, end_date, period, adjust,
+                                                  columns, use_cache))
+            if not chunks:
+                raise ValueError(f"获取股票数据失败: 未获取到股票 {symbol} 的{period}数据")
+            return pd.concat(chunks)
+        if period != "daily":
+            raise ValueError(f"获取股票数据失败: 不支持的数据周期: {period}")
+
+        start, end = self._normalize_date_range(start_date, end_date)
+
+        if not use_cache:
+            try:
+                data = self._fetch_remote(symbol, start_date, end_date, period, "")
+                factors = self._fetch_adjust_factors(symbol) if adjust else None
+            except Exception as e:
+                self.logger.error(f"获取股票数据失败: {symbol}, 错误: {e}")
+                raise ValueError(f"获取股票数据失败: {e}")
+            return self._compact(self._apply_adjustment(self._select_columns(data, columns),
+                                                        factors, adjust))
 
         # 检查缓存
-        if use_cache and self._is_cache_valid(cache_file_path):
-            cached_data = self._load_from_cache(cache_file_path)
-            if cached_data is not None:
-                self.logger.info(f"从缓存加载数据: {symbol}")
-                return self._filter_data_by_date(cached_data, start_date, end_date)
+        cached_data = self._get_cached_data(symbol, start, end, period, adjust, columns)
+        if cached_data is not None:
+            return cached_data
+
+        cache_key = self._get_cache_key(symbol, period)
+        covered = self._get_covered_intervals(cache_key)
 
         try:
-            # 格式化股票代码
-            if len(symbol) == 6:
-                if symbol.startswith('6') or symbol.startswith('9'):
-                    full_symbol = f"sh{symbol}"
+            data = None
+            if not self._find_gaps(covered, start, end) and self.store.exists(cache_key):
+                if self.memory_cache is not None:
+                    data = self._load_from_cache(cache_key)
                 else:
-                    full_symbol = f"sz{symbol}"
-            else:
-                full_symbol = symbol
-
-            self.logger.info(f"正在获取股票数据: {full_symbol}")
-
-            # 获取股票数据
-            if period == "daily":
-                data = ak.stock_zh_a_hist(symbol=symbol,
-                                        start_date=start_date or "20200101",
-                                        end_date=end_date or "20991231",
-                                        adjust=adjust)
-            elif period == "weekly":
-                data = ak.stock_zh_a_hist(symbol=symbol,
-                                        start_date=start_date or "20200101",
-                                        end_date=end_date or "20991231",
-                                        period="weekly",
-                                        adjust=adjust)
-            elif period == "monthly":
-                data = ak.stock_zh_a_hist(symbol=symbol,
-                                        start_date=start_date or "20200101",
-                                        end_date=end_date or "20991231",
-                                        period="monthly",
-                                        adjust=adjust)
+                    data = self._load_from_cache(cache_key, columns=columns, start=start, end=end)
+            if data is None:
+                # 缓存有缺口，或条目损坏已被隔离（覆盖区间随之清空，重新下载一次）；
+                # 相同的并发请求合并为一次下载，等待者共享下载结果
+                data, covered = self._fill_flight.do((cache_key, start, end, incremental),
+                                                     self._fill_cache, symbol, cache_key,
+                                                     start, end, incremental)
+
+            factors = self._get_adjust_factors(symbol) if adjust else None
+            if self.memory_cache is not None:
+                data = self._compact(self._apply_adjustment(data, factors, adjust))
+                self._remember(symbol, period, adjust, data, covered)
+                data = self._select_columns(data, columns)
             else:
-                raise ValueError(f"不支持的数据周期: {period}")
+                data = self._compact(self._apply_adjustment(self._select_columns(data, columns),
+                                                            factors, adjust))
+            return self._filter_data_by_date(data, start, end)
+
+        except Exception as e:
+            self.logger.error(f"获取股票数据失败: {symbol}, 错误: {e}")
+            raise ValueError(f"获取股票数据失败: {e}")
 
+    def _fill_cache(self,
+                    symbol: str,
+                    cache_key: str,
+                    start: pd.Timestamp,
+                    end: pd.Timestamp,
+                    incremental: bool = True) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp]]]:
+        """
+        补齐缓存条目在请求区间内的缺口
+
+        持有该条目的跨进程文件锁，拿到锁后重新检查覆盖区间：等待期间其他进程
+        可能已经补齐，此时直接读取缓存，不再下载。
+
+        Args:
+            symbol: 股票代码
+            cache_key: 缓存键
+            start: 开始日期
+            end: 结束日期
+            incremental: 是否只下载缺口
+
+        Returns:
+            (条目的全部不复权数据, 已覆盖的日期区间)
+
+        Raises:
+            ValueError: 未获取到数据时
+        """
+        with self._entry_lock(cache_key):
+            covered = self._get_covered_intervals(cache_key)
+            gaps = self._find_gaps(covered, start, end)
+            if gaps and self._pull_shared_bars(cache_key):
+                covered = self._get_covered_intervals(cache_key)
+                gaps = self._find_gaps(covered, start, end)
+
+            if not gaps and self.store.exists(cache_key):
+                data = self._load_from_cache(cache_key)
+                if data is not None:
+                    return data, covered
+
+            cached_data = self._load_from_cache(cache_key) if covered else None
+            if cached_data is None or not incremental:
+                cached_data, covered, gaps = None, [], [(start, end)]
+
+            try:
+                data = self._fill_gaps(symbol, cached_data, gaps, "daily")
+            except Exception as e:
+                # 上游熔断时返回缓存中的已有数据（缺少缺口部分），不更新覆盖区间
+                if cached_data is not None and not cached_data.empty and self._serve_stale(cache_key, e):
+                    return cached_data, covered
+                raise
             if data.empty:
                 raise ValueError(f"未获取到股票 {symbol} 的数据")
 
-            # 标准化列名
-            data = self._standardize_columns(data)
+            covered = self._merge_intervals(covered + gaps)
+            self._save_to_cache(data, cache_key, covered)
+            self.logger.info(f"成功获取股票数据: {symbol}, 共 {len(data)} 条记录")
+            return data, covered
 
-            # 保存到缓存
-            if use_cache:
-                self._save_to_cache(data, cache_file_path)
+    def iter_minute_chunks(self,
+                           symbol: str,
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           period: str = "1min",
+                           adjust: str = "qfq",
+                           columns: Optional[List[str]] = None,
+                           use_cache: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        按月逐块获取分钟线数据
 
-            self.logger.info(f"成功获取股票数据: {symbol}, 共 {len(data)} 条记录")
-            return data
+        分钟线按 股票+周期+月份 分区缓存，每个分区单独记录已覆盖的日期并按缺口补齐；
+        每次只读取一个分区在请求区间内的行，内存占用与请求区间长度无关。
+        指标和回测可以直接消费这些数据块（见 IndicatorCalculator.iter_indicators、
+        BacktestAnalyzer.run_backtest_chunked）。
+
+        注意akshare的分钟线接口只提供近期数据（1分钟线约为最近5个交易日），
+        更早的分钟线需要使用本地数据源。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期 (格式: '20240101')
+            end_date: 结束日期 (格式: '20240131')，包含当天的全部分钟线
+            period: 分钟线周期 ('1min', '5min', '15min', '30min', '60min'；
+                其他 'Nmin' 以及数据源不直接提供的周期由1分钟线聚合，不单独缓存)
+            adjust: 复权方式 ('qfq': 前复权, 'hfq': 后复权, '': 不复权)
+            columns: 只返回指定的列，None表示全部列
+            use_cache: 是否使用缓存
 
+        Yields:
+            每个月在请求区间内的分钟线（以K线结束时间为索引），没有数据的月份跳过
+
+        Raises:
+            ValueError: 当数据周期不支持或数据获取失败时
+        """
+        minutes = self._minute_count(period)
+        if minutes is None:
+            raise ValueError(f"不支持的分钟线周期: {period}")
+        if period not in self.MINUTE_PERIODS or \
+                (minutes != 1 and not self.source.has_minute_series(symbol, minutes)):
+            # 数据源不直接提供的周期由1分钟线聚合；月分区按整日划分，N分钟K线不会跨块
+            for chunk in self.iter_minute_chunks(symbol, start_date, end_date, "1min", adjust,
+                                                 None, use_cache):
+                yield self._select_columns(resample_minute_bars(chunk, minutes), columns)
+            return
+
+        start, end = self._normalize_date_range(start_date, end_date)
+        try:
+            factors = self._get_adjust_factors(symbol) if adjust else None
         except Exception as e:
             self.logger.error(f"获取股票数据失败: {symbol}, 错误: {e}")
             raise ValueError(f"获取股票数据失败: {e}")
 
-    def _standardize_columns(self, data: pd.DataFrame) -> pd.DataFrame:
+        for month in pd.period_range(start, end, freq='M'):
+            chunk_start = max(start, month.start_time)
+            chunk_end = min(end, month.end_time.normalize())
+            try:
+                data = self._load_minute_chunk(symbol, period, month, chunk_start, chunk_end,
+                                               columns, use_cache)
+            except Exception as e:
+                self.logger.error(f"获取分钟线失败: {symbol} {month}, 错误: {e}")
+                raise ValueError(f"获取分钟线失败: {e}")
+            if data is None or data.empty:
+                continue
+            yield self._compact(self._apply_adjustment(data, factors, adjust))
+
+    @staticmethod
+    def _minute_count(period: str) -> Optional[int]:
+        """分钟线周期的分钟数（'Nmin'，N为1-120），不是分钟线周期时返回None"""
+        count = period[:-len("min")] if period.endswith("min") else ""
+        if count.isdigit() and 1 <= int(count) <= 120:
+            return int(count)
+        return None
+
+    def _load_minute_chunk(self,
+                           symbol: str,
+                           period: str,
+                           month: pd.Period,
+                           start: pd.Timestamp,
+                           end: pd.Timestamp,
+                           columns: Optional[List[str]] = None,
+                           use_cache: bool = True) -> Optional[pd.DataFrame]:
+        """
+        读取一个月分区在 [start, end] 日期内的不复权分钟线，缺口先补齐
+
+        Args:
+            symbol: 股票代码
+            period: 分钟线周期
+            month: 分区月份
+            start: 开始日期（在该月内）
+            end: 结束日期（在该月内）
+            columns: 需要读取的列
+            use_cache: 是否使用缓存
+
+        Returns:
+            分钟线数据，该区间没有数据时为None或空DataFrame
+        """
+        if not use_cache:
+            data = self._fetch_remote(symbol, start.strftime("%Y%m%d"), end.strftime("%Y%m%d"),
+                                      period, "", allow_empty=True)
+            return self._select_columns(data, columns)
+
+        cache_key = self._get_minute_cache_key(symbol, period, month)
+        if self._find_gaps(self._get_covered_intervals(cache_key), start, end) or \
+                not self.store.exists(cache_key):
+            try:
+                self._fill_flight.do((cache_key, start, end), self._fill_minute_partition,
+                                     symbol, period, cache_key, start, end)
+            except Exception as e:
+                # 上游熔断时读取分区中的已有数据
+                if not (self.store.exists(cache_key) and self._serve_stale(cache_key, e)):
+                    raise
+
+        self._touch(cache_key)
+        # 结束日期包含当天的全部分钟线
+        day_end = end + pd.Timedelta(days=1) - pd.Timedelta(nanoseconds=1)
+        data = self._load_from_cache(cache_key, columns=columns, start=start, end=day_end)
+        if data is None:
+            # 分区损坏已被隔离，重新补齐一次
+            self._fill_flight.do((cache_key, start, end), self._fill_minute_partition,
+                                 symbol, period, cache_key, start, end)
+            data = self._load_from_cache(cache_key, columns=columns, start=start, end=day_end)
+        return data
+
+    def _fill_minute_partition(self,
+                               symbol: str,
+                               period: str,
+                               cache_key: str,
+                               start: pd.Timestamp,
+                               end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        补齐分钟线月分区在请求区间内的缺口
+
+        与日线相同，持有条目的跨进程文件锁并在拿到锁后重新检查覆盖区间。
+        区间内没有分钟线（停牌、超出数据源的历史范围）时也记为已覆盖，避免重复请求。
+
+        Args:
+            symbol: 股票代码
+            period: 分钟线周期
+            cache_key: 分区的缓存键
+            start: 开始日期
+            end: 结束日期
+
+        Returns:
+            分区已覆盖的日期区间
+        """
+        with self._entry_lock(cache_key):
+            covered = self._get_covered_intervals(cache_key)
+            gaps = self._find_gaps(covered, start, end)
+            if gaps and self._pull_shared_bars(cache_key):
+                covered = self._get_covered_intervals(cache_key)
+                gaps = self._find_gaps(covered, start, end)
+            if not gaps and self.store.exists(cache_key):
+                return covered
+
+            cached_data = self._load_from_cache(cache_key) if covered else None
+            if cached_data is None:
+                covered, gaps = [], [(start, end)]
+
+            data = self._fill_gaps(symbol, cached_data, gaps, period)
+            if data.empty:
+                data = pd.DataFrame(index=pd.DatetimeIndex([], name='date'))
+
+            covered = self._merge_intervals(covered + gaps)
+            self._save_to_cache(data, cache_key, covered)
+            self.logger.info(f"成功获取分钟线: {symbol} {period} {cache_key.rsplit('_', 1)[-1]}, "
+                             f"共 {len(data)} 条记录")
+            return covered
+
+    def _lock_path(self, cache_key: str) -> str:
+        """缓存条目对应的文件锁路径"""
+        return os.path.join(self.cache_dir, ".locks", f"{cache_key}.lock")
+
+    @contextmanager
+    def _entry_lock(self, cache_key: str):
+        """持有缓存条目的跨进程文件锁（同一线程内可重入）"""
+        held = self._held_locks.__dict__.setdefault('keys', set())
+        if cache_key in held:
+            yield
+            return
+        with FileLock(self._lock_path(cache_key), timeout=self.FILL_LOCK_TIMEOUT):
+            held.add(cache_key)
+            try:
+                yield
+            finally:
+                held.discard(cache_key)
+
+    def _get_cached_data(self,
+                         symbol: str,
+                         start: pd.Timestamp,
+                         end: pd.Timestamp,
+                         period: str,
+                         adjust: str,
+                         columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        只从缓存读取数据，不发起任何网络请求
+
+        Args:
+            symbol: 股票代码
+            start: 开始日期
+            end: 结束日期
+            period: 数据周期
+            adjust: 复权方式
+            columns: 需要读取的列
+
+        Returns:
+            缓存完整覆盖请求区间时返回数据，否则返回None
+        """
+        if period in self.PERIOD_FREQS:
+            daily = self._get_cached_data(symbol,
+                                          pd.Timestamp(self._period_lookback_start(start, period)),
+                                          end, "daily", adjust)
+            if daily is None:
+                return None
+            bars = self._compact(self._resample_bars(daily, period, start))
+            return self._select_columns(bars, columns)
+
+        if self.memory_cache is not None:
+            entry = self.memory_cache.get(self._memory_key(symbol, period, adjust),
+                                          tag=self._memory_tag(symbol, period, adjust))
+            if entry is not None:
+                data, covered, factors_checked = entry
+                if self._find_gaps(covered, start, end):
+                    return None
+                if adjust and (factors_checked is None or
+                               factors_checked < self._last_closed_session()):
+                    return None
+                self._touch(*self._entry_keys(symbol, period, adjust))
+                return self._filter_data_by_date(self._select_columns(data, columns), start, end)
+
+        cache_key = self._get_cache_key(symbol, period)
+        covered = self._get_covered_intervals(cache_key)
+        if self._find_gaps(covered, start, end):
+            return None
+
+        factors = None
+        if adjust:
+            factors = self._load_adjust_factors(symbol, require_fresh=True)
+            if factors is None:
+                return None
+
+        if self.memory_cache is not None:
+            cached_data = self._load_from_cache(cache_key)
+        else:
+            cached_data = self._load_from_cache(cache_key, columns=columns, start=start, end=end)
+        if cached_data is None:
+            return None
+
+        self.logger.info(f"从缓存加载数据: {symbol}")
+        self._touch(*self._entry_keys(symbol, period, adjust))
+        data = self._compact(self._apply_adjustment(cached_data, factors, adjust))
+        if self.memory_cache is not None:
+            self._remember(symbol, period, adjust, data, covered)
+            data = self._select_columns(data, columns)
+        return self._filter_data_by_date(data, start, end)
+
+    def _entry_keys(self, symbol: str, period: str, adjust: str) -> List[str]:
+        """读取一次行情数据涉及的磁盘缓存键（行情条目，复权时还有因子表）"""
+        keys = [self._get_cache_key(symbol, period)]
+        if adjust:
+            keys.append(self._get_factor_cache_key(symbol))
+        return keys
+
+    def _memory_key(self, symbol: str, period: str, adjust: str) -> Tuple[str, str, str, str, str]:
+        """内存缓存键：(缓存目录, 数据源, 股票代码, 周期, 复权方式)"""
+        return (self._memory_namespace, self.source.name, symbol, period, adjust)
+
+    def _memory_tag(self, symbol: str, period: str, adjust: str) -> Tuple[Any, Any]:
+        """
+        内存缓存条目的版本标记
+
+        由缓存清单中行情缓存和复权因子缓存的内容哈希组成，任一磁盘条目被更新
+        （包括其他进程写入）都会使内存中的条目失效。
+        """
+        record = self.manifest.get(self._get_cache_key(symbol, period))
+        factor_record = self.manifest.get(self._get_factor_cache_key(symbol)) if adjust else None
+        return (record['content_hash'] if record else None,
+                factor_record['content_hash'] if factor_record else None)
+
+    def _remember(self,
+                  symbol: str,
+                  period: str,
+                  adjust: str,
+                  data: pd.DataFrame,
+                  covered: List[Tuple[pd.Timestamp, pd.Timestamp]]):
+        """
+        将完整的复权后数据放入内存缓存
+
+        Args:
+            symbol: 股票代码
+            period: 数据周期
+            adjust: 复权方式
+            data: 完整的（全部列、全部日期）复权后数据
+            covered: 数据已覆盖的日期区间
+        """
+        factors_checked = None
+        if adjust:
+            record = self.manifest.get(self._get_factor_cache_key(symbol))
+            checked = record['checked'] if record else None
+            factors_checked = pd.Timestamp(checked) if checked else None
+
+        self.memory_cache.put(self._memory_key(symbol, period, adjust),
+                              (data, covered, factors_checked),
+                              nbytes=frame_nbytes(data),
+                              tag=self._memory_tag(symbol, period, adjust))
+
+    async def aget_stock_data(self,
+                              symbol: str,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None,
+                              period: str = "daily",
+                              adjust: str = "qfq",
+                              use_cache: bool = True,
+                              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        get_stock_data 的异步版本，供事件循环中的服务调用
+
+        命中缓存时在默认线程池中读取缓存，不占用下载并发额度；需要下载时在
+        专用线程池中执行阻塞的akshare调用，并发数受async_concurrency限制，
+        超出的请求在事件循环中等待，不占用线程。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期
+            adjust: 复权方式
+            use_cache: 是否使用缓存
+            columns: 只返回指定的列
+
+        Returns:
+            包含股票数据的DataFrame
+
+        Raises:
+            ValueError: 当股票代码无效或数据获取失败时
+        """
+        loop = asyncio.get_running_loop()
+
+        if use_cache:
+            start, end = self._normalize_date_range(start_date, end_date)
+            cached_data = await loop.run_in_executor(
+                None, functools.partial(self._get_cached_data, symbol, start, end,
+                                        period, adjust, columns))
+            if cached_data is not None:
+                return cached_data
+
+        async with self._get_async_semaphore(loop):
+            return await loop.run_in_executor(
+                self._get_async_executor(),
+                functools.partial(self.get_stock_data, symbol, start_date, end_date,
+                                  period, adjust, use_cache, columns))
+
+    async def aget_many(self,
+                        symbols: List[str],
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        period: str = "daily",
+                        adjust: str = "qfq",
+                        use_cache: bool = True,
+                        errors: Optional[Dict[str, Exception]] = None) -> Dict[str, pd.DataFrame]:
         """
-        标准化DataFrame列名
+        get_many 的异步版本
 
         Args:
-            data: 原始数据DataFrame
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期
+            adjust: 复权方式
+            use_cache: 是否使用缓存
+            errors: 可选的字典，获取失败的股票代码及异常会写入其中
 
         Returns:
-            标准化列名后的DataFrame
+            股票代码到数据DataFrame的字典，只包含获取成功的股票
         """
-        column_mapping = {
-            '日期': 'date',
-            '开盘': 'open',
-            '收盘': 'close',
-            '最高': 'high',
-            '最低': 'low',
-            '成交量': 'volume',
-            '成交额': 'amount',
-            '振幅': 'amplitude',
-            '涨跌幅': 'change_pct',
-            '涨跌额': 'change_amount',
-            '换手率': 'turnover'
+        unique_symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(
+            *(self.aget_stock_data(symbol, start_date, end_date, period, adjust, use_cache)
+              for symbol in unique_symbols),
+            return_exceptions=True
+        )
+
+        data_dict = {}
+        for symbol, result in zip(unique_symbols, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"批量获取失败: {symbol}, 错误: {result}")
+                if errors is not None:
+                    errors[symbol] = result
+                continue
+            data_dict[symbol] = result
+        return data_dict
+
+    def _get_async_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """获取当前事件循环对应的下载并发信号量"""
+        with self._async_lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.async_concurrency)
+                self._async_semaphores[loop] = semaphore
+            return semaphore
+
+    def _get_async_executor(self) -> ThreadPoolExecutor:
+        """获取异步接口使用的下载线程池（首次使用时创建）"""
+        with self._async_lock:
+            if self._async_executor is None:
+                self._async_executor = ThreadPoolExecutor(
+                    max_workers=self.async_concurrency,
+                    thread_name_prefix="data_fetcher_async"
+                )
+            return self._async_executor
+
+    def iter_many(self,
+                  symbols: List[str],
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  period: str = "daily",
+                  adjust: str = "qfq",
+                  use_cache: bool = True,
+                  max_workers: int = 8,
+                  errors: Optional[Dict[str, Exception]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        并发获取多只股票的数据，按完成顺序逐个返回
+
+        下载在有界线程池中执行，请求速率受构造时的rate_limit约束，
+        每只股票的请求各自按max_retries重试。
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期
+            adjust: 复权方式
+            use_cache: 是否使用缓存
+            max_workers: 线程池大小
+            errors: 可选的字典，获取失败的股票代码及异常会写入其中
+
+        Yields:
+            (股票代码, 数据DataFrame)，只包含获取成功的股票
+        """
+        unique_symbols = list(dict.fromkeys(symbols))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="data_fetcher")
+        futures = {
+            executor.submit(self.get_stock_data, symbol, start_date, end_date,
+                            period, adjust, use_cache): symbol
+            for symbol in unique_symbols
         }
 
-        # 重命名列
-        data = data.rename(columns=column_mapping)
+        try:
+            done = 0
+            for future in as_completed(futures):
+                symbol = futures[future]
+                done += 1
+                try:
+                    data = future.result()
+                except Exception as e:
+                    self.logger.warning(f"批量获取失败: {symbol}, 错误: {e}")
+                    if errors is not None:
+                        errors[symbol] = e
+                    continue
+                self.logger.info(f"批量获取进度: {done}/{len(futures)}")
+                yield symbol, data
+        finally:
+            # 调用方提前停止迭代时，取消尚未开始的下载
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-        # 确保日期列为datetime格式
-        if 'date' in data.columns:
-            data['date'] = pd.to_datetime(data['date'])
-            data.set_index('date', inplace=True)
+    def get_many(self,
+                 symbols: List[str],
+                 start_date: Optional[str] = None,
+                 end_date: Optional[str] = None,
+                 period: str = "daily",
+                 adjust: str = "qfq",
+                 use_cache: bool = True,
+                 max_workers: int = 8,
+                 errors: Optional[Dict[str, Exception]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        并发获取多只股票的数据
 
-        # 确保数值列为float类型
-        numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'amount']
-        for col in numeric_columns:
-            if col in data.columns:
-                data[col] = pd.to_numeric(data[col], errors='coerce')
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期
+            adjust: 复权方式
+            use_cache: 是否使用缓存
+            max_workers: 线程池大小
+            errors: 可选的字典，获取失败的股票代码及异常会写入其中
+
+        Returns:
+            股票代码到数据DataFrame的字典，只包含获取成功的股票
+        """
+        return dict(self.iter_many(symbols, start_date, end_date, period, adjust,
+                                   use_cache, max_workers, errors))
+
+    def get_trading_calendar(self) -> TradingCalendar:
+        """
+        获取沪深交易所交易日历
+
+        交易日历从数据源获取后缓存 CALENDAR_REFRESH_DAYS 天；数据源不提供交易日历
+        或获取失败且没有缓存时，使用周一至周五的近似日历。
+
+        Returns:
+            交易日历
+        """
+        today = pd.Timestamp(datetime.now()).normalize()
+        with self._calendar_lock:
+            if self._calendar is not None and self._calendar_loaded_on == today:
+                return self._calendar
+
+            cache_key = self._get_calendar_cache_key()
+            record = self.manifest.get(cache_key)
+            cached = self._load_from_cache(cache_key) if record else None
+            fresh = (cached is not None and len(cached.index) and record['checked'] and
+                     pd.Timestamp(record['checked']) >= today - pd.Timedelta(days=self.CALENDAR_REFRESH_DAYS))
+
+            if fresh:
+                sessions = cached.index
+            else:
+                try:
+                    sessions = self._call_upstream(self.source.fetch_trade_calendar)
+                    self._save_entry(cache_key, pd.DataFrame(index=sessions.rename('date')),
+                                     checked=today.strftime("%Y%m%d"))
+                except NotImplementedError:
+                    sessions = None
+                except Exception as e:
+                    self.logger.warning(f"获取交易日历失败: {e}")
+                    sessions = cached.index if cached is not None and len(cached.index) else None
+
+            if sessions is None:
+                self.logger.info(f"数据源 {self.source.name} 不提供交易日历，使用周一至周五的近似日历")
+                self._calendar = TradingCalendar.from_weekdays()
+            else:
+                self._calendar = TradingCalendar(sessions)
+            self._calendar_loaded_on = today
+            return self._calendar
+
+    def find_cache_gaps(self,
+                        symbol: str,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        查询日线缓存在请求区间内尚未覆盖的部分（只读缓存清单，不发起网络请求）
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            需要下载的 (开始日期, 结束日期) 列表，为空表示缓存已完整覆盖
+        """
+        start, end = self._normalize_date_range(start_date, end_date)
+        return self._find_gaps(self._get_covered_intervals(self._get_cache_key(symbol)), start, end)
+
+    def cached_symbols(self) -> List[str]:
+        """当前数据源已缓存日线数据的股票代码"""
+        return sorted({record['symbol'] for record in
+                       self.manifest.entries(source=self.source.name, kind='bars', period='daily')})
+
+    def refresh_from_snapshot(self,
+                              symbols: Optional[List[str]] = None,
+                              trade_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        用一次全市场行情快照为已缓存的日线追加当日K线
+
+        只处理覆盖区间截止于上一个交易日的日线缓存：从快照中一次性选出这些股票的
+        当日行情，追加到不复权日线末尾并把覆盖区间延长到当日。快照中有代码但没有
+        成交（停牌）的股票只延长覆盖区间。复权因子不在此更新，除权除息的股票会在
+        下次读取复权数据时按需更新因子表。
+
+        快照只反映当前时刻的行情，只有在某个交易日收盘之后、下一个交易日开盘之前获取时
+        才是该交易日的收盘行情（见 _snapshot_session），其他时间拒绝刷新。
+
+        Args:
+            symbols: 只刷新这些股票，None表示当前数据源全部已缓存的股票
+            trade_date: 快照对应的交易日，只能是当前快照所对应的交易日，默认即为该交易日
+                （节假日期间为节前最后一个交易日）
+
+        Returns:
+            统计信息：trade_date、updated（追加K线）、suspended（停牌）、
+            missing（快照中没有）、skipped（覆盖区间不衔接）
+
+        Raises:
+            ValueError: 交易时段内（快照是盘中行情）、trade_date 不是快照对应的交易日，
+                或数据源不提供行情快照时
+        """
+        calendar = self.get_trading_calendar()
+        session = self._snapshot_session(calendar)
+        trade_day = session if trade_date is None else pd.Timestamp(trade_date).normalize()
+        if trade_day != session:
+            raise ValueError(f"行情快照对应交易日 {session.date()}，不能作为 {trade_day.date()} 的K线")
+        previous_day = calendar.previous_session(trade_day)
+
+        summary = {'trade_date': trade_day.strftime("%Y%m%d"),
+                   'updated': 0, 'suspended': 0, 'missing': 0, 'skipped': 0}
+
+        wanted = set(symbols) if symbols is not None else None
+        candidates = {}
+        for record in self.manifest.entries(source=self.source.name, kind='bars', period='daily'):
+            if wanted is not None and record['symbol'] not in wanted:
+                continue
+            covered = record['covered']
+            last_end = pd.Timestamp(covered[-1][1]) if covered else None
+            if last_end is None or not previous_day <= last_end < trade_day:
+                summary['skipped'] += 1
+                continue
+            candidates[record['symbol']] = record['key']
+
+        if not candidates:
+            self.logger.info(f"没有需要用行情快照刷新的缓存: {summary}")
+            return summary
+
+        try:
+            snapshot = self._call_upstream(self.source.fetch_spot_snapshot)
+        except NotImplementedError as e:
+            raise ValueError(str(e))
+
+        # 一次性选出所有候选股票的当日行情
+        rows = snapshot.reindex(list(candidates))
+        in_snapshot = rows.index.isin(snapshot.index)
+        traded = in_snapshot & rows['close'].notna().to_numpy() & (rows['volume'].fillna(0) > 0).to_numpy()
+        summary['missing'] = int((~in_snapshot).sum())
+
+        for symbol, is_listed, has_trade in zip(rows.index, in_snapshot, traded):
+            if not is_listed:
+                continue
+            row = rows.loc[symbol] if has_trade else None
+            try:
+                if self._append_session_bar(candidates[symbol], trade_day, row):
+                    summary['updated' if has_trade else 'suspended'] += 1
+            except Exception as e:
+                self.logger.warning(f"追加当日K线失败: {symbol}, 错误: {e}")
+
+        self.logger.info(f"行情快照刷新完成: {summary}")
+        return summary
+
+    def _snapshot_session(self, calendar: TradingCalendar) -> pd.Timestamp:
+        """
+        当前时刻的行情快照所对应的已收盘交易日
+
+        交易日15:00收盘后到下一个交易日9:15开盘前，快照是最近一个交易日的收盘行情；
+        交易日9:15到15:00之间快照是盘中行情，不对应任何已收盘的交易日。
+
+        Args:
+            calendar: 交易日历
+
+        Returns:
+            快照对应的交易日
+
+        Raises:
+            ValueError: 当前处于交易时段内时
+        """
+        now = pd.Timestamp(datetime.now())
+        today = now.normalize()
+        minutes = now.hour * 60 + now.minute
+        session = calendar.rollback(today)
+        if session == today:
+            if minutes < self.MARKET_OPEN_MINUTES:
+                session = calendar.previous_session(today)
+            elif minutes < self.MARKET_CLOSE_MINUTES:
+                raise ValueError(f"交易时段内的行情快照是盘中行情，不能作为已收盘的K线: {now}")
+        return session
+
+    def _append_session_bar(self,
+                            cache_key: str,
+                            trade_day: pd.Timestamp,
+                            row: Optional[pd.Series]) -> bool:
+        """
+        为日线缓存追加一根K线并把覆盖区间延长到trade_day
+
+        Args:
+            cache_key: 缓存键
+            trade_day: 交易日
+            row: 当日行情（标准列名），None表示停牌，只延长覆盖区间
 
-        return data.sort_index()
+        Returns:
+            是否更新了缓存（其他进程已经更新时返回False）
+        """
+        with self._entry_lock(cache_key):
+            covered = self._get_covered_intervals(cache_key)
+            if not covered or covered[-1][1] >= trade_day:
+                return False
+            data = self._load_from_cache(cache_key)
+            if data is None:
+                return False
+
+            if row is not None:
+                bar = {}
+                for col in data.columns:
+                    if pd.api.types.is_numeric_dtype(data[col]):
+                        bar[col] = row.get(col, np.nan)
+                    else:
+                        # 快照中没有的文本列（如股票代码）沿用上一根K线的值
+                        bar[col] = data[col].iloc[-1] if len(data) else None
+                new_bar = pd.DataFrame(bar, columns=data.columns,
+                                       index=pd.DatetimeIndex([trade_day], name=data.index.name))
+                new_bar = new_bar.astype(data.dtypes.to_dict(), errors='ignore')
+                data = pd.concat([data[data.index < trade_day], new_bar])
+
+            covered = self._merge_intervals(covered + [(covered[-1][1], trade_day)])
+            self._save_to_cache(data, cache_key, covered)
+            return True
+
+    def _normalize_date_range(self,
+                              start_date: Optional[str],
+                              end_date: Optional[str]) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        规范化请求的日期区间
+
+        未指定开始日期时默认从2020年开始；结束日期不超过最近一个已收盘的交易日，
+        使盘中获取的未走完K线不会被记为已覆盖，下次请求时会重新下载。
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            (开始日期, 结束日期)
+        """
+        start = pd.Timestamp(start_date or self.DEFAULT_START_DATE).normalize()
+        last_closed = self._last_closed_session()
+        end = pd.Timestamp(end_date).normalize() if end_date else last_closed
+        return start, min(end, last_closed)
+
+    def _last_closed_session(self) -> pd.Timestamp:
+        """最近一个已收盘的日期（15:00之前为前一天）"""
+        now = pd.Timestamp(datetime.now())
+        last_closed = now.normalize()
+        if now.hour * 60 + now.minute < self.MARKET_CLOSE_MINUTES:
+            last_closed -= pd.Timedelta(days=1)
+        return last_closed
+
+    @staticmethod
+    def _merge_intervals(intervals: List[Tuple[pd.Timestamp, pd.Timestamp]]
+                         ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """合并重叠或首尾相接（按天）的日期区间"""
+        merged = []
+        for start, end in sorted(i for i in intervals if i[0] <= i[1]):
+            if merged and start <= merged[-1][1] + pd.Timedelta(days=1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _find_gaps(covered: List[Tuple[pd.Timestamp, pd.Timestamp]],
+                   start: pd.Timestamp,
+                   end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        计算请求区间中未被缓存覆盖的部分
+
+        Args:
+            covered: 已覆盖的日期区间（已合并、按时间排序）
+            start: 请求开始日期
+            end: 请求结束日期
+
+        Returns:
+            缺口区间列表
+        """
+        gaps = []
+        cursor = start
+        for cov_start, cov_end in covered:
+            if cov_end < cursor:
+                continue
+            if cov_start > end:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, cov_start - pd.Timedelta(days=1)))
+            cursor = cov_end + pd.Timedelta(days=1)
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _fill_gaps(self,
+                   symbol: str,
+                   cached_data: Optional[pd.DataFrame],
+                   gaps: List[Tuple[pd.Timestamp, pd.Timestamp]],
+                   period: str = "daily") -> pd.DataFrame:
+        """
+        下载缺口区间的不复权数据并合并到已缓存数据中
+
+        不复权价格不会因除权除息而改变，新旧数据可以直接拼接。
+
+        Args:
+            symbol: 股票代码
+            cached_data: 已缓存的数据，没有时为None
+            gaps: 缺口区间列表
+            period: 数据周期
+
+        Returns:
+            合并后的DataFrame
+        """
+        frames = [] if cached_data is None else [cached_data]
+
+        for gap_start, gap_end in gaps:
+            gap_data = self._fetch_remote(symbol, gap_start.strftime("%Y%m%d"),
+                                          gap_end.strftime("%Y%m%d"), period, "",
+                                          allow_empty=True)
+            if gap_data.empty:
+                continue
+
+            self.logger.info(f"补齐缓存缺口: {symbol} {gap_start.date()} ~ {gap_end.date()}, "
+                             f"{len(gap_data)} 条记录")
+            frames.append(gap_data)
+
+        if not frames:
+            return pd.DataFrame()
+
+        data = pd.concat(frames)
+        return data[~data.index.duplicated(keep='last')].sort_index()
+
+    def _get_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        """
+        获取后复权因子表，缓存过期时重新下载
+
+        因子表很小，每个交易日收盘后最多下载一次；下载失败时退回使用过期的缓存。
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            以日期为索引、包含 hfq_factor 列的DataFrame
+
+        Raises:
+            ValueError: 下载失败且没有缓存时
+        """
+        factors = self._load_adjust_factors(symbol, require_fresh=True)
+        if factors is not None:
+            return factors
+
+        cache_key = self._get_factor_cache_key(symbol)
+        return self._fill_flight.do(cache_key, self._refresh_adjust_factors, symbol, cache_key)
+
+    def _refresh_adjust_factors(self, symbol: str, cache_key: str) -> pd.DataFrame:
+        """持有文件锁更新复权因子表（拿到锁后先检查其他进程是否已经更新）"""
+        with self._entry_lock(cache_key):
+            factors = self._load_adjust_factors(symbol, require_fresh=True)
+            if factors is not None:
+                return factors
+
+            factors = self._pull_shared_factors(symbol)
+            if factors is not None:
+                return factors
+
+            try:
+                factors = self._fetch_adjust_factors(symbol)
+            except Exception as e:
+                stale = self._load_adjust_factors(symbol, require_fresh=False)
+                if stale is None:
+                    raise
+                self.logger.warning(f"复权因子更新失败，使用缓存的因子: {symbol}, 错误: {e}")
+                return stale
+
+            try:
+                self._save_entry(cache_key, factors,
+                                 checked=self._last_closed_session().strftime("%Y%m%d"))
+            except Exception as e:
+                self.logger.warning(f"保存复权因子失败: {e}")
+            return factors
+
+    def _pull_shared_factors(self, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        从共享缓存获取未过期的复权因子表，并保存到本地缓存
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            因子表DataFrame，共享缓存中没有或已过期时返回None
+        """
+        if self.shared_cache is None:
+            return None
+        cache_key = self._get_factor_cache_key(symbol)
+        entry = self.shared_cache.get(cache_key)
+        if entry is None:
+            return None
+
+        factors, fields = entry
+        checked = fields.get('checked')
+        if checked is None or pd.Timestamp(checked) < self._last_closed_session():
+            return None
+
+        try:
+            self._save_entry(cache_key, factors, share=False, checked=checked)
+        except Exception as e:
+            self.logger.warning(f"保存复权因子失败: {e}")
+        return factors
+
+    def _load_adjust_factors(self, symbol: str, require_fresh: bool = True) -> Optional[pd.DataFrame]:
+        """
+        从缓存读取后复权因子表
+
+        Args:
+            symbol: 股票代码
+            require_fresh: 是否要求因子表在最近一个已收盘交易日之后检查过
+
+        Returns:
+            因子表DataFrame，不存在或已过期时返回None
+        """
+        cache_key = self._get_factor_cache_key(symbol)
+        record = self.manifest.get(cache_key)
+        if record is None:
+            return None
+
+        checked = record['checked']
+        if require_fresh and (checked is None or
+                              pd.Timestamp(checked) < self._last_closed_session()):
+            return None
+
+        return self._load_from_cache(cache_key)
+
+    def _fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        """
+        从数据源获取后复权因子表
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            以日期升序为索引、包含 hfq_factor 列的DataFrame
+        """
+        self.logger.info(f"正在获取复权因子: {symbol}")
+        return self._call_upstream(self.source.fetch_adjust_factors, symbol)
+
+    def _adjustment_ratio(self,
+                          dates: pd.DatetimeIndex,
+                          factors: pd.DataFrame,
+                          adjust: str,
+                          anchor_date: Optional[pd.Timestamp] = None) -> np.ndarray:
+        """
+        计算每个交易日的复权价格与不复权价格之比
+
+        后复权比例为当日生效的后复权因子；前复权比例为当日因子除以基准日因子，
+        基准日默认为因子表的最新日期（即当前的前复权口径）。
+
+        Args:
+            dates: 交易日期
+            factors: 后复权因子表
+            adjust: 复权方式 ('qfq', 'hfq')
+            anchor_date: 前复权的基准日期
+
+        Returns:
+            与dates等长的比例数组
+        """
+        factor_dates = factors.index.values
+        factor_values = factors['hfq_factor'].to_numpy(dtype=np.float64)
+
+        positions = np.searchsorted(factor_dates, dates.values, side='right') - 1
+        ratio = np.where(positions >= 0, factor_values[np.maximum(positions, 0)], 1.0)
+
+        if adjust == "qfq":
+            if anchor_date is None:
+                anchor = factor_values[-1]
+            else:
+                anchor_pos = np.searchsorted(factor_dates, np.datetime64(anchor_date), side='right') - 1
+                anchor = factor_values[anchor_pos] if anchor_pos >= 0 else 1.0
+            ratio = ratio / anchor
+        elif adjust != "hfq":
+            raise ValueError(f"不支持的复权方式: {adjust}")
+
+        return ratio
+
+    @classmethod
+    def _scale_prices(cls, data: pd.DataFrame, ratio: np.ndarray) -> pd.DataFrame:
+        """将价格类列按比例缩放（成交量、成交额及百分比类列保持不变）"""
+        scaled = {col: data[col].to_numpy() * ratio
+                  for col in cls.PRICE_COLUMNS if col in data.columns}
+        if not scaled:
+            return data
+        return data.assign(**scaled)
+
+    def _apply_adjustment(self,
+                          data: pd.DataFrame,
+                          factors: Optional[pd.DataFrame],
+                          adjust: str) -> pd.DataFrame:
+        """
+        将不复权数据转换为指定的复权口径
+
+        Args:
+            data: 不复权数据
+            factors: 后复权因子表
+            adjust: 复权方式 ('qfq', 'hfq', '')
+
+        Returns:
+            复权后的DataFrame
+        """
+        if not adjust or data.empty:
+            return data
+        return self._scale_prices(data, self._adjustment_ratio(data.index, factors, adjust))
+
+    def _fetch_remote(self,
+                      symbol: str,
+                      start_date: Optional[str],
+                      end_date: Optional[str],
+                      period: str,
+                      adjust: str,
+                      allow_empty: bool = False) -> pd.DataFrame:
+        """
+        从数据源获取不复权日线或分钟线数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            period: 数据周期（'daily' 或 MINUTE_PERIODS 中的分钟线周期）
+            adjust: 复权方式（数据源只提供不复权数据）
+            allow_empty: 是否允许返回空数据（补齐缺口时没有新数据属于正常情况）
+
+        Returns:
+            标准化后的DataFrame
+
+        Raises:
+            ValueError: 当数据周期、复权方式不支持或未获取到数据时
+        """
+        self.logger.info(f"正在获取股票数据: {to_exchange_symbol(symbol)} ({self.source.name})")
+
+        if period != "daily" and period not in self.MINUTE_PERIODS:
+            raise ValueError(f"不支持的数据周期: {period}")
+        if adjust:
+            raise ValueError(f"数据源只提供不复权数据，复权价格由复权因子计算: {adjust}")
+
+        if period in self.MINUTE_PERIODS:
+            data = self._call_upstream(self.source.fetch_minute,
+                                       symbol,
+                                       start_date or self.DEFAULT_START_DATE,
+                                       end_date or "20991231",
+                                       self.MINUTE_PERIODS[period])
+        else:
+            data = self._call_upstream(self.source.fetch_daily,
+                                       symbol,
+                                       start_date or self.DEFAULT_START_DATE,
+                                       end_date or "20991231")
+
+        if data.empty and not allow_empty:
+            raise ValueError(f"未获取到股票 {symbol} 的数据")
+        return data
+
+    def _call_upstream(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        调用上游数据接口，统一施加熔断、限流、超时、对冲请求和失败重试（本地数据源直接调用）
+
+        网络错误和超时（OSError）计入熔断器的连续失败次数；接口返回的其他错误说明上游可以访问，
+        不计入失败。
+
+        Args:
+            func: 数据源接口函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            接口返回值
+
+        Raises:
+            CircuitOpenError: 熔断器打开时
+        """
+        if not self.source.remote:
+            return func(*args, **kwargs)
+        if not self.circuit_breaker.allow():
+            self._count_upstream_event('rejected')
+            raise CircuitOpenError(f"上游数据源不可用（熔断中）: {self.source.name}")
+
+        try:
+            result = retry_call(self._attempt_upstream, func, *args,
+                                max_retries=self.max_retries,
+                                backoff=self.retry_backoff,
+                                before_attempt=self.rate_limiter.acquire if self.rate_limiter else None,
+                                logger=self.logger,
+                                **kwargs)
+        except OSError:
+            self._count_upstream_event('failed')
+            self.circuit_breaker.record_failure()
+            raise
+        except Exception:
+            self._count_upstream_event('failed')
+            self.circuit_breaker.record_success()
+            raise
+        self.circuit_breaker.record_success()
+        return result
+
+    def _attempt_upstream(self, func: Callable, *args, **kwargs) -> Any:
+        """单次上游请求：超时后放弃等待，启用对冲时慢请求再发出一个相同的请求"""
+        hedge_delay = None
+        if self.hedge_percentile is not None:
+            hedge_delay = self.fetch_latency.percentile(self.hedge_percentile, self.HEDGE_MIN_SAMPLES)
+
+        start = time.monotonic()
+        if self.request_timeout is None and hedge_delay is None:
+            result = func(*args, **kwargs)
+        else:
+            result = hedged_call(self._get_upstream_executor(), func, *args,
+                                 timeout=self.request_timeout,
+                                 hedge_delay=hedge_delay,
+                                 allow_hedge=self.rate_limiter.try_acquire if self.rate_limiter else None,
+                                 on_event=self._count_upstream_event,
+                                 **kwargs)
+        self.fetch_latency.record(time.monotonic() - start)
+        return result
+
+    def _get_upstream_executor(self) -> ThreadPoolExecutor:
+        """获取执行上游请求的线程池（首次使用时创建）"""
+        with self._upstream_lock:
+            if self._upstream_executor is None:
+                self._upstream_executor = ThreadPoolExecutor(max_workers=self.UPSTREAM_WORKERS,
+                                                             thread_name_prefix="data_fetcher_upstream")
+            return self._upstream_executor
+
+    def _count_upstream_event(self, event: str):
+        """上游请求事件计数（hedged、hedge_won、timeout、failed、rejected、stale）"""
+        with self._upstream_lock:
+            self._upstream_events[event] = self._upstream_events.get(event, 0) + 1
+
+    def _serve_stale(self, cache_key: str, error: Exception) -> bool:
+        """上游熔断时是否改用缓存中的已有数据（记录事件并输出警告）"""
+        if not isinstance(error, OSError) or self.circuit_breaker.state == CircuitBreaker.CLOSED:
+            return False
+        self._count_upstream_event('stale')
+        self.logger.warning(f"上游数据源不可用，使用缓存中的已有数据: {cache_key}, 错误: {error}")
+        return True
+
+    def get_fetch_metrics(self) -> Dict[str, Any]:
+        """
+        获取上游请求的延迟和可用性指标
+
+        Returns:
+            包含 p50/p95/p99 请求延迟（秒）、超时与对冲请求次数、熔断器状态
+            和使用过期缓存次数的字典
+        """
+        with self._upstream_lock:
+            events = dict(self._upstream_events)
+        hedge_delay = None
+        if self.hedge_percentile is not None:
+            hedge_delay = self.fetch_latency.percentile(self.hedge_percentile, self.HEDGE_MIN_SAMPLES)
+        return {
+            'latency': self.fetch_latency.snapshot(),
+            'request_timeout': self.request_timeout,
+            'hedge_percentile': self.hedge_percentile,
+            'hedge_delay': hedge_delay,
+            'timeouts': events.get('timeout', 0),
+            'hedged': events.get('hedged', 0),
+            'hedge_wins': events.get('hedge_won', 0),
+            'failures': events.get('failed', 0),
+            'rejected': events.get('rejected', 0),
+            'stale_served': events.get('stale', 0),
+            'circuit_state': self.circuit_breaker.state,
+            'circuit_opened': self.circuit_breaker.opened_count,
+        }
+
+    def _compact(self, data: pd.DataFrame) -> pd.DataFrame:
+        """紧凑模式下转换为紧凑数据类型"""
+        return compact_frame(data) if self.compact else data
+
+    @staticmethod
+    def _select_columns(data: pd.DataFrame, columns: Optional[List[str]]) -> pd.DataFrame:
+        """只保留指定的列，None表示全部列"""
+        if columns is None:
+            return data
+        return data[[c for c in columns if c in data.columns]]
+
+    def _period_lookback_start(self, start_date: Optional[Any], period: str) -> str:
+        """
+        计算聚合周线/月线所需日线数据的开始日期
+
+        从开始日期所在周期的上一个周期开始取日线，使第一根K线完整，
+        并且能得到计算涨跌幅所需的前收盘价。
+
+        Args:
+            start_date: 请求的开始日期
+            period: 目标周期 ('weekly', 'monthly')
+
+        Returns:
+            日线数据的开始日期 (格式: '20200101')
+        """
+        start = pd.Timestamp(start_date or self.DEFAULT_START_DATE)
+        previous_period = start.to_period(self.PERIOD_FREQS[period]) - 1
+        return previous_period.start_time.strftime("%Y%m%d")
+
+    def _resample_bars(self,
+                       daily: pd.DataFrame,
+                       period: str,
+                       start_date: Optional[Any] = None) -> pd.DataFrame:
+        """
+        将日线聚合为周线或月线
+
+        按自然周/自然月分组（向量化计算组边界），开盘取首日、收盘取末日、最高/最低取极值、
+        成交量/成交额/换手率求和；K线日期为该周期内最后一个交易日，与akshare一致。
+        涨跌幅、涨跌额、振幅按上一根K线的收盘价重新计算。
+
+        Args:
+            daily: 按日期升序排列的日线数据
+            period: 目标周期 ('weekly', 'monthly')
+            start_date: 只保留该日期所在周期及之后的K线
+
+        Returns:
+            聚合后的DataFrame
+        """
+        if daily.empty:
+            return daily
+
+        ordinals = daily.index.to_period(self.PERIOD_FREQS[period]).asi8
+        boundaries = np.flatnonzero(np.diff(ordinals)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(daily)])) - 1
+
+        bars = {}
+        for col in daily.columns:
+            values = daily[col].to_numpy()
+            if col == 'open':
+                bars[col] = values[starts]
+            elif col == 'high':
+                bars[col] = np.maximum.reduceat(values, starts)
+            elif col == 'low':
+                bars[col] = np.minimum.reduceat(values, starts)
+            elif col in ('volume', 'amount', 'turnover'):
+                # 紧凑模式的int32成交量按int64累加，避免月线溢出
+                dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else None
+                bars[col] = np.add.reduceat(values, starts, dtype=dtype)
+            else:
+                bars[col] = values[ends]
+
+        result = pd.DataFrame(bars, index=daily.index[ends])
+
+        if 'close' in result.columns:
+            prev_close = result['close'].shift(1)
+            if 'change_amount' in result.columns:
+                result['change_amount'] = result['close'] - prev_close
+            if 'change_pct' in result.columns:
+                result['change_pct'] = (result['close'] / prev_close - 1) * 100
+            if 'amplitude' in result.columns and {'high', 'low'} <= set(result.columns):
+                result['amplitude'] = (result['high'] - result['low']) / prev_close * 100
+
+        if start_date is not None:
+            start_ordinal = pd.Timestamp(start_date).to_period(self.PERIOD_FREQS[period]).ordinal
+            result = result[ordinals[ends] >= start_ordinal]
+
+        return result
 
     def _filter_data_by_date(self,
                            data: pd.DataFrame,
@@ -228,6 +2022,9 @@ class DataFetcher:
         """
         按日期范围过滤数据
 
+        在已排序的日期索引上二分查找区间的行号范围，返回按位置切片的视图，
+        不构造布尔掩码、不复制数据。
+
         Args:
             data: 原始数据
             start_date: 开始日期
@@ -236,32 +2033,57 @@ class DataFetcher:
         Returns:
             过滤后的数据
         """
-        if start_date is not None:
-            start_date = pd.to_datetime(start_date)
-            data = data[data.index >= start_date]
-
-        if end_date is not None:
-            end_date = pd.to_datetime(end_date)
-            data = data[data.index <= end_date]
+        index = data.index
+        if not index.is_monotonic_increasing:
+            # 未排序的数据无法二分查找，按日期逐行比较
+            mask = np.ones(len(index), dtype=bool)
+            if start_date is not None:
+                mask &= index >= pd.to_datetime(start_date)
+            if end_date is not None:
+                mask &= index <= pd.to_datetime(end_date)
+            return data[mask]
 
-        return data
+        first = index.searchsorted(pd.to_datetime(start_date), side='left') if start_date is not None else 0
+        last = index.searchsorted(pd.to_datetime(end_date), side='right') if end_date is not None else len(index)
+        return data.iloc[first:max(first, last)]
 
     def clear_cache(self, symbol: Optional[str] = None):
         """
         清理缓存
 
         Args:
-            symbol: 要清理的股票代码，如果为None则清理所有缓存
+            symbol: 要清理的股票代码（只清理当前数据源的缓存，包括共享缓存中的条目），
+                如果为None则清理所有本地缓存（共享缓存不受影响）
         """
         if symbol:
-            cache_file = self._get_cache_file_path(symbol)
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
+            removed = 0
+            cache_keys = self.manifest.keys(symbol, source=self.source.name)
+            for cache_key in cache_keys:
+                removed += self._delete_entry(cache_key)
+            if self.shared_cache is not None:
+                self.shared_cache.delete(sorted(set(cache_keys) | {
+                    self._get_cache_key(symbol), self._get_factor_cache_key(symbol)}))
+            for period in ("daily", "weekly", "monthly"):
+                pickle_path = os.path.join(self.cache_dir, f"{symbol}_{period}.pkl")
+                if os.path.exists(pickle_path):
+                    os.remove(pickle_path)
+                    removed += 1
+            if self.memory_cache is not None:
+                for adjust in ("", "qfq", "hfq"):
+                    self.memory_cache.invalidate(self._memory_key(symbol, "daily", adjust))
+            if removed:
                 self.logger.info(f"已清理缓存: {symbol}")
         else:
+            for cache_key in self.store.list_keys():
+                self.store.delete(cache_key)
+            self.manifest.clear()
             for filename in os.listdir(self.cache_dir):
                 if filename.endswith('.pkl'):
                     os.remove(os.path.join(self.cache_dir, filename))
+            shutil.rmtree(self.indicator_cache_dir, ignore_errors=True)
+            http_client = getattr(self.source, 'http_client', None)
+            if http_client is not None and http_client.cache is not None:
+                http_client.cache.clear()
             self.logger.info("已清理所有缓存")
 
     def get_cache_info(self) -> Dict[str, Any]:
@@ -271,15 +2093,25 @@ class DataFetcher:
         Returns:
             包含缓存统计信息的字典
         """
-        cache_files = [f for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]
+        summary = self.manifest.summary()
+        quarantine_bytes = self.store.quarantine_size()
 
         cache_info = {
-            'cache_count': len(cache_files),
-            'cache_files': cache_files,
-            'cache_size_mb': sum(
-                os.path.getsize(os.path.join(self.cache_dir, f))
-                for f in cache_files
-            ) / (1024 * 1024)
+            'cache_count': summary['count'],
+            'cache_files': self.manifest.keys(),
+            'cache_size_mb': summary['bytes'] / (1024 * 1024),
+            'cache_max_mb': (self.cache_max_bytes / (1024 * 1024)
+                             if self.cache_max_bytes is not None else None),
+            'eviction_policy': self.eviction_policy,
+            'pinned_symbols': self.manifest.pinned(),
+            'data_source': self.source.describe(),
+            'shared_cache': (self.shared_cache.url
+                             if self.shared_cache is not None else None),
+            'quarantined': dict(self.quarantined),
+            'quarantine_mb': quarantine_bytes / (1024 * 1024),
+            'http_cache_mb': self._http_cache_size() / (1024 * 1024),
         }
+        if self.memory_cache is not None:
+            cache_info['memory_cache'] = self.memory_cache.stats()
 
         return cache_info
\ No newline at end of file
@@ -0,0 +1,489 @@
+"""
+数据源模块
+定义行情数据源接口，提供akshare在线数据源和本地CSV/Parquet文件数据源
+"""
+
+import os
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import logging
+
+from src.http_session import PooledHttpClient
+
+
+# akshare返回的中文列名到标准列名的映射
+COLUMN_MAPPING = {
+    '日期': 'date',
+    '时间': 'date',
+    '开盘': 'open',
+    '收盘': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '涨跌幅': 'change_pct',
+    '涨跌额': 'change_amount',
+    '换手率': 'turnover',
+    '均价': 'avg_price'
+}
+
+# akshare全市场实时行情快照的列名到标准列名的映射
+SPOT_COLUMN_MAPPING = {
+    '代码': 'symbol',
+    '今开': 'open',
+    '最新价': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '涨跌幅': 'change_pct',
+    '涨跌额': 'change_amount',
+    '换手率': 'turnover'
+}
+
+
+def standardize_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    标准化DataFrame列名
+
+    Args:
+        data: 原始数据DataFrame
+
+    Returns:
+        标准化列名、以日期为索引并按日期排序的DataFrame
+    """
+    # 重命名列
+    data = data.rename(columns=COLUMN_MAPPING)
+
+    # 确保日期列为datetime格式
+    if 'date' in data.columns:
+        data['date'] = pd.to_datetime(data['date'])
+        data.set_index('date', inplace=True)
+
+    # 确保数值列为float类型
+    numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'amount']
+    for col in numeric_columns:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce')
+
+    return data.sort_index()
+
+
+# 可由OHLC价格重新计算的派生列，紧凑模式下不保留（见 add_derived_columns）
+DERIVED_COLUMNS = ['amplitude', 'change_pct', 'change_amount']
+
+
+def compact_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    将行情数据转换为紧凑的数据类型，内存占用约为原来的一半或更少
+
+    - 价格、成交额、换手率等浮点列转换为float32（约7位有效数字）
+    - 成交量为整数时转换为int32（超出范围时为int64）
+    - 派生列（振幅、涨跌幅、涨跌额）删除，需要时用 add_derived_columns 重新计算
+    - 文本列（如股票代码）删除
+    日期索引保持不变（datetime64与int64日序号同为8字节）。已经是紧凑格式的数据不会复制。
+
+    Args:
+        data: 标准列名、以日期为索引的DataFrame
+
+    Returns:
+        紧凑格式的DataFrame
+    """
+    columns = {}
+    for col in data.columns:
+        if col in DERIVED_COLUMNS:
+            continue
+        values = data[col].to_numpy()
+        if col == 'volume':
+            columns[col] = _compact_integers(values)
+        elif np.issubdtype(values.dtype, np.floating):
+            columns[col] = values.astype(np.float32, copy=False)
+        elif np.issubdtype(values.dtype, np.number):
+            columns[col] = values
+    return pd.DataFrame(columns, index=data.index, copy=False)
+
+
+def _compact_integers(values: np.ndarray) -> np.ndarray:
+    """整数值的列转换为能容纳其取值范围的最小整数类型（int32或int64），否则转换为float32"""
+    if np.issubdtype(values.dtype, np.integer):
+        integral = values
+    elif len(values) and np.isfinite(values).all() and (values == np.round(values)).all():
+        integral = values.astype(np.int64)
+    else:
+        return values.astype(np.float32, copy=False)
+
+    info = np.iinfo(np.int32)
+    if not len(integral) or (integral.min() >= info.min and integral.max() <= info.max):
+        return integral.astype(np.int32, copy=False)
+    return integral.astype(np.int64, copy=False)
+
+
+def add_derived_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    由收盘价重新计算紧凑模式删除的涨跌额、涨跌幅和振幅（百分比）
+
+    第一根K线没有前收盘价，这些列为NaN。
+
+    Args:
+        data: 包含 high/low/close 列的DataFrame
+
+    Returns:
+        添加了派生列的DataFrame
+    """
+    close = data['close'].astype(np.float64)
+    prev_close = close.shift(1)
+    return data.assign(
+        amplitude=(data['high'].astype(np.float64) - data['low'].astype(np.float64)) / prev_close * 100,
+        change_pct=(close / prev_close - 1) * 100,
+        change_amount=close - prev_close,
+    )
+
+
+def to_exchange_symbol(symbol: str) -> str:
+    """将6位股票代码转换为带交易所前缀的代码（如 sh600000）"""
+    if len(symbol) == 6:
+        if symbol.startswith('6') or symbol.startswith('9'):
+            return f"sh{symbol}"
+        return f"sz{symbol}"
+    return symbol
+
+
+def unit_adjust_factors() -> pd.DataFrame:
+    """恒为1的后复权因子表（数据源不提供复权因子时使用，复权价格等于原始价格）"""
+    return pd.DataFrame({'hfq_factor': [1.0]},
+                        index=pd.DatetimeIndex([pd.Timestamp('1900-01-01')], name='date'))
+
+
+class DataSource(ABC):
+    """
+    行情数据源接口
+
+    数据源只需提供不复权日线和后复权因子表，缓存、复权、周期聚合均由DataFetcher完成。
+    不同数据源的缓存按 name 区分，互不覆盖。
+    """
+
+    # 数据源名称，用于区分缓存条目（只能包含字母和数字）
+    name: str = ""
+    # 是否为网络数据源；本地数据源不限流、不重试
+    remote: bool = True
+
+    @abstractmethod
+    def fetch_daily(self,
+                    symbol: str,
+                    start_date: str,
+                    end_date: str) -> pd.DataFrame:
+        """
+        获取不复权日线数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期 (格式: '20200101')
+            end_date: 结束日期 (格式: '20231231')
+
+        Returns:
+            标准化列名、以日期为索引的DataFrame，区间内没有数据时返回空DataFrame
+        """
+
+    @abstractmethod
+    def fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        """
+        获取后复权因子表
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            以日期升序为索引、包含 hfq_factor 列的DataFrame
+        """
+
+    def fetch_minute(self,
+                     symbol: str,
+                     start_date: str,
+                     end_date: str,
+                     minutes: int) -> pd.DataFrame:
+        """
+        获取不复权分钟线数据（可选实现）
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期 (格式: '20240101')
+            end_date: 结束日期 (格式: '20240131')，包含当天的全部分钟线
+            minutes: 分钟线周期（1、5、15、30、60）
+
+        Returns:
+            标准化列名、以K线结束时间为索引的DataFrame，区间内没有数据时返回空DataFrame
+
+        Raises:
+            NotImplementedError: 数据源不提供分钟线时
+        """
+        raise NotImplementedError(f"数据源 {self.name} 不提供分钟线数据")
+
+    def has_minute_series(self, symbol: str, minutes: int) -> bool:
+        """
+        数据源是否直接提供该股票的N分钟线（不提供时由1分钟线聚合）
+
+        Args:
+            symbol: 股票代码
+            minutes: 分钟线周期（1、5、15、30、60）
+
+        Returns:
+            默认为True（fetch_minute 支持全部周期）
+        """
+        return True
+
+    def fetch_spot_snapshot(self) -> pd.DataFrame:
+        """
+        获取全市场当日行情快照（可选实现）
+
+        Returns:
+            以股票代码为索引、包含 open/high/low/close/volume 等标准列的DataFrame
+
+        Raises:
+            NotImplementedError: 数据源不提供行情快照时
+        """
+        raise NotImplementedError(f"数据源 {self.name} 不提供全市场行情快照")
+
+    def fetch_trade_calendar(self) -> pd.DatetimeIndex:
+        """
+        获取沪深交易所的全部交易日（可选实现）
+
+        Returns:
+            按时间排序的交易日索引（通常包含当年已公布的未来交易日）
+
+        Raises:
+            NotImplementedError: 数据源不提供交易日历时
+        """
+        raise NotImplementedError(f"数据源 {self.name} 不提供交易日历")
+
+    def describe(self) -> Dict[str, Any]:
+        """获取数据源的描述信息"""
+        return {'name': self.name, 'remote': self.remote}
+
+
+class AkshareDataSource(DataSource):
+    """akshare在线数据源（东方财富日线 + 新浪复权因子）"""
+
+    name = "akshare"
+    remote = True
+    # 实时行情快照和截止日期为当天（盘中数据随时变化）的请求使用的HTTP缓存有效期，0表示不缓存
+    INTRADAY_CACHE_TTL = 0
+
+    def __init__(self, ak_module: Any = None, http_client: Optional[PooledHttpClient] = None):
+        """
+        初始化akshare数据源
+
+        Args:
+            ak_module: 提供akshare接口的对象，默认导入akshare；
+                可传入录制/回放替身（见 src.akshare_replay）
+            http_client: 导入akshare时安装的HTTP客户端（连接池和响应缓存，见 src.http_session），
+                只有本数据源调用akshare期间发出的请求经过该客户端；
+                None表示akshare按原样发起请求；传入 ak_module 时不安装
+        """
+        self.logger = logging.getLogger(__name__)
+        self._ak = ak_module
+        self.http_client = http_client
+
+    @property
+    def ak(self):
+        """延迟导入akshare，离线环境只使用本地数据源时无需安装"""
+        if self._ak is None:
+            try:
+                import akshare
+            except ImportError as e:
+                raise ImportError("使用akshare数据源需要安装akshare: pip install akshare") from e
+            if self.http_client is not None:
+                self.http_client.install()
+            self._ak = akshare
+        return self._ak
+
+    def _http(self, end_date: Optional[str] = None, realtime: bool = False):
+        """
+        一次akshare调用的HTTP上下文
+
+        Args:
+            end_date: 请求的截止日期，不早于今天时按盘中数据处理
+            realtime: 是否为实时行情请求
+
+        Returns:
+            激活HTTP客户端的上下文管理器（没有HTTP客户端时为空上下文）
+        """
+        if self.http_client is None:
+            return nullcontext()
+        intraday = realtime or (end_date is not None and
+                                pd.Timestamp(end_date).normalize() >= pd.Timestamp.now().normalize())
+        return self.http_client.activate(cache_ttl=self.INTRADAY_CACHE_TTL if intraday else None)
+
+    def fetch_daily(self,
+                    symbol: str,
+                    start_date: str,
+                    end_date: str) -> pd.DataFrame:
+        with self._http(end_date):
+            data = self.ak.stock_zh_a_hist(symbol=symbol,
+                                           period="daily",
+                                           start_date=start_date,
+                                           end_date=end_date,
+                                           adjust="")
+        if data.empty:
+            return data
+        return standardize_columns(data)
+
+    def fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        with self._http():
+            raw = self.ak.stock_zh_a_daily(symbol=to_exchange_symbol(symbol), adjust="hfq-factor")
+        factors = pd.DataFrame(
+            {'hfq_factor': pd.to_numeric(raw['hfq_factor'], errors='coerce').to_numpy()},
+            index=pd.DatetimeIndex(pd.to_datetime(raw['date']), name='date')
+        )
+        return factors.dropna().sort_index()
+
+    def fetch_minute(self,
+                     symbol: str,
+                     start_date: str,
+                     end_date: str,
+                     minutes: int) -> pd.DataFrame:
+        """获取东方财富分钟线（该接口只提供近期数据，1分钟线约为最近5个交易日）"""
+        with self._http(end_date):
+            data = self.ak.stock_zh_a_hist_min_em(symbol=symbol,
+                                                  start_date=f"{pd.Timestamp(start_date):%Y-%m-%d} 09:00:00",
+                                                  end_date=f"{pd.Timestamp(end_date):%Y-%m-%d} 15:30:00",
+                                                  period=str(minutes),
+                                                  adjust="")
+        if data.empty:
+            return data
+        return standardize_columns(data)
+
+    def fetch_spot_snapshot(self) -> pd.DataFrame:
+        """获取东方财富沪深京A股实时行情快照（一次请求返回全市场）"""
+        with self._http(realtime=True):
+            raw = self.ak.stock_zh_a_spot_em()
+        snapshot = raw.rename(columns=SPOT_COLUMN_MAPPING)
+        snapshot = snapshot[[col for col in SPOT_COLUMN_MAPPING.values() if col in snapshot.columns]]
+        snapshot['symbol'] = snapshot['symbol'].astype(str)
+        snapshot = snapshot.set_index('symbol')
+        return snapshot.apply(pd.to_numeric, errors='coerce')
+
+    def fetch_trade_calendar(self) -> pd.DatetimeIndex:
+        """获取新浪财经的A股历史及当年交易日历"""
+        with self._http():
+            raw = self.ak.tool_trade_date_hist_sina()
+        return pd.DatetimeIndex(pd.to_datetime(raw['trade_date'])).sort_values()
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        if self.http_client is not None:
+            info['http'] = self.http_client.stats()
+        return info
+
+
+class LocalFileDataSource(DataSource):
+    """
+    本地文件数据源，读取一个目录下的CSV/Parquet日线文件，适合离线环境
+
+    目录结构：
+        {root_dir}/{symbol}.csv 或 {symbol}.parquet          不复权日线
+        {root_dir}/{symbol}.hfq_factor.csv（可选）           后复权因子表（date, hfq_factor）
+        {root_dir}/trade_calendar.csv（可选）                交易日历（trade_date 列）
+        {root_dir}/{symbol}.{N}min.csv 或 .parquet（可选）   N分钟线（时间列为 date 或 时间）
+
+    日线文件需包含日期列（date 或 日期）和 open/high/low/close/volume 等列，
+    中文列名会按akshare的格式自动转换。没有因子文件时复权价格等于原始价格。
+    读取Parquet文件需要安装pyarrow或fastparquet。
+    """
+
+    remote = False
+    EXTENSIONS = ('.parquet', '.csv')
+    FACTOR_SUFFIX = '.hfq_factor.csv'
+    CALENDAR_FILE = 'trade_calendar.csv'
+
+    def __init__(self, root_dir: str, name: str = "local"):
+        """
+        初始化本地文件数据源
+
+        Args:
+            root_dir: 行情文件所在目录
+            name: 数据源名称，指向不同目录的本地数据源应使用不同的名称
+        """
+        if not os.path.isdir(root_dir):
+            raise ValueError(f"本地数据目录不存在: {root_dir}")
+        if not name.isalnum():
+            raise ValueError(f"数据源名称只能包含字母和数字: {name}")
+
+        self.root_dir = root_dir
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+    def _find_file(self, symbol: str) -> str:
+        """查找股票对应的行情文件"""
+        for ext in self.EXTENSIONS:
+            path = os.path.join(self.root_dir, f"{symbol}{ext}")
+            if os.path.exists(path):
+                return path
+        raise ValueError(f"本地数据目录中没有股票 {symbol} 的行情文件")
+
+    def fetch_daily(self,
+                    symbol: str,
+                    start_date: str,
+                    end_date: str) -> pd.DataFrame:
+        data = self._read_bars(self._find_file(symbol))
+        return data.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+
+    def has_minute_series(self, symbol: str, minutes: int) -> bool:
+        """目录中是否有该股票的 {symbol}.{N}min 文件"""
+        return any(os.path.exists(os.path.join(self.root_dir, f"{symbol}.{minutes}min{ext}"))
+                   for ext in self.EXTENSIONS)
+
+    def fetch_minute(self,
+                     symbol: str,
+                     start_date: str,
+                     end_date: str,
+                     minutes: int) -> pd.DataFrame:
+        path = self._find_file(f"{symbol}.{minutes}min")
+        data = self._read_bars(path)
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        return data.loc[pd.Timestamp(start_date):end]
+
+    @staticmethod
+    def _read_bars(path: str) -> pd.DataFrame:
+        """读取行情文件并标准化列名"""
+        if path.endswith('.parquet'):
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path, dtype={'股票代码': str, 'symbol': str})
+
+        if not {'date', '日期', '时间'} & set(data.columns):
+            # Parquet文件可能直接以日期为索引保存
+            data = data.reset_index()
+            data = data.rename(columns={data.columns[0]: 'date'})
+
+        return standardize_columns(data)
+
+    def fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        path = os.path.join(self.root_dir, f"{symbol}{self.FACTOR_SUFFIX}")
+        if not os.path.exists(path):
+            return unit_adjust_factors()
+
+        raw = pd.read_csv(path)
+        factors = pd.DataFrame(
+            {'hfq_factor': pd.to_numeric(raw['hfq_factor'], errors='coerce').to_numpy()},
+            index=pd.DatetimeIndex(pd.to_datetime(raw['date']), name='date')
+        )
+        return factors.dropna().sort_index()
+
+    def fetch_trade_calendar(self) -> pd.DatetimeIndex:
+        path = os.path.join(self.root_dir, self.CALENDAR_FILE)
+        if not os.path.exists(path):
+            return super().fetch_trade_calendar()
+        raw = pd.read_csv(path)
+        column = 'trade_date' if 'trade_date' in raw.columns else raw.columns[0]
+        return pd.DatetimeIndex(pd.to_datetime(raw[column])).sort_values()
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info['root_dir'] = self.root_dir
+        return info
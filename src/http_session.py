@@ -0,0 +1,391 @@
+"""
+HTTP会话模块
+为akshare发起的HTTP请求提供共享的长连接池和基于SQLite的响应缓存：
+同一天内重复扫描股票池时复用TCP/TLS连接，相同的请求（URL + 参数）直接返回缓存的响应
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import logging
+
+
+# 不参与缓存键计算的查询参数（时间戳类防缓存参数，每次请求都不同）
+IGNORED_PARAMS = ('_',)
+
+# 当前上下文中生效的客户端和响应有效期（见 PooledHttpClient.activate），
+# 未激活时 requests 的模块级函数按原样发出请求
+_current: ContextVar[Optional[Tuple["PooledHttpClient", Optional[float]]]] = ContextVar(
+    'pooled_http_client', default=None)
+
+
+def request_key(method: str,
+                url: str,
+                params: Any = None,
+                data: Any = None,
+                json_body: Any = None) -> Tuple[str, str]:
+    """
+    计算请求的缓存键
+
+    URL中的查询参数与 params 合并后按名称排序，参数顺序不同的相同请求得到同一个键。
+
+    Args:
+        method: 请求方法
+        url: 请求地址（可以带查询参数）
+        params: 查询参数（字典或键值对列表）
+        data: 请求体
+        json_body: JSON请求体
+
+    Returns:
+        (缓存键, 规范化后的URL)
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if isinstance(params, dict):
+        params = params.items()
+    for name, value in params or ():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((str(name), str(v)) for v in values if v is not None)
+    query = sorted((name, value) for name, value in query if name not in IGNORED_PARAMS)
+
+    canonical_url = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path,
+                                "&".join(f"{name}={value}" for name, value in query), ""))
+    body = data if isinstance(data, (str, bytes, type(None))) else sorted(dict(data).items())
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    payload = json.dumps([method.upper(), canonical_url, body, json_body],
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest(), canonical_url
+
+
+class HttpResponseCache:
+    """
+    HTTP响应缓存
+
+    每个响应一行，保存状态码、响应头、响应体和写入时间；读取时按TTL判断是否过期，
+    修改TTL对已缓存的响应立即生效。多个进程可以同时读写同一个缓存文件。
+    每写入 PRUNE_INTERVAL 个响应（及首次写入时）删除一次过期的响应。
+    """
+
+    PRUNE_INTERVAL = 256
+
+    def __init__(self, path: str, ttl: float):
+        """
+        初始化HTTP响应缓存
+
+        Args:
+            path: SQLite缓存文件路径
+            ttl: 响应的有效期（秒）
+        """
+        if ttl <= 0:
+            raise ValueError(f"HTTP缓存有效期必须大于0: {ttl}")
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._puts_lock = threading.Lock()
+        self._puts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接，首次连接时建表"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                             "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, "
+                             "encoding TEXT, content BLOB, created_at REAL)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        读取未过期的响应
+
+        Args:
+            key: 缓存键（见 request_key）
+            ttl: 本次读取使用的有效期（秒），None表示使用缓存的默认有效期
+
+        Returns:
+            包含 url、status、headers、encoding、content、created_at 的字典，
+            不存在或已过期时返回None
+        """
+        row = self._connect().execute(
+            "SELECT url, status, headers, encoding, content, created_at FROM responses "
+            "WHERE key = ? AND created_at > ?", (key, time.time() - (self.ttl if ttl is None else ttl))
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, encoding, content, created_at = row
+        return {'url': url, 'status': status, 'headers': json.loads(headers),
+                'encoding': encoding, 'content': bytes(content), 'created_at': created_at}
+
+    def put(self,
+            key: str,
+            url: str,
+            status: int,
+            headers: Dict[str, str],
+            encoding: Optional[str],
+            content: bytes):
+        """
+        保存一个响应
+
+        Args:
+            key: 缓存键
+            url: 响应的URL
+            status: 状态码
+            headers: 响应头
+            encoding: 响应的文本编码
+            content: 响应体
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(dict(headers)), encoding,
+                 sqlite3.Binary(content), time.time())
+            )
+        with self._puts_lock:
+            due = self._puts % self.PRUNE_INTERVAL == 0
+            self._puts += 1
+        if due:
+            removed = self.prune()
+            if removed:
+                self.logger.info(f"清理过期的HTTP响应缓存: {removed} 条")
+
+    def prune(self) -> int:
+        """
+        删除已过期的响应
+
+        Returns:
+            删除的响应数
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM responses WHERE created_at <= ?",
+                                  (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def clear(self):
+        """清空全部缓存的响应"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def file_size(self) -> int:
+        """缓存文件（含WAL日志）占用的字节数，计入磁盘配额"""
+        total = 0
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                total += os.path.getsize(self.path + suffix)
+            except OSError:
+                continue
+        return total
+
+    def summary(self) -> Dict[str, Any]:
+        """缓存的响应数、响应体总字节数和缓存文件大小"""
+        count, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM responses"
+        ).fetchone()
+        return {'path': self.path, 'ttl': self.ttl, 'responses': count, 'bytes': size,
+                'file_bytes': self.file_size()}
+
+
+class PooledHttpClient:
+    """
+    带连接池和响应缓存的HTTP客户端
+
+    所有线程共享同一个连接池（requests的HTTPAdapter），每个线程使用自己的Session；
+    install 替换 requests.get/requests.post 等模块级函数，但只有在 activate()
+    的上下文中发出的请求才通过本客户端（akshare无需修改即可复用长连接和缓存的响应），
+    同一进程中其他库的请求不受影响。只缓存状态码为200的GET请求，
+    stream=True 的请求不经过缓存。
+    """
+
+    # 全局安装状态：被替换的 requests.request 原函数
+    _install_lock = threading.Lock()
+    _original_request = None
+
+    def __init__(self,
+                 cache: Optional[HttpResponseCache] = None,
+                 pool_connections: int = 16,
+                 pool_maxsize: int = 32,
+                 timeout: Optional[float] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            cache: 响应缓存，None表示只使用连接池
+            pool_connections: 连接池按主机缓存的连接池数量
+            pool_maxsize: 每个主机保持的最大连接数（不少于下载线程数时连接可以全部复用）
+            timeout: 调用方未指定timeout时使用的连接/读取超时（秒），None表示不限制；
+                akshare的大部分接口不设置超时，服务端不响应时请求会一直阻塞
+        """
+        self.cache = cache
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.installed = False
+
+    @staticmethod
+    def _requests():
+        """延迟导入requests（akshare的依赖，只使用本地数据源时无需安装）"""
+        try:
+            import requests
+        except ImportError as e:
+            raise ImportError("使用HTTP连接池需要安装requests: pip install requests") from e
+        return requests
+
+    def _session(self):
+        """获取当前线程的Session，首次使用时挂载共享的连接池"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            requests = self._requests()
+            with self._adapter_lock:
+                if self._adapter is None:
+                    # 重试由 DataFetcher 统一处理，连接池本身不重试
+                    self._adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_connections,
+                                                                  pool_maxsize=self.pool_maxsize,
+                                                                  max_retries=0)
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, cache_ttl: Optional[float] = None, **kwargs):
+        """
+        发起HTTP请求，其余参数与 requests.request 相同
+
+        Args:
+            cache_ttl: 本次请求可以使用的缓存响应的有效期（秒），
+                None表示使用缓存的默认有效期，0表示不读取也不保存缓存
+
+        Returns:
+            requests.Response，命中缓存时其 from_cache 属性为True
+        """
+        with self._stats_lock:
+            self.requests += 1
+
+        cacheable = (self.cache is not None and cache_ttl != 0
+                     and method.upper() == "GET" and not kwargs.get('stream'))
+        if cacheable:
+            key, _ = request_key(method, url, kwargs.get('params'),
+                                 kwargs.get('data'), kwargs.get('json'))
+            cached = self.cache.get(key, ttl=cache_ttl)
+            if cached is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                return self._build_response(cached)
+
+        if self.timeout is not None and kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        response = self._session().request(method, url, **kwargs)
+        response.from_cache = False
+        if cacheable and response.status_code == 200:
+            try:
+                self.cache.put(key, response.url, response.status_code, response.headers,
+                               response.encoding, response.content)
+            except sqlite3.Error as e:
+                self.logger.warning(f"保存HTTP响应缓存失败: {e}")
+        return response
+
+    def _build_response(self, cached: Dict[str, Any]):
+        """由缓存的内容还原 requests.Response"""
+        requests = self._requests()
+        response = requests.models.Response()
+        response.status_code = cached['status']
+        response.reason = "OK"
+        response.url = cached['url']
+        response.headers = requests.structures.CaseInsensitiveDict(cached['headers'])
+        response.encoding = cached['encoding']
+        response._content = cached['content']
+        response.from_cache = True
+        return response
+
+    def install(self):
+        """
+        替换 requests 的模块级请求函数（重复安装无副作用）
+
+        替换后的函数只在 activate() 的上下文中使用激活的客户端，其余请求仍按原样发出。
+        """
+        requests = self._requests()
+        cls = PooledHttpClient
+        with cls._install_lock:
+            if cls._original_request is None:
+                cls._original_request = requests.api.request
+
+                def pooled_request(method, url, **kwargs):
+                    current = _current.get()
+                    if current is None:
+                        return cls._original_request(method, url, **kwargs)
+                    client, cache_ttl = current
+                    return client.request(method, url, cache_ttl=cache_ttl, **kwargs)
+
+                # requests.get/post 等通过 requests.api 模块内的 request 发出
+                requests.api.request = pooled_request
+                requests.request = pooled_request
+            self.installed = True
+
+    def uninstall(self):
+        """恢复 requests 的模块级请求函数（所有客户端都不再生效）"""
+        requests = self._requests()
+        cls = PooledHttpClient
+        with cls._install_lock:
+            self.installed = False
+            if cls._original_request is not None:
+                requests.api.request = cls._original_request
+                requests.request = cls._original_request
+                cls._original_request = None
+
+    @contextmanager
+    def activate(self, cache_ttl: Optional[float] = None):
+        """
+        在上下文中让 requests 的模块级请求经过本客户端（需要先 install）
+
+        上下文按线程（及asyncio任务）隔离，其他线程同时发出的请求不受影响。
+
+        Args:
+            cache_ttl: 上下文中的请求可以使用的缓存响应的有效期（秒），
+                None表示使用缓存的默认有效期，0表示不使用缓存（如实时行情）
+        """
+        token = _current.set((self, cache_ttl))
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取请求统计信息
+
+        Returns:
+            包含请求数、缓存命中数和缓存文件信息的字典
+        """
+        with self._stats_lock:
+            info = {
+                'requests': self.requests,
+                'cache_hits': self.cache_hits,
+                'hit_rate': self.cache_hits / self.requests if self.requests else 0.0,
+                'pool_maxsize': self.pool_maxsize,
+                'timeout': self.timeout,
+                'installed': self.installed,
+            }
+        if self.cache is not None:
+            info['cache'] = self.cache.summary()
+        return info
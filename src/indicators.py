@@ -3,19 +3,58 @@
 基于talib库实现各种技术指标的计算，支持参数配置和扩展
 """
 
+import hashlib
+import json
+import os
+import threading
+import time
+
 import talib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
 import logging
 
+from src.cache_store import ColumnarCacheStore
+
 
 class IndicatorCalculator:
     """技术指标计算器类，负责计算各种技术指标"""
 
-    def __init__(self):
-        """初始化指标计算器"""
+    # 分块计算时预热行数相对指标参数的倍数及下限
+    WARMUP_MULTIPLIER = 5
+    MIN_WARMUP_BARS = 50
+    # 指标结果缓存的保留天数和容量上限（MB）；每写入 CACHE_PRUNE_INTERVAL 个结果检查一次，
+    # 超出上限时按写入时间从旧到新删除到上限的 CACHE_LOW_WATERMARK 以下
+    CACHE_MAX_AGE_DAYS = 7
+    CACHE_MAX_MB = 512
+    CACHE_PRUNE_INTERVAL = 256
+    CACHE_LOW_WATERMARK = 0.9
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 read_only: bool = False,
+                 cache_max_mb: Optional[float] = None):
+        """
+        初始化指标计算器
+
+        Args:
+            cache_dir: 指标结果缓存目录，None表示不缓存。结果按输入数据和参数的
+                内容哈希保存，输入完全相同时直接读取（如预热进程提前计算的结果）
+            read_only: 只读取缓存的结果，不写入新的结果（如Web界面只复用预热进程的结果，
+                交互计算不占用磁盘）
+            cache_max_mb: 指标结果缓存的容量上限（MB），默认读取环境变量
+                STOCK_INDICATOR_CACHE_MAX_MB，未设置时为 CACHE_MAX_MB
+        """
         self.logger = logging.getLogger(__name__)
+        self.cache = ColumnarCacheStore(cache_dir) if cache_dir else None
+        self.cache_read_only = read_only
+        if cache_max_mb is None:
+            cache_max_mb = float(os.environ.get('STOCK_INDICATOR_CACHE_MAX_MB', self.CACHE_MAX_MB))
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        # 首次写入时先清理一次，之后每 CACHE_PRUNE_INTERVAL 次写入清理一次
+        self._saves_since_prune = self.CACHE_PRUNE_INTERVAL
+        self._prune_lock = threading.Lock()
 
         # 预定义的指标配置
         self.indicator_configs = {
@@ -110,7 +149,9 @@ class IndicatorCalculator:
                 'params': {},
                 'function': talib.OBV,
                 'input_cols': ['close', 'volume'],
-                'output_names': lambda params: ["OBV"]
+                'output_names': lambda params: ["OBV"],
+                # 累计型指标：分块计算时需要接上前一块的累计值
+                'cumulative': True
             },
             'VOLUME_SMA': {
                 'name': '成交量移动平均',
@@ -163,6 +204,25 @@ class IndicatorCalculator:
         Raises:
             ValueError: 当指标代码无效或参数错误时
         """
+        return self._calculate(data, indicator_code, params, {})
+
+    def _calculate(self,
+                   data: pd.DataFrame,
+                   indicator_code: str,
+                   params: Dict[str, Any],
+                   inputs: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        计算单个技术指标
+
+        Args:
+            data: 股票数据DataFrame
+            indicator_code: 指标代码
+            params: 指标参数
+            inputs: 已转换为float64的输入列，计算多个指标时共用，每列只转换一次
+
+        Returns:
+            包含计算结果的DataFrame
+        """
         if indicator_code not in self.indicator_configs:
             raise ValueError(f"不支持的指标: {indicator_code}")
 
@@ -175,19 +235,28 @@ class IndicatorCalculator:
         if missing_cols:
             raise ValueError(f"数据缺少必需列: {missing_cols}")
 
-        # 准备输入参数
+        # 准备输入参数（talib要求连续的float64数组；已是float64的列不复制）
         input_args = []
         for col in input_cols:
-            # 确保数据类型为float64，避免类型错误
-            series = data[col].astype(np.float64).values
-            # 转换为numpy数组
-            input_args.append(series)
+            values = inputs.get(col)
+            if values is None:
+                values = np.ascontiguousarray(data[col].to_numpy(dtype=np.float64))
+                inputs[col] = values
+            input_args.append(values)
 
         # 添加指标参数
         for param_name, param_value in params.items():
             if param_name in config['params']:
                 input_args.append(param_value)
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._result_cache_key(indicator_code, function, params,
+                                               data.index, input_args[:len(input_cols)])
+            cached = self._load_cached_result(cache_key, data.index)
+            if cached is not None:
+                return cached
+
         try:
             # 计算指标
             result = function(*input_args)
@@ -206,12 +275,98 @@ class IndicatorCalculator:
                 output_name = config['output_names'](params)[0]
                 result_df = pd.DataFrame({output_name: result}, index=data.index)
 
-            return result_df
-
         except Exception as e:
             self.logger.error(f"计算指标失败: {indicator_code}, 参数: {params}, 错误: {e}")
             raise ValueError(f"计算指标失败: {e}")
 
+        if cache_key is not None and not self.cache_read_only:
+            try:
+                self.cache.save(cache_key, result_df)
+            except Exception as e:
+                self.logger.warning(f"保存指标缓存失败: {indicator_code}, 错误: {e}")
+            else:
+                self._maybe_prune_cache()
+        return result_df
+
+    def _maybe_prune_cache(self):
+        """写入结果后按间隔清理缓存，使缓存目录的大小有上限"""
+        with self._prune_lock:
+            self._saves_since_prune += 1
+            if self._saves_since_prune < self.CACHE_PRUNE_INTERVAL:
+                return
+            self._saves_since_prune = 0
+        try:
+            self.prune_cache()
+        except OSError as e:
+            self.logger.warning(f"清理指标缓存失败: {e}")
+
+    @staticmethod
+    def _result_cache_key(indicator_code: str,
+                          function: Any,
+                          params: Dict[str, Any],
+                          index: pd.Index,
+                          inputs: List[np.ndarray]) -> str:
+        """指标结果的缓存键：指标代码 + 计算函数、参数、日期索引和输入数据的内容哈希"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(getattr(function, '__qualname__', repr(function)).encode('utf-8'))
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(np.ascontiguousarray(index.values).tobytes())
+        for values in inputs:
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return f"{indicator_code}_{digest.hexdigest()}"
+
+    def _load_cached_result(self, cache_key: str, index: pd.Index) -> Optional[pd.DataFrame]:
+        """读取缓存的指标结果，不存在或损坏时返回None"""
+        try:
+            cached = self.cache.load(cache_key)
+        except Exception as e:
+            self.logger.warning(f"读取指标缓存失败: {cache_key}, 错误: {e}")
+            return None
+        if cached is None or len(cached) != len(index):
+            return None
+        cached.index = index
+        return cached
+
+    def prune_cache(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None) -> int:
+        """
+        删除超过指定天数未重新写入的指标缓存；剩余条目超出容量上限时再按写入时间从旧到新删除
+
+        Args:
+            max_age_days: 最长保留天数，默认为 CACHE_MAX_AGE_DAYS
+            max_bytes: 容量上限（字节），默认为构造时的 cache_max_mb
+
+        Returns:
+            删除的条目数
+        """
+        if self.cache is None:
+            return 0
+        max_age_days = self.CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        max_bytes = self.cache_max_bytes if max_bytes is None else max_bytes
+
+        cutoff = time.time() - max_age_days * 24 * 3600
+        removed = 0
+        remaining = []
+        for key in self.cache.list_keys():
+            mtime = self.cache.mtime(key)
+            if mtime is None:
+                continue
+            if mtime < cutoff:
+                removed += self.cache.delete(key)
+            else:
+                remaining.append((mtime, key, self.cache.entry_size(key)))
+
+        total = sum(size for _, _, size in remaining)
+        if total > max_bytes:
+            target = max_bytes * self.CACHE_LOW_WATERMARK
+            for _, key, size in sorted(remaining):
+                if total <= target:
+                    break
+                removed += self.cache.delete(key)
+                total -= size
+        if removed:
+            self.logger.info(f"已清理 {removed} 个过期的指标缓存")
+        return removed
+
     def calculate_multiple_indicators(self,
                                     data: pd.DataFrame,
                                     indicator_configs: List[Dict[str, Any]]) -> pd.DataFrame:
@@ -225,20 +380,88 @@ class IndicatorCalculator:
         Returns:
             包含所有计算结果的DataFrame
         """
-        result_df = data.copy()
+        inputs: Dict[str, np.ndarray] = {}
+        results = [data]
 
         for config in indicator_configs:
             indicator_code = config['code']
             params = config['params']
 
             try:
-                indicator_result = self.calculate_indicator(data, indicator_code, params)
-                result_df = pd.concat([result_df, indicator_result], axis=1)
+                results.append(self._calculate(data, indicator_code, params, inputs))
             except Exception as e:
                 self.logger.warning(f"跳过指标计算: {indicator_code}, 错误: {e}")
                 continue
 
-        return result_df
+        # 所有指标结果一次拼接，避免逐个拼接反复复制已有的列
+        return pd.concat(results, axis=1)
+
+    def warmup_bars(self, indicator_configs: List[Dict[str, Any]]) -> int:
+        """
+        分块计算时每块需要带上的前一块末尾行数
+
+        取各指标整数参数之和的 WARMUP_MULTIPLIER 倍（不少于 MIN_WARMUP_BARS），
+        使均线类指标完全一致、EMA类指标（EMA、MACD、RSI、KDJ）的初值影响充分衰减。
+
+        Args:
+            indicator_configs: 指标配置列表
+
+        Returns:
+            预热行数
+        """
+        longest = max((sum(v for v in config['params'].values()
+                           if isinstance(v, (int, np.integer)) and not isinstance(v, bool))
+                       for config in indicator_configs), default=0)
+        return max(longest * self.WARMUP_MULTIPLIER, self.MIN_WARMUP_BARS)
+
+    def iter_indicators(self,
+                        chunks: Iterable[pd.DataFrame],
+                        indicator_configs: List[Dict[str, Any]],
+                        warmup_bars: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        逐块计算多个技术指标（如 DataFetcher.iter_minute_chunks 逐月返回的分钟线）
+
+        每块计算前接上前一块末尾 warmup_bars 行作为预热数据，计算后再去掉，
+        因此块边界处的指标值与整段计算一致（EMA类指标为收敛后的近似值）；
+        累计型指标（如OBV）按前一块的最后一个值对齐。
+
+        Args:
+            chunks: 按时间顺序排列的数据块
+            indicator_configs: 指标配置列表，每个配置包含'code'和'params'字段
+            warmup_bars: 预热行数，默认由 warmup_bars() 按指标参数估算
+
+        Yields:
+            每块数据及其指标结果
+        """
+        if warmup_bars is None:
+            warmup_bars = self.warmup_bars(indicator_configs)
+
+        cumulative = []
+        for config in indicator_configs:
+            indicator = self.indicator_configs.get(config['code'], {})
+            if indicator.get('cumulative'):
+                cumulative.extend(indicator['output_names'](config['params']))
+
+        carry: Optional[pd.DataFrame] = None
+        last_row: Optional[pd.Series] = None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            frame = chunk if carry is None else pd.concat([carry, chunk])
+            result = self.calculate_multiple_indicators(frame, indicator_configs)
+
+            if carry is not None:
+                # 累计值从预热数据的第一行重新开始累计，按重叠行与前一块的结果对齐
+                overlap = len(carry) - 1
+                for col in cumulative:
+                    if col in result.columns:
+                        result[col] += last_row[col] - result[col].iloc[overlap]
+                result = result.iloc[len(carry):]
+
+            last_row = result.iloc[-1]
+            # 至少保留一行，用于对齐累计型指标
+            carry = frame.iloc[-max(warmup_bars, 1):]
+            yield result
 
     def add_custom_indicator(self,
                            code: str,
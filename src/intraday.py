@@ -0,0 +1,185 @@
+"""
+分钟线聚合模块
+将1分钟线按A股交易时段向量化聚合为任意N分钟线，并支持随新分钟线到达增量更新
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import logging
+
+
+# A股连续竞价时段（分钟线以K线结束时间为时间戳：上午 09:31-11:30，下午 13:01-15:00）
+MORNING_OPEN = 9 * 60 + 30
+MORNING_CLOSE = 11 * 60 + 30
+AFTERNOON_OPEN = 13 * 60
+# 每个半场的分钟数
+SESSION_MINUTES = 120
+# 收盘集合竞价（14:57-15:00）的第一根1分钟线在下午半场中的序号（14:58）
+CLOSING_AUCTION_POSITION = 14 * 60 + 58 - AFTERNOON_OPEN - 1
+
+
+def session_buckets(index: pd.DatetimeIndex, minutes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每根1分钟线所属的N分钟K线
+
+    上午、下午两个半场各自从开盘起每N分钟为一组，午休（11:30-13:00）不会产生
+    空的K线，一组也不会跨越午休（因此N最大为120）；不能整除120分钟时半场最后一组不足N分钟。
+    开盘集合竞价（09:30及之前）并入第一组，13:00并入下午第一组，
+    收盘集合竞价（14:58-15:00）总是与15:00在同一组。
+
+    Args:
+        index: 1分钟线的时间索引（K线结束时间）
+        minutes: 目标周期的分钟数
+
+    Returns:
+        (分组键数组, 每根1分钟线所属K线的结束时间数组)
+    """
+    values = index.values.astype('datetime64[m]').astype(np.int64)
+    days = values // 1440
+    minute_of_day = values - days * 1440
+
+    afternoon = minute_of_day > MORNING_CLOSE
+    session_open = np.where(afternoon, AFTERNOON_OPEN, MORNING_OPEN)
+    position = np.clip(minute_of_day - session_open - 1, 0, SESSION_MINUTES - 1)
+    position = np.where(afternoon & (position >= CLOSING_AUCTION_POSITION),
+                        SESSION_MINUTES - 1, position)
+
+    bucket = position // minutes
+    keys = (days * 2 + afternoon) * SESSION_MINUTES + bucket
+    end_position = np.minimum((bucket + 1) * minutes, SESSION_MINUTES)
+    # 收盘集合竞价并入最后一组后，原本在竞价时段内结束的一组止于14:57
+    end_position = np.where(afternoon & (end_position > CLOSING_AUCTION_POSITION) &
+                            (end_position < SESSION_MINUTES),
+                            CLOSING_AUCTION_POSITION, end_position)
+    end_minute = session_open + end_position
+    labels = ((days * 1440 + end_minute) * 60).astype('datetime64[s]').astype('datetime64[ns]')
+    return keys, labels
+
+
+def resample_minute_bars(data: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    将1分钟线聚合为N分钟线
+
+    在排序后的分组键上一次找出全部组边界（不使用按自然时间的 resample，
+    因此不会产生午休时段的空K线），开盘取首根、收盘取末根、最高/最低取极值、
+    成交量/成交额求和，其余列取末根。K线时间为该组的结束时间，与akshare一致。
+
+    Args:
+        data: 按时间升序排列的1分钟线
+        minutes: 目标周期的分钟数（1-120）
+
+    Returns:
+        N分钟线DataFrame
+
+    Raises:
+        ValueError: 周期无效时
+    """
+    if not 1 <= minutes <= SESSION_MINUTES:
+        raise ValueError(f"无效的分钟线周期: {minutes}")
+    if data.empty:
+        return data
+
+    keys, labels = session_buckets(data.index, minutes)
+    boundaries = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(data)])) - 1
+
+    bars = {}
+    for col in data.columns:
+        values = data[col].to_numpy()
+        if col == 'open':
+            bars[col] = values[starts]
+        elif col == 'high':
+            bars[col] = np.maximum.reduceat(values, starts)
+        elif col == 'low':
+            bars[col] = np.minimum.reduceat(values, starts)
+        elif col in ('volume', 'amount'):
+            # 紧凑模式的int32成交量按int64累加
+            dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else None
+            bars[col] = np.add.reduceat(values, starts, dtype=dtype)
+        else:
+            bars[col] = values[ends]
+
+    return pd.DataFrame(bars, index=pd.DatetimeIndex(labels[ends], name=data.index.name))
+
+
+class IntradayResampler:
+    """
+    增量分钟线聚合器
+
+    盘中每收到一批新的1分钟线调用一次 update，返回新走完的N分钟K线；
+    尚未走完的一组保留在内部，可用 current_bar 查看，收盘或停止时用 flush 取出。
+    同一分钟重复推送时以最新的数据为准。
+    """
+
+    def __init__(self, minutes: int):
+        """
+        初始化增量聚合器
+
+        Args:
+            minutes: 目标周期的分钟数（1-120）
+
+        Raises:
+            ValueError: 周期无效时
+        """
+        if not 1 <= minutes <= SESSION_MINUTES:
+            raise ValueError(f"无效的分钟线周期: {minutes}")
+        self.minutes = minutes
+        self.logger = logging.getLogger(__name__)
+        self._pending: Optional[pd.DataFrame] = None
+        self._last_label: Optional[pd.Timestamp] = None
+
+    def update(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        加入新的1分钟线
+
+        Args:
+            bars: 按时间升序排列的新1分钟线（可以与上次推送的最后一分钟重叠）
+
+        Returns:
+            新走完的N分钟K线，没有时为空DataFrame
+        """
+        if self._last_label is not None:
+            # 所属K线已经输出的分钟线不再参与聚合
+            _, labels = session_buckets(bars.index, self.minutes)
+            bars = bars[labels > self._last_label.to_datetime64()]
+
+        frame = bars if self._pending is None else pd.concat([self._pending, bars])
+        if frame.empty:
+            return frame
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+
+        keys, labels = session_buckets(frame.index, self.minutes)
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        last_start = int(boundaries[-1]) if len(boundaries) else 0
+        # 最后一组收到其结束时间的分钟线即已走完，否则留待下次
+        if frame.index[-1] >= labels[-1]:
+            completed, self._pending = frame, None
+        else:
+            completed, self._pending = frame.iloc[:last_start], frame.iloc[last_start:]
+
+        result = resample_minute_bars(completed, self.minutes)
+        if not result.empty:
+            self._last_label = result.index[-1]
+        return result
+
+    def current_bar(self) -> pd.DataFrame:
+        """尚未走完的N分钟K线（按已收到的分钟线计算），没有时为空DataFrame"""
+        if self._pending is None:
+            return pd.DataFrame()
+        return resample_minute_bars(self._pending, self.minutes)
+
+    def flush(self) -> pd.DataFrame:
+        """
+        输出尚未走完的K线并清空内部状态（如收盘后缺少最后几分钟的数据时）
+
+        Returns:
+            未走完的N分钟K线，没有时为空DataFrame
+        """
+        result = self.current_bar()
+        self._pending = None
+        if not result.empty:
+            self._last_label = result.index[-1]
+        return result
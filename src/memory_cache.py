@@ -0,0 +1,172 @@
+"""
+内存缓存模块
+在磁盘缓存之前提供进程内的LRU内存缓存，按DataFrame实际占用的字节数控制容量
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+import logging
+
+
+def frame_nbytes(data: pd.DataFrame) -> int:
+    """
+    计算DataFrame数据缓冲区（含索引）占用的字节数
+
+    Args:
+        data: DataFrame
+
+    Returns:
+        字节数
+    """
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+class MemoryLRUCache:
+    """
+    按字节预算淘汰的LRU内存缓存（线程安全）
+
+    每个条目可以附带一个版本标记(tag)。读取时传入当前的版本标记，
+    与缓存中的不一致则视为未命中并丢弃该条目，用于感知磁盘缓存的更新。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化内存缓存
+
+        Args:
+            max_bytes: 缓存容量上限（字节）
+        """
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Any]]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, tag: Any = None) -> Optional[Any]:
+        """
+        读取缓存条目
+
+        Args:
+            key: 缓存键
+            tag: 当前的版本标记，None表示不校验
+
+        Returns:
+            缓存的值，未命中时返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, _, entry_tag = entry
+            if tag is not None and entry_tag != tag:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int, tag: Any = None):
+        """
+        写入缓存条目，超出容量时按最近最少使用淘汰
+
+        Args:
+            key: 缓存键
+            value: 缓存的值
+            nbytes: 该值占用的字节数
+            tag: 版本标记
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if nbytes > self.max_bytes:
+                self.logger.debug(f"条目超过内存缓存容量，不缓存: {key}")
+                return
+
+            self._entries[key] = (value, nbytes, tag)
+            self._current_bytes += nbytes
+
+            while self._current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        删除缓存条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            是否删除了条目
+        """
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        """清空缓存（保留统计计数）"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中、未命中、淘汰次数及容量使用情况的字典
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable):
+        """删除条目并更新占用字节数（调用方需持有锁）"""
+        _, nbytes, _ = self._entries.pop(key)
+        self._current_bytes -= nbytes
+
+
+_shared_cache: Optional[MemoryLRUCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_memory_cache() -> MemoryLRUCache:
+    """
+    获取进程内共享的内存缓存
+
+    容量默认为256MB，可通过环境变量 STOCK_MEMORY_CACHE_MB 调整。
+
+    Returns:
+        共享的MemoryLRUCache实例
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            max_mb = float(os.environ.get('STOCK_MEMORY_CACHE_MB', 256))
+            _shared_cache = MemoryLRUCache(max_bytes=int(max_mb * 1024 * 1024))
+        return _shared_cache
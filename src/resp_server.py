@@ -0,0 +1,201 @@
+"""
+进程内Redis协议服务器
+实现共享缓存用到的Redis命令子集，用于在没有Redis的环境下测试和演示共享缓存层
+"""
+
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import logging
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接上的RESP命令"""
+
+    def setup(self):
+        super().setup()
+        with self.server.connections_lock:
+            self.server.connections.add(self.connection)
+
+    def finish(self):
+        with self.server.connections_lock:
+            self.server.connections.discard(self.connection)
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+
+            name = args[0].decode('utf-8', 'replace').upper()
+            reply = self.server.store.execute(name, args[1:])
+            self.wfile.write(reply)
+            if name == 'QUIT':
+                return
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        """读取一条命令（RESP数组或内联命令）"""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split() or None
+
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = self.rfile.readline()
+            if not header.startswith(b'$'):
+                raise ValueError(f"无效的命令格式: {header!r}")
+            args.append(self.rfile.read(int(header[1:-2]) + 2)[:-2])
+        return args
+
+
+class _RespStore:
+    """带过期时间的键值存储及命令实现（线程安全）"""
+
+    def __init__(self):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_live(self, key: bytes) -> Optional[bytes]:
+        """读取未过期的值（调用方需持有锁）"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, name: str, args: List[bytes]) -> bytes:
+        """执行命令并返回编码后的回复"""
+        try:
+            with self._lock:
+                return self._encode(self._dispatch(name, args))
+        except Exception as e:
+            return f"-ERR {e}\r\n".encode('utf-8')
+
+    def _dispatch(self, name: str, args: List[bytes]) -> Any:
+        if name == 'PING':
+            return ('+', 'PONG') if not args else args[0]
+        if name in ('QUIT', 'SELECT', 'AUTH', 'CLIENT', 'RESET'):
+            return ('+', 'OK')
+        if name == 'GET':
+            return self._get_live(args[0])
+        if name == 'SET':
+            return self._set(args)
+        if name == 'SETEX':
+            return self._set([args[0], args[2], b'EX', args[1]])
+        if name == 'DEL':
+            return sum(self._get_live(key) is not None and self._data.pop(key) is not None
+                       for key in args)
+        if name == 'EXISTS':
+            return sum(self._get_live(key) is not None for key in args)
+        if name == 'TTL':
+            if self._get_live(args[0]) is None:
+                return -2
+            expires_at = self._data[args[0]][1]
+            return -1 if expires_at is None else max(0, int(expires_at - time.monotonic()))
+        if name == 'DBSIZE':
+            return sum(self._get_live(key) is not None for key in list(self._data))
+        if name in ('FLUSHDB', 'FLUSHALL'):
+            self._data.clear()
+            return ('+', 'OK')
+        raise ValueError(f"不支持的命令 '{name}'")
+
+    def _set(self, args: List[bytes]) -> Any:
+        key, value = args[0], args[1]
+        expires_at = None
+        options = [arg.upper() for arg in args[2:]]
+        if b'EX' in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b'EX') + 1])
+        elif b'PX' in options:
+            expires_at = time.monotonic() + int(args[2 + options.index(b'PX') + 1]) / 1000
+        self._data[key] = (value, expires_at)
+        return ('+', 'OK')
+
+    @staticmethod
+    def _encode(reply: Any) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, tuple):
+            return f"{reply[0]}{reply[1]}\r\n".encode('utf-8')
+        if isinstance(reply, (bool, int)):
+            return f":{int(reply)}\r\n".encode('utf-8')
+        return f"${len(reply)}\r\n".encode('utf-8') + reply + b"\r\n"
+
+
+class InProcessRespServer:
+    """
+    进程内的Redis协议服务器
+
+    支持 PING、GET、SET（EX/PX）、SETEX、DEL、EXISTS、TTL、DBSIZE、FLUSHDB 等命令，
+    数据只保存在内存中。用法：
+
+        server = InProcessRespServer().start()
+        fetcher = DataFetcher(shared_cache=SharedCache(server.url))
+        ...
+        server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        初始化服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        self.logger = logging.getLogger(__name__)
+        self._server = socketserver.ThreadingTCPServer((host, port), _RespHandler)
+        self._server.daemon_threads = True
+        self._server.store = _RespStore()
+        # 已建立的客户端连接，停止服务器时一并关闭（模拟服务器宕机）
+        self._server.connections = set()
+        self._server.connections_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务器地址（redis://host:port/0）"""
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "InProcessRespServer":
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="resp-server", daemon=True)
+        self._thread.start()
+        self.logger.info(f"进程内Redis协议服务器已启动: {self.url}")
+        return self
+
+    def stop(self):
+        """停止服务器，并断开已建立的客户端连接"""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._server.connections_lock:
+            connections = list(self._server.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "InProcessRespServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
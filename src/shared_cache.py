@@ -0,0 +1,259 @@
+"""
+共享缓存模块
+将列式缓存条目序列化后存入Redis协议的服务器，供多个应用副本共享，避免重复下载
+"""
+
+import io
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import logging
+
+from src.cache_store import ColumnarCacheStore
+
+
+def serialize_frame(data: pd.DataFrame, fields: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    将DataFrame序列化为列式二进制块（npz格式，每列一个数组，不使用pickle）
+
+    Args:
+        data: 以日期为索引的DataFrame
+        fields: 随数据一起保存的元信息（如覆盖区间、因子检查日期）
+
+    Returns:
+        二进制数据
+    """
+    columns = [str(col) for col in data.columns]
+    meta = {'index_name': data.index.name, 'columns': columns, 'fields': fields or {}}
+    arrays = {f"c{i}": ColumnarCacheStore._to_storable(data[col]) for i, col in enumerate(data.columns)}
+    arrays['index'] = np.asarray(data.index.values)
+    arrays['meta'] = np.array(json.dumps(meta, ensure_ascii=False))
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def deserialize_frame(blob: bytes) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    反序列化 serialize_frame 生成的二进制块
+
+    Args:
+        blob: 二进制数据
+
+    Returns:
+        (DataFrame, 元信息字典)
+    """
+    with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays['meta']))
+        index = pd.Index(arrays['index'], name=meta['index_name'])
+        data = {col: arrays[f"c{i}"] for i, col in enumerate(meta['columns'])}
+    return pd.DataFrame(data, index=index, columns=meta['columns']), meta['fields']
+
+
+class RespClient:
+    """
+    最小的Redis协议（RESP2）客户端，只实现共享缓存用到的命令
+
+    接口与redis-py的同名方法一致；未安装redis-py时使用。每个线程持有一个连接。
+    """
+
+    def __init__(self,
+                 host: str = "localhost",
+                 port: int = 6379,
+                 db: int = 0,
+                 password: Optional[str] = None,
+                 socket_timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str, socket_timeout: float = 2.0) -> "RespClient":
+        """从 redis://[:password@]host:port/db 形式的地址创建客户端"""
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"不支持的共享缓存地址: {url}")
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db,
+                   parsed.password, socket_timeout)
+
+    def _connection(self):
+        """获取当前线程的连接，没有时新建"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            if self.password:
+                self._command('AUTH', self.password)
+            if self.db:
+                self._command('SELECT', self.db)
+        return conn
+
+    def _close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def _command(self, *args) -> Any:
+        """发送命令并读取回复；网络错误时关闭连接并抛出ConnectionError"""
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+
+        try:
+            sock, reader = self._connection()
+            sock.sendall(b"".join(parts))
+            return self._read_reply(reader)
+        except (OSError, EOFError) as e:
+            self._close()
+            raise ConnectionError(f"共享缓存连接失败: {e}") from e
+
+    def _read_reply(self, reader) -> Any:
+        """解析一条RESP回复"""
+        line = reader.readline()
+        if not line:
+            raise EOFError("连接已关闭")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode('utf-8')
+        if prefix == b'-':
+            raise RuntimeError(payload.decode('utf-8'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if prefix == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise EOFError(f"无法解析的回复: {line!r}")
+
+    def ping(self) -> bool:
+        return self._command('PING') == 'PONG'
+
+    def get(self, name: str) -> Optional[bytes]:
+        return self._command('GET', name)
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> bool:
+        if ex:
+            return self._command('SET', name, value, 'EX', int(ex)) == 'OK'
+        return self._command('SET', name, value) == 'OK'
+
+    def delete(self, *names: str) -> int:
+        return self._command('DEL', *names)
+
+
+class SharedCache:
+    """
+    基于Redis协议服务器的共享缓存层
+
+    每个缓存条目序列化为一个二进制块，键为 "{prefix}:{缓存键}"（缓存键已包含数据源名称），
+    并设置过期时间。服务器不可用时记录警告，并在 retry_interval 秒内不再尝试连接，
+    调用方退回本地磁盘缓存和上游数据源。
+    """
+
+    def __init__(self,
+                 url: Optional[str] = None,
+                 ttl: Optional[int] = None,
+                 prefix: str = "stip",
+                 client: Any = None,
+                 retry_interval: float = 30.0):
+        """
+        初始化共享缓存
+
+        Args:
+            url: 服务器地址（redis://host:port/db），默认读取环境变量 STOCK_REDIS_URL
+            ttl: 条目过期时间（秒），默认读取环境变量 STOCK_SHARED_CACHE_TTL，未设置时为7天
+            prefix: 键前缀
+            client: 已创建的客户端（需提供 get/set/delete 方法），传入时忽略url
+            retry_interval: 服务器不可用后再次尝试的间隔（秒）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.url = url or os.environ.get('STOCK_REDIS_URL', 'redis://localhost:6379/0')
+        self.ttl = int(ttl or os.environ.get('STOCK_SHARED_CACHE_TTL', 7 * 24 * 3600))
+        self.prefix = prefix
+        self.retry_interval = retry_interval
+        self.client = client if client is not None else self._create_client(self.url)
+        self._unavailable_until = 0.0
+
+    @staticmethod
+    def _create_client(url: str) -> Any:
+        """优先使用redis-py（可选依赖），未安装时使用内置的最小客户端"""
+        try:
+            import redis
+        except ImportError:
+            return RespClient.from_url(url)
+        return redis.Redis.from_url(url, socket_timeout=2.0, socket_connect_timeout=2.0)
+
+    @property
+    def available(self) -> bool:
+        """服务器当前是否可用（最近一次失败后的重试间隔内视为不可用）"""
+        return time.monotonic() >= self._unavailable_until
+
+    def _key(self, cache_key: str) -> str:
+        return f"{self.prefix}:{cache_key}"
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        """调用客户端方法，失败时标记服务器不可用并返回None"""
+        if not self.available:
+            return None
+        try:
+            return getattr(self.client, method)(*args, **kwargs)
+        except Exception as e:
+            self._unavailable_until = time.monotonic() + self.retry_interval
+            self.logger.warning(f"共享缓存不可用，{self.retry_interval:.0f}秒内使用本地缓存: {e}")
+            return None
+
+    def get(self, cache_key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        读取共享缓存条目
+
+        Args:
+            cache_key: 缓存键
+
+        Returns:
+            (DataFrame, 元信息字典)，不存在或服务器不可用时返回None
+        """
+        blob = self._call('get', self._key(cache_key))
+        if blob is None:
+            return None
+        try:
+            return deserialize_frame(blob)
+        except Exception as e:
+            self.logger.warning(f"共享缓存条目损坏，已忽略: {cache_key}, 错误: {e}")
+            return None
+
+    def put(self, cache_key: str, data: pd.DataFrame, fields: Optional[Dict[str, Any]] = None):
+        """
+        写入共享缓存条目
+
+        Args:
+            cache_key: 缓存键
+            data: 以日期为索引的DataFrame
+            fields: 随数据一起保存的元信息
+        """
+        self._call('set', self._key(cache_key), serialize_frame(data, fields), ex=self.ttl)
+
+    def delete(self, cache_keys: List[str]):
+        """删除共享缓存条目"""
+        if cache_keys:
+            self._call('delete', *[self._key(key) for key in cache_keys])
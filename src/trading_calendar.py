@@ -0,0 +1,227 @@
+"""
+交易日历模块
+沪深交易所交易日历，支持日期与交易日序号之间的O(1)互查、向前/向后偏移N个交易日，
+以及根据个股K线找出停牌的交易日
+"""
+
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+import logging
+
+
+DateLike = Union[str, pd.Timestamp, np.datetime64, Any]
+
+
+class TradingCalendar:
+    """
+    交易日历
+
+    交易日保存为按时间排序的日序号数组（自1970-01-01起的天数），并预先建立
+    "自然日 -> 交易日序号"的查找表，任意日期（或日期数组）到交易日序号的换算都是
+    一次数组下标访问。"N个交易日之后"因此只是序号加N。
+
+    沪深两市交易日相同；节假日由数据源提供的交易日历体现，个股停牌可用
+    missing_sessions 由其K线日期找出。
+    """
+
+    def __init__(self, sessions: Iterable[DateLike], name: str = "SSE/SZSE"):
+        """
+        初始化交易日历
+
+        Args:
+            sessions: 全部交易日
+            name: 日历名称
+
+        Raises:
+            ValueError: 交易日为空时
+        """
+        days = np.unique(self._to_days(pd.DatetimeIndex(pd.to_datetime(list(sessions)))))
+        if not len(days):
+            raise ValueError("交易日历不能为空")
+
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._days = days
+        self._origin = int(days[0])
+
+        # 查找表：每个自然日之前（不含当天）的交易日个数，即当天或之后第一个交易日的序号
+        flags = np.zeros(int(days[-1]) - self._origin + 1, dtype=bool)
+        flags[days - self._origin] = True
+        self._flags = flags
+        self._sessions_before = np.cumsum(flags) - flags
+
+    @classmethod
+    def from_weekdays(cls,
+                      start: DateLike = "19900101",
+                      end: Optional[DateLike] = None,
+                      holidays: Iterable[DateLike] = ()) -> "TradingCalendar":
+        """
+        以周一至周五（除去给定的节假日）为交易日的近似日历，数据源不提供交易日历时使用
+
+        Args:
+            start: 开始日期
+            end: 结束日期，默认为明年年底
+            holidays: 需要排除的节假日
+
+        Returns:
+            交易日历
+        """
+        if end is None:
+            end = pd.Timestamp(year=pd.Timestamp.now().year + 1, month=12, day=31)
+        sessions = pd.bdate_range(pd.Timestamp(start), pd.Timestamp(end))
+        holidays = pd.DatetimeIndex(pd.to_datetime(list(holidays))).normalize()
+        return cls(sessions.difference(holidays), name="weekdays")
+
+    @staticmethod
+    def _to_days(dates: Any) -> np.ndarray:
+        """将日期（标量或数组）转换为日序号数组"""
+        values = np.asarray(pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).values)
+        return values.astype('datetime64[D]').astype(np.int64)
+
+    @staticmethod
+    def _from_days(days: np.ndarray) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(days.astype('datetime64[D]').astype('datetime64[ns]'))
+
+    @property
+    def sessions(self) -> pd.DatetimeIndex:
+        """全部交易日"""
+        return self._from_days(self._days)
+
+    @property
+    def first_session(self) -> pd.Timestamp:
+        return self._from_days(self._days[:1])[0]
+
+    @property
+    def last_session(self) -> pd.Timestamp:
+        return self._from_days(self._days[-1:])[0]
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def positions(self, dates: Any, direction: str = "forward") -> np.ndarray:
+        """
+        日期对应的交易日序号（向量化，O(1)查表）
+
+        Args:
+            dates: 日期或日期数组
+            direction: 日期不是交易日时的取法，'forward' 取之后第一个交易日，
+                'backward' 取之前最后一个交易日
+
+        Returns:
+            交易日序号数组；forward超出日历末尾时为 len(self)，backward早于日历开头时为 -1
+        """
+        offsets = self._to_days(dates) - self._origin
+        clipped = np.clip(offsets, 0, len(self._flags) - 1)
+        before = np.where(offsets < 0, 0,
+                          np.where(offsets >= len(self._flags), len(self._days),
+                                   self._sessions_before[clipped]))
+
+        if direction == "forward":
+            return before
+        if direction == "backward":
+            on_session = (offsets >= 0) & (offsets < len(self._flags)) & self._flags[clipped]
+            return np.where(on_session, before, before - 1)
+        raise ValueError(f"不支持的取法: {direction}")
+
+    def dates_at(self, positions: Any) -> pd.DatetimeIndex:
+        """
+        交易日序号对应的日期
+
+        Args:
+            positions: 交易日序号或序号数组，超出日历范围时为NaT
+
+        Returns:
+            日期索引
+        """
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+        valid = (positions >= 0) & (positions < len(self._days))
+        values = self._from_days(self._days[np.where(valid, positions, 0)]).values.copy()
+        values[~valid] = np.datetime64('NaT')
+        return pd.DatetimeIndex(values)
+
+    def is_session(self, dates: Any) -> Union[bool, np.ndarray]:
+        """
+        判断日期是否为交易日
+
+        Args:
+            dates: 日期或日期数组
+
+        Returns:
+            标量输入返回bool，数组输入返回bool数组
+        """
+        offsets = self._to_days(dates) - self._origin
+        in_range = (offsets >= 0) & (offsets < len(self._flags))
+        result = in_range & self._flags[np.clip(offsets, 0, len(self._flags) - 1)]
+        return bool(result[0]) if np.ndim(dates) == 0 else result
+
+    def offset(self, dates: Any, sessions: int) -> pd.DatetimeIndex:
+        """
+        向后（sessions为负时向前）偏移若干个交易日
+
+        日期不是交易日时先取之后第一个交易日（向前偏移时取之前最后一个交易日）再偏移。
+
+        Args:
+            dates: 日期或日期数组
+            sessions: 偏移的交易日个数
+
+        Returns:
+            偏移后的日期，超出日历范围时为NaT
+        """
+        direction = "forward" if sessions >= 0 else "backward"
+        return self.dates_at(self.positions(dates, direction) + sessions)
+
+    def next_session(self, date: DateLike) -> pd.Timestamp:
+        """日期之后（不含当天）的第一个交易日"""
+        return self.dates_at(self.positions(date, "backward") + 1)[0]
+
+    def previous_session(self, date: DateLike) -> pd.Timestamp:
+        """日期之前（不含当天）的最后一个交易日"""
+        return self.dates_at(self.positions(date, "forward") - 1)[0]
+
+    def rollback(self, date: DateLike) -> pd.Timestamp:
+        """日期当天或之前的最后一个交易日"""
+        return self.dates_at(self.positions(date, "backward"))[0]
+
+    def sessions_in_range(self, start: DateLike, end: DateLike) -> pd.DatetimeIndex:
+        """
+        区间内（含首尾）的全部交易日
+
+        Args:
+            start: 开始日期
+            end: 结束日期
+
+        Returns:
+            交易日索引
+        """
+        first = int(self.positions(start, "forward")[0])
+        last = int(self.positions(end, "backward")[0])
+        return self._from_days(self._days[first:last + 1])
+
+    def count_sessions(self, start: DateLike, end: DateLike) -> int:
+        """区间内（含首尾）的交易日个数"""
+        first = int(self.positions(start, "forward")[0])
+        last = int(self.positions(end, "backward")[0])
+        return max(0, last - first + 1)
+
+    def missing_sessions(self, index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """
+        个股K线首尾之间缺失的交易日（即停牌日）
+
+        Args:
+            index: 个股K线的日期索引
+
+        Returns:
+            缺失的交易日
+        """
+        if len(index) == 0:
+            return pd.DatetimeIndex([])
+        sessions = self.sessions_in_range(index.min(), index.max())
+        return sessions.difference(pd.DatetimeIndex(index).normalize())
+
+    def describe(self) -> Dict[str, Any]:
+        """获取日历的描述信息"""
+        return {'name': self.name, 'sessions': len(self),
+                'first_session': self.first_session.strftime("%Y%m%d"),
+                'last_session': self.last_session.strftime("%Y%m%d")}
@@ -0,0 +1,313 @@
+"""
+缓存预热模块
+收盘后刷新自选股/股票池的行情缓存并预先计算常用技术指标，
+使次日的首次请求直接命中缓存，而不是等待akshare冷下载
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import logging
+
+from src.data_fetcher import DataFetcher
+from src.indicators import IndicatorCalculator
+
+
+# 默认预计算的指标组合（与Web界面各指标的默认参数一致）
+DEFAULT_INDICATOR_PACK = [
+    {'code': 'SMA', 'params': {'timeperiod': 5}},
+    {'code': 'SMA', 'params': {'timeperiod': 10}},
+    {'code': 'SMA', 'params': {'timeperiod': 20}},
+    {'code': 'SMA', 'params': {'timeperiod': 60}},
+    {'code': 'EMA', 'params': {'timeperiod': 20}},
+    {'code': 'MACD', 'params': {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9}},
+    {'code': 'RSI', 'params': {'timeperiod': 14}},
+    {'code': 'BOLL', 'params': {'timeperiod': 20, 'nbdevup': 2, 'nbdevdn': 2}},
+    {'code': 'KDJ', 'params': {'fastk_period': 9, 'slowk_period': 3, 'slowd_period': 3}},
+    {'code': 'VOLUME_SMA', 'params': {'timeperiod': 5}},
+]
+
+
+def load_watchlist(path: str) -> List[str]:
+    """
+    读取自选股文件（每行一个股票代码，支持逗号分隔，#之后为注释）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        去重后的股票代码列表
+    """
+    symbols = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            symbols.extend(code.strip() for code in line.replace(',', ' ').split() if code.strip())
+    return list(dict.fromkeys(symbols))
+
+
+@dataclass
+class WarmupReport:
+    """一次预热的结果"""
+    started_at: str
+    dry_run: bool
+    symbols: int
+    windows: List[str]
+    finished_at: Optional[str] = None
+    elapsed: float = 0.0
+    snapshot: Optional[Dict[str, Any]] = None
+    downloaded: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    indicators: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class CacheWarmer:
+    """
+    缓存预热器
+
+    每个交易日收盘后（默认15:30）依次执行：
+    1. 用一次全市场行情快照为已缓存的股票追加当日K线（数据源支持时）；
+    2. 在有界线程池中补齐股票池的日线缓存缺口和复权因子；
+    3. 按Web界面的默认日期区间（最近 lookback_days 天）预先计算指标组合，
+       结果写入指标缓存，覆盖从今天到下一个交易日的每个请求区间。
+
+    dry_run 模式只统计需要下载的股票，不下载行情、不写行情和指标缓存。
+    """
+
+    def __init__(self,
+                 fetcher: DataFetcher,
+                 symbols: Optional[List[str]] = None,
+                 indicator_pack: Optional[List[Dict[str, Any]]] = None,
+                 lookback_days: int = 365,
+                 adjust: str = "qfq",
+                 max_workers: int = 4,
+                 run_at: str = "15:30",
+                 pin: bool = True,
+                 dry_run: bool = False,
+                 status_path: Optional[str] = None):
+        """
+        初始化缓存预热器
+
+        Args:
+            fetcher: 数据获取器
+            symbols: 需要预热的股票代码，None表示当前数据源全部已缓存的股票
+            indicator_pack: 预计算的指标配置列表，默认为 DEFAULT_INDICATOR_PACK
+            lookback_days: 预热的日期区间长度（自然日），应与Web界面的默认区间一致
+            adjust: 复权方式
+            max_workers: 同时下载的股票数上限（请求速率另受DataFetcher的rate_limit约束）
+            run_at: 每个交易日的预热时间（HH:MM，本地时间），应晚于收盘时间
+            pin: 是否固定预热的股票，使其缓存不因超出磁盘配额而被淘汰
+            dry_run: 只生成预热计划，不下载、不写缓存
+            status_path: 预热报告的保存路径，默认为缓存目录下的 warmup_status.json
+        """
+        if max_workers < 1:
+            raise ValueError(f"并发数必须大于0: {max_workers}")
+        hour, _, minute = run_at.partition(':')
+        if not (hour.isdigit() and minute.isdigit() and int(hour) < 24 and int(minute) < 60):
+            raise ValueError(f"无效的预热时间: {run_at}")
+
+        self.fetcher = fetcher
+        self.symbols = list(dict.fromkeys(symbols)) if symbols is not None else None
+        self.indicator_pack = indicator_pack if indicator_pack is not None else DEFAULT_INDICATOR_PACK
+        self.lookback_days = lookback_days
+        self.adjust = adjust
+        self.max_workers = max_workers
+        self.run_at = (int(hour), int(minute))
+        self.pin = pin
+        self.dry_run = dry_run
+        self.status_path = status_path or os.path.join(fetcher.cache_dir, "warmup_status.json")
+        self.calculator = IndicatorCalculator(cache_dir=fetcher.indicator_cache_dir)
+        self.logger = logging.getLogger(__name__)
+
+        self.last_report: Optional[WarmupReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+    def resolve_symbols(self) -> List[str]:
+        """本次预热的股票代码"""
+        return self.symbols if self.symbols is not None else self.fetcher.cached_symbols()
+
+    def request_windows(self, today: Optional[pd.Timestamp] = None) -> List[str]:
+        """
+        预热覆盖的请求开始日期
+
+        Web界面默认请求"今天往前 lookback_days 天"的数据，开始日期每天变化，
+        因此为从今天到下一个交易日的每一天各准备一个区间（节前收盘后即覆盖到节后首日）。
+
+        Args:
+            today: 当前日期，默认为今天
+
+        Returns:
+            开始日期列表（格式: '20200101'），按时间排序
+        """
+        today = (today or pd.Timestamp(datetime.now())).normalize()
+        next_session = self.fetcher.get_trading_calendar().next_session(today)
+        return [(day - pd.Timedelta(days=self.lookback_days)).strftime("%Y%m%d")
+                for day in pd.date_range(today, next_session, freq='D')]
+
+    def run_once(self) -> WarmupReport:
+        """
+        立即执行一次预热
+
+        Returns:
+            预热报告，同时保存到 status_path
+        """
+        with self._run_lock:
+            started = time.perf_counter()
+            symbols = self.resolve_symbols()
+            windows = self.request_windows()
+            report = WarmupReport(started_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                  dry_run=self.dry_run, symbols=len(symbols), windows=windows)
+            self.logger.info(f"开始预热: {len(symbols)} 只股票, 区间开始日期 {windows}"
+                             f"{'（演练模式）' if self.dry_run else ''}")
+
+            if symbols and self.dry_run:
+                self._plan(symbols, windows, report)
+            elif symbols:
+                self._warm(symbols, windows, report)
+
+            report.elapsed = round(time.perf_counter() - started, 3)
+            report.finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.last_report = report
+            self._save_report(report)
+            self.logger.info(f"预热完成: 下载 {len(report.downloaded)}, 已缓存 {len(report.cached)}, "
+                             f"失败 {len(report.failed)}, 指标 {report.indicators}, "
+                             f"耗时 {report.elapsed:.1f}秒")
+            return report
+
+    def _plan(self, symbols: List[str], windows: List[str], report: WarmupReport):
+        """演练模式：只根据缓存清单判断哪些股票需要下载"""
+        for symbol in symbols:
+            if self.fetcher.find_cache_gaps(symbol, windows[0]):
+                report.downloaded.append(symbol)
+            else:
+                report.cached.append(symbol)
+        report.indicators = len(symbols) * len(windows) * len(self.indicator_pack)
+
+    def _warm(self, symbols: List[str], windows: List[str], report: WarmupReport):
+        """刷新行情缓存并预计算指标"""
+        if self.pin:
+            self.fetcher.pin_symbols(symbols)
+
+        try:
+            report.snapshot = self.fetcher.refresh_from_snapshot(symbols)
+        except Exception as e:
+            self.logger.warning(f"行情快照刷新失败，改为逐只补齐: {e}")
+
+        stale = {symbol for symbol in symbols if self.fetcher.find_cache_gaps(symbol, windows[0])}
+        errors: Dict[str, Exception] = {}
+        for symbol, _ in self.fetcher.iter_many(symbols, windows[0], adjust=self.adjust,
+                                                max_workers=self.max_workers, errors=errors):
+            (report.downloaded if symbol in stale else report.cached).append(symbol)
+            try:
+                report.indicators += self._precompute_indicators(symbol, windows)
+            except Exception as e:
+                self.logger.warning(f"预计算指标失败: {symbol}, 错误: {e}")
+                errors[symbol] = e
+
+        report.failed = {symbol: str(error) for symbol, error in errors.items()}
+        self.calculator.prune_cache()
+
+    def _precompute_indicators(self, symbol: str, windows: List[str]) -> int:
+        """按每个请求区间计算指标组合（行情已在缓存中），返回计算的指标数"""
+        count = 0
+        for start_date in windows:
+            data = self.fetcher.get_stock_data(symbol, start_date, adjust=self.adjust)
+            for config in self.indicator_pack:
+                self.calculator.calculate_indicator(data, config['code'], config['params'])
+                count += 1
+        return count
+
+    def _save_report(self, report: WarmupReport):
+        """保存预热报告，供其他进程（如Web界面）查看"""
+        try:
+            tmp_path = f"{self.status_path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.status_path)
+        except OSError as e:
+            self.logger.warning(f"保存预热报告失败: {e}")
+
+    def next_run_time(self, now: Optional[datetime] = None) -> datetime:
+        """
+        计算下一次预热时间（交易日的 run_at）
+
+        按交易日历跳过周末和节假日休市；当前时间超出交易日历范围时退回为跳过周末。
+
+        Args:
+            now: 当前时间，默认为现在
+
+        Returns:
+            下一次预热的时间
+        """
+        now = now or datetime.now()
+        run_at = timedelta(hours=self.run_at[0], minutes=self.run_at[1])
+        today = pd.Timestamp(now).normalize()
+        calendar = self.fetcher.get_trading_calendar()
+
+        if calendar.is_session(today) and now < today + run_at:
+            session = today
+        else:
+            session = calendar.next_session(today)
+        if not pd.isna(session):
+            return (session + run_at).to_pydatetime()
+
+        candidate = (today + run_at).to_pydatetime()
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        while candidate.weekday() >= 5:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def run_forever(self):
+        """按计划循环预热，直到调用 stop()"""
+        while not self._stop.is_set():
+            next_run = self.next_run_time()
+            self.logger.info(f"下一次预热时间: {next_run:%Y-%m-%d %H:%M}")
+            if self._stop.wait(max(0.0, (next_run - datetime.now()).total_seconds())):
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"预热失败: {e}")
+
+    def start(self) -> "CacheWarmer":
+        """在后台守护线程中按计划预热"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="cache-warmer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止后台预热（正在进行的预热会执行完毕）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        获取预热器状态
+
+        Returns:
+            包含是否运行中、下一次预热时间和最近一次预热报告的字典
+        """
+        running = self._thread is not None and self._thread.is_alive()
+        return {
+            'running': running,
+            'dry_run': self.dry_run,
+            'next_run': self.next_run_time().strftime("%Y-%m-%d %H:%M") if running else None,
+            'last_report': self.last_report.to_dict() if self.last_report else None,
+        }
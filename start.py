@@ -71,6 +71,52 @@ def run_basic_example():
         print(f"❌ 运行示例失败：{e}")
 
 
+def run_warmup(args):
+    """收盘后预热行情缓存和常用指标"""
+    from src.data_fetcher import DataFetcher
+    from src.warmup import CacheWarmer, load_watchlist
+
+    symbols = list(args.symbols or [])
+    if args.watchlist:
+        symbols.extend(load_watchlist(args.watchlist))
+
+    fetcher = DataFetcher(cache_dir=args.cache_dir, rate_limit=args.rate_limit)
+    warmer = CacheWarmer(fetcher,
+                         symbols=symbols or None,
+                         lookback_days=args.lookback_days,
+                         adjust=args.adjust,
+                         max_workers=args.workers,
+                         run_at=args.at,
+                         dry_run=args.dry_run)
+
+    if args.once or args.dry_run:
+        report = warmer.run_once()
+        print(f"🔥 预热{'计划' if report.dry_run else '完成'}：{report.symbols} 只股票，"
+              f"区间开始日期 {', '.join(report.windows)}")
+        print(f"   需要下载：{len(report.downloaded)}  已缓存：{len(report.cached)}  "
+              f"失败：{len(report.failed)}  指标：{report.indicators}")
+        for symbol, error in report.failed.items():
+            print(f"   ❌ {symbol}: {error}")
+        print(f"   报告已保存到 {warmer.status_path}")
+        return
+
+    print(f"🔥 缓存预热已启动，每个交易日 {args.at} 执行，按 Ctrl+C 停止")
+    try:
+        warmer.run_forever()
+    except KeyboardInterrupt:
+        warmer.stop()
+        print("\n👋 预热已停止")
+
+
+def run_migrate(args):
+    """将旧版pickle缓存转换为列式缓存"""
+    from src.data_fetcher import DataFetcher
+
+    fetcher = DataFetcher(cache_dir=args.cache_dir)
+    migrated = fetcher.migrate_pickle_cache(adjust=args.adjust, remove=not args.keep_pickle)
+    print(f"🗄️ 已迁移 {migrated} 个pickle缓存文件")
+
+
 def install_dependencies():
     """安装依赖"""
     print("📦 安装项目依赖...")
@@ -98,16 +144,34 @@ def show_info():
     print("   2. 运行基础示例")
     print("   3. 安装依赖")
     print("   4. 显示帮助")
+    print("   5. 收盘后预热缓存 (warmup)")
+    print("   6. 迁移旧版pickle缓存 (migrate)")
     print()
 
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="股票技术指标回测分析平台启动器")
-    parser.add_argument("--mode", choices=["streamlit", "example", "install", "info"],
+    parser.add_argument("--mode", choices=["streamlit", "example", "install", "info", "warmup", "migrate"],
                       default="streamlit", help="启动模式")
     parser.add_argument("--check", action="store_true", help="检查环境和依赖")
 
+    warmup = parser.add_argument_group("缓存预热（--mode warmup）")
+    warmup.add_argument("--symbols", nargs="*", help="预热的股票代码")
+    warmup.add_argument("--watchlist", help="自选股文件（每行一个股票代码），未指定股票时预热全部已缓存的股票")
+    warmup.add_argument("--at", default="15:30", help="每个交易日的预热时间（HH:MM）")
+    warmup.add_argument("--workers", type=int, default=4, help="同时下载的股票数上限")
+    warmup.add_argument("--rate-limit", type=float, default=None, help="每秒最多发起的数据请求数")
+    warmup.add_argument("--lookback-days", type=int, default=365, help="预热的日期区间长度（天）")
+    warmup.add_argument("--adjust", default="qfq", choices=["qfq", "hfq", ""], help="复权方式")
+    warmup.add_argument("--cache-dir", default="cache", help="缓存目录")
+    warmup.add_argument("--once", action="store_true", help="立即预热一次后退出")
+    warmup.add_argument("--dry-run", action="store_true", help="只显示预热计划，不下载数据")
+
+    migrate = parser.add_argument_group("旧版缓存迁移（--mode migrate）",
+                                        "同时使用 --cache-dir，--adjust 为旧版缓存数据的复权方式（旧版默认前复权）")
+    migrate.add_argument("--keep-pickle", action="store_true", help="迁移后保留原pickle文件")
+
     args = parser.parse_args()
 
     if args.check:
@@ -137,6 +201,16 @@ def main():
     elif args.mode == "info":
         show_info()
 
+    elif args.mode == "warmup":
+        if not check_python_version():
+            return
+        run_warmup(args)
+
+    elif args.mode == "migrate":
+        if not check_python_version():
+            return
+        run_migrate(args)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+测试公共夹具
+提供注入延迟的本地替身数据源（避免测试访问网络）和固定当前时间的工具
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data_fetcher
+from src.data_sources import DataSource
+
+
+class LatencyDataSource(DataSource):
+    """
+    注入延迟的模拟数据源
+
+    每次下载等待固定的延迟后返回按股票代码生成的确定性日线，并记录调用次数和
+    同时进行的下载数峰值；failures 中的股票代码下载时抛出对应的异常。
+    """
+
+    name = "latency"
+    remote = False
+
+    def __init__(self, latency: float = 0.05, failures: Optional[Dict[str, Exception]] = None):
+        self.latency = latency
+        self.failures = failures or {}
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def fetch_daily(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            if symbol in self.failures:
+                raise self.failures[symbol]
+            index = pd.bdate_range(start_date, end_date, name='date')
+            rng = np.random.default_rng(int(symbol))
+            close = np.round(10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index)))), 2)
+            return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                                 'close': close, 'volume': rng.integers(1_000, 100_000, len(index))},
+                                index=index)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        return pd.DataFrame({'hfq_factor': [1.0]},
+                            index=pd.DatetimeIndex(['1900-01-01'], name='date'))
+
+
+@pytest.fixture
+def latency_source():
+    """延迟50毫秒的模拟数据源"""
+    return LatencyDataSource(latency=0.05)
+
+
+def freeze_now(monkeypatch, now: str):
+    """把 data_fetcher 模块看到的当前时间固定为 now（影响已收盘交易日的判断）"""
+    fixed = pd.Timestamp(now).to_pydatetime()
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return fixed
+
+    monkeypatch.setattr(src.data_fetcher, 'datetime', FrozenDatetime)
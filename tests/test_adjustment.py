@@ -0,0 +1,87 @@
+"""
+复权计算测试
+缓存只保存不复权日线和后复权因子，读取时按因子换算：后复权价格 = 不复权价格 × f(t)，
+前复权价格 = 不复权价格 × f(t) / f(最新)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource, freeze_now
+
+
+DATES = pd.DatetimeIndex(['2024-03-04', '2024-03-05', '2024-03-06', '2024-03-07'], name='date')
+CLOSE = np.array([10.0, 11.0, 12.0, 13.0])
+
+
+class FactorSource(LatencyDataSource):
+    """返回固定不复权日线和可修改的后复权因子表的模拟数据源"""
+
+    def __init__(self, factors: dict):
+        super().__init__(latency=0)
+        self.factors = factors
+        self.factor_calls = 0
+
+    def fetch_daily(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+        mask = (DATES >= pd.Timestamp(start_date)) & (DATES <= pd.Timestamp(end_date))
+        return pd.DataFrame({'open': CLOSE[mask], 'high': CLOSE[mask], 'low': CLOSE[mask],
+                             'close': CLOSE[mask], 'volume': np.full(mask.sum(), 1000)},
+                            index=DATES[mask])
+
+    def fetch_adjust_factors(self, symbol: str) -> pd.DataFrame:
+        self.factor_calls += 1
+        return pd.DataFrame({'hfq_factor': list(self.factors.values())},
+                            index=pd.DatetimeIndex(list(self.factors), name='date'))
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    """3月6日除权（后复权因子由1变为2）的股票"""
+    freeze_now(monkeypatch, '2024-03-08 16:00')
+    source = FactorSource({'1990-01-01': 1.0, '2024-03-06': 2.0})
+    fetcher = DataFetcher(cache_dir=str(tmp_path / "cache"), source=source,
+                          memory_cache=MemoryLRUCache())
+    return fetcher, source
+
+
+def close(fetcher: DataFetcher, adjust: str) -> list:
+    return fetcher.get_stock_data('000001', '20240304', '20240307', adjust=adjust)['close'].tolist()
+
+
+class TestAdjustment:
+    def test_prices_match_hand_computed_values(self, setup):
+        """不复权、后复权、前复权价格与手算结果一致，只下载一次日线"""
+        fetcher, source = setup
+
+        assert close(fetcher, '') == [10.0, 11.0, 12.0, 13.0]
+        assert close(fetcher, 'hfq') == [10.0, 11.0, 24.0, 26.0]
+        assert close(fetcher, 'qfq') == [5.0, 5.5, 12.0, 13.0]
+        assert source.calls == 1
+
+    def test_changed_latest_factor_rescales_without_refetching_bars(self, setup, monkeypatch):
+        """新的除权（最新因子变化）后前复权历史整体重新缩放，日线不重新下载"""
+        fetcher, source = setup
+        assert close(fetcher, 'qfq') == [5.0, 5.5, 12.0, 13.0]
+
+        # 次日收盘后因子表过期，重新下载时出现3月11日的新除权
+        source.factors['2024-03-11'] = 4.0
+        freeze_now(monkeypatch, '2024-03-11 16:00')
+
+        assert close(fetcher, 'qfq') == [2.5, 2.75, 6.0, 6.5]
+        assert close(fetcher, 'hfq') == [10.0, 11.0, 24.0, 26.0]
+        assert source.calls == 1
+        assert source.factor_calls == 2
+
+    def test_factors_reused_within_session(self, setup):
+        """同一个已收盘交易日内因子表只下载一次"""
+        fetcher, source = setup
+
+        close(fetcher, 'qfq')
+        close(fetcher, 'hfq')
+
+        assert source.factor_calls == 1
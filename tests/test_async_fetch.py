@@ -0,0 +1,72 @@
+"""
+异步数据获取测试
+使用注入延迟的本地数据源验证下载并发上限、缓存命中不排队和逐只股票的错误报告
+"""
+
+import asyncio
+import time
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource
+
+
+START, END = '20240102', '20240329'
+
+
+def make_fetcher(tmp_path, source, concurrency):
+    """每个测试使用独立的缓存目录和内存缓存"""
+    return DataFetcher(cache_dir=str(tmp_path / "cache"), source=source,
+                       async_concurrency=concurrency, memory_cache=MemoryLRUCache())
+
+
+class TestAsyncFetch:
+    def test_downloads_capped_at_async_concurrency(self, tmp_path):
+        """同时进行的下载数不超过 async_concurrency"""
+        source = LatencyDataSource(latency=0.1)
+        fetcher = make_fetcher(tmp_path, source, concurrency=3)
+        symbols = [f"{i:06d}" for i in range(1, 11)]
+
+        data = asyncio.run(fetcher.aget_many(symbols, START, END, adjust=''))
+
+        assert sorted(data) == symbols
+        assert source.calls == len(symbols)
+        assert source.max_active == 3
+
+    def test_cache_hit_does_not_wait_for_downloads(self, tmp_path):
+        """下载并发额度占满时，命中缓存的请求仍然立即返回"""
+        source = LatencyDataSource(latency=0.3)
+        fetcher = make_fetcher(tmp_path, source, concurrency=1)
+        fetcher.get_stock_data('000001', START, END, adjust='')
+
+        async def scenario():
+            downloads = asyncio.ensure_future(
+                fetcher.aget_many([f"{i:06d}" for i in range(2, 6)], START, END, adjust=''))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            cached = await fetcher.aget_stock_data('000001', START, END, adjust='')
+            elapsed = time.perf_counter() - started
+            in_flight = not downloads.done()
+            await downloads
+            return cached, elapsed, in_flight
+
+        cached, elapsed, in_flight = asyncio.run(scenario())
+
+        assert in_flight
+        assert not cached.empty
+        assert elapsed < 0.2
+        assert source.calls == 5
+
+    def test_aget_many_reports_per_symbol_errors(self, tmp_path):
+        """单只股票下载失败时写入 errors，其他股票正常返回"""
+        source = LatencyDataSource(latency=0.01, failures={'000002': ConnectionError("断开")})
+        fetcher = make_fetcher(tmp_path, source, concurrency=4)
+        errors = {}
+
+        data = asyncio.run(fetcher.aget_many(['000001', '000002', '000003', '000001'],
+                                             START, END, adjust='', errors=errors))
+
+        assert sorted(data) == ['000001', '000003']
+        assert list(errors) == ['000002']
+        assert isinstance(errors['000002'], ValueError)
+        assert "断开" in str(errors['000002'])
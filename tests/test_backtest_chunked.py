@@ -0,0 +1,77 @@
+"""
+分块回测测试
+逐块计算指标（带预热数据）并逐块回测的结果应与整段计算后调用 run_backtest 一致，
+包括块长度小于最长指标窗口的情况
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import BacktestAnalyzer
+from src.conditions import ComparisonOperator, NumericCompareCondition, SignalCrossCondition
+from src.indicators import IndicatorCalculator
+
+
+ROWS = 500
+INDICATORS = [{'code': 'SMA', 'params': {'timeperiod': 5}},
+              {'code': 'SMA', 'params': {'timeperiod': 60}}]
+CONDITIONS = [SignalCrossCondition('SMA_5', 'SMA_60', 'golden'),
+              SignalCrossCondition('SMA_5', 'SMA_60', 'death'),
+              NumericCompareCondition('close', ComparisonOperator.GREATER_THAN, 0),
+              NumericCompareCondition('SMA_5', ComparisonOperator.GREATER_THAN, 10)]
+
+
+@pytest.fixture(scope='module')
+def bars() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, ROWS)))
+    index = pd.bdate_range('2023-01-02', periods=ROWS, name='date')
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                         'close': close, 'volume': np.full(ROWS, 1000.0)}, index=index)
+
+
+def split(data: pd.DataFrame, size: int):
+    return [data.iloc[i:i + size] for i in range(0, len(data), size)]
+
+
+def assert_same_result(chunked, full):
+    assert [s.timestamp for s in chunked.signals] == [s.timestamp for s in full.signals]
+    np.testing.assert_allclose(chunked.returns, full.returns, rtol=0, atol=1e-12)
+    assert chunked.total_signals == full.total_signals
+    assert chunked.win_rate == full.win_rate
+
+
+class TestRunBacktestChunked:
+    @pytest.mark.parametrize('chunk_size', [7, 30, 59, 61, 128, ROWS])
+    @pytest.mark.parametrize('condition', CONDITIONS, ids=lambda c: c.description)
+    def test_matches_run_backtest_with_indicator_warmup(self, bars, chunk_size, condition):
+        """逐块计算指标并回测（持有期按K线），与整段计算的结果一致"""
+        calculator = IndicatorCalculator()
+        analyzer = BacktestAnalyzer()
+        full = analyzer.run_backtest(calculator.calculate_multiple_indicators(bars, INDICATORS),
+                                     condition, holding_period=10, trading_days=True)
+
+        chunks = calculator.iter_indicators(split(bars, chunk_size), INDICATORS)
+        chunked = analyzer.run_backtest_chunked(chunks, condition, holding_period=10)
+
+        assert full.total_signals > 0
+        assert_same_result(chunked, full)
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 20])
+    @pytest.mark.parametrize('holding_period', [1, 14, 800])
+    def test_calendar_day_holding_period(self, bars, chunk_size, holding_period):
+        """持有期按自然日、跨越多个块或超出数据范围时与 run_backtest 一致"""
+        data = IndicatorCalculator().calculate_multiple_indicators(bars, INDICATORS)
+        condition = CONDITIONS[0]
+        analyzer = BacktestAnalyzer()
+
+        full = analyzer.run_backtest(data, condition, holding_period=holding_period)
+        chunked = analyzer.run_backtest_chunked(split(data, chunk_size), condition,
+                                                holding_period=holding_period, by_bars=False)
+
+        assert_same_result(chunked, full)
+
+    def test_empty_input_raises(self):
+        with pytest.raises(ValueError):
+            BacktestAnalyzer().run_backtest_chunked([], CONDITIONS[0])
@@ -0,0 +1,40 @@
+"""
+缓存清单测试
+"""
+
+import sqlite3
+
+from src.cache_manifest import CacheManifest
+
+
+class TestCacheManifestTotals:
+    def test_totals_follow_upsert_update_and_delete(self, tmp_path):
+        """汇总表与逐行求和一致"""
+        manifest = CacheManifest(str(tmp_path))
+        for i in range(10):
+            manifest.upsert(f"key{i}", symbol=f"{i:06d}", bytes=100 * (i + 1))
+        manifest.upsert("key3", bytes=1)
+        manifest.upsert("key4", checked="2024-01-02")
+        manifest.delete("key0")
+        manifest.delete("missing")
+
+        expected = sum(100 * (i + 1) for i in range(1, 10)) - 400 + 1
+        assert manifest.summary() == {'count': 9, 'bytes': expected}
+
+        manifest.clear()
+        assert manifest.summary() == {'count': 0, 'bytes': 0}
+
+    def test_legacy_manifest_is_seeded(self, tmp_path):
+        """没有汇总表的旧版清单打开时按现有条目初始化"""
+        conn = sqlite3.connect(str(tmp_path / CacheManifest.FILE_NAME))
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in CacheManifest.COLUMNS.items())
+        conn.execute(f"CREATE TABLE entries ({columns})")
+        conn.execute("INSERT INTO entries (key, bytes) VALUES ('a', 5), ('b', 7)")
+        conn.commit()
+        conn.close()
+
+        manifest = CacheManifest(str(tmp_path))
+
+        assert manifest.summary() == {'count': 2, 'bytes': 12}
+        manifest.upsert("c", bytes=3)
+        assert manifest.summary() == {'count': 3, 'bytes': 15}
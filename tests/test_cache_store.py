@@ -0,0 +1,161 @@
+"""
+列式缓存存储测试
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache_store import CacheCorruptionError, ColumnarCacheStore
+from src.concurrency import FileLock
+
+
+ROWS = 5000
+
+
+def make_frame() -> pd.DataFrame:
+    index = pd.bdate_range('2000-01-03', periods=ROWS, name='date')
+    return pd.DataFrame({'close': np.arange(ROWS, dtype=np.float64),
+                         'volume': np.arange(ROWS, dtype=np.int64) * 100}, index=index)
+
+
+def overwrite_index_value(store: ColumnarCacheStore, key: str, row: int, value: int):
+    """直接改写索引文件中的一行（模拟磁盘上的损坏）"""
+    path = os.path.join(store.entry_path(key), f"{ColumnarCacheStore.INDEX_NAME}.npy")
+    with open(path, 'r+b') as f:
+        f.seek(os.path.getsize(path) - (ROWS - row) * 8)
+        f.write(np.int64(value).tobytes())
+
+
+class TestWindowedLoad:
+    @pytest.mark.parametrize('compression', [None, 'zlib'])
+    @pytest.mark.parametrize('start,end', [
+        ('2005-01-01', '2006-01-01'),
+        (None, '2000-01-05'),
+        ('2019-01-01', None),
+        ('2030-01-01', None),
+        ('2000-01-03', '2000-01-03'),
+    ])
+    def test_window_matches_full_slice(self, tmp_path, compression, start, end):
+        """窗口读取与整表切片结果一致"""
+        store = ColumnarCacheStore(str(tmp_path), compression=compression)
+        frame = make_frame()
+        store.save('key', frame)
+
+        data = store.load('key', start=start, end=end)
+
+        pd.testing.assert_frame_equal(data, frame.loc[start:end], check_freq=False)
+
+    def test_index_is_memory_mapped(self, tmp_path, monkeypatch):
+        """未压缩的索引按内存映射读取，不整列读入"""
+        store = ColumnarCacheStore(str(tmp_path))
+        store.save('key', make_frame())
+        modes = []
+        load = np.load
+
+        def recording_load(path, **kwargs):
+            modes.append((os.path.basename(path), kwargs.get('mmap_mode')))
+            return load(path, **kwargs)
+
+        monkeypatch.setattr(np, 'load', recording_load)
+
+        store.load('key', start='2005-01-01', end='2005-02-01')
+
+        assert (f"{ColumnarCacheStore.INDEX_NAME}.npy", 'r') in modes
+
+    def test_corrupt_index_on_search_path_is_detected(self, tmp_path):
+        """二分查找经过的索引值损坏导致定位错误时报告损坏"""
+        store = ColumnarCacheStore(str(tmp_path))
+        store.save('key', make_frame())
+        overwrite_index_value(store, 'key', ROWS // 2, 0)
+
+        with pytest.raises(CacheCorruptionError):
+            store.load('key', start='2001-01-01', end='2001-02-01')
+
+
+class TestRecover:
+    def interrupted_write(self, store: ColumnarCacheStore, key: str, token: str) -> str:
+        """留下一次被中断写入的临时目录和写入锁文件"""
+        tmp_dir = f"{store.entry_path(key)}.tmp-{token}"
+        os.makedirs(tmp_dir)
+        lock_path = store._writer_lock_path(key, token)
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        open(lock_path, 'w').close()
+        return tmp_dir
+
+    def test_skips_directory_of_running_writer(self, tmp_path):
+        """写入锁被持有时（写入者仍在运行，即使在其他主机或pid命名空间中）不清理临时目录"""
+        store = ColumnarCacheStore(str(tmp_path))
+        tmp_dir = self.interrupted_write(store, 'key', '1-1-abc')
+
+        with FileLock(store._writer_lock_path('key', '1-1-abc')):
+            assert store.recover() == 0
+        assert os.path.isdir(tmp_dir)
+
+    def test_removes_directory_of_exited_writer(self, tmp_path):
+        """写入锁可以获取时删除临时目录和锁文件"""
+        store = ColumnarCacheStore(str(tmp_path))
+        tmp_dir = self.interrupted_write(store, 'key', '1-1-abc')
+
+        assert store.recover() == 1
+        assert not os.path.exists(tmp_dir)
+        assert os.listdir(os.path.join(str(tmp_path), ColumnarCacheStore.WRITERS_DIR)) == []
+
+    def test_restores_old_directory(self, tmp_path):
+        """替换中断时条目目录不存在，旧目录恢复为条目"""
+        store = ColumnarCacheStore(str(tmp_path))
+        store.save('key', make_frame())
+        tmp_dir = self.interrupted_write(store, 'key', '1-1-abc')
+        os.rmdir(tmp_dir)
+        os.rename(store.entry_path('key'), f"{store.entry_path('key')}.old-1-1-abc")
+
+        assert store.recover() == 1
+        assert store.list_keys() == ['key']
+
+    def test_unlocked_directory_waits_for_grace_period(self, tmp_path):
+        """没有写入锁文件的临时目录在宽限期内保留，超过后删除"""
+        store = ColumnarCacheStore(str(tmp_path))
+        tmp_dir = f"{store.entry_path('key')}.tmp-1-1"
+        os.makedirs(tmp_dir)
+
+        assert store.recover() == 0
+        old = time.time() - ColumnarCacheStore.RECOVER_GRACE_SECONDS - 1
+        os.utime(tmp_dir, (old, old))
+        assert store.recover() == 1
+        assert not os.path.exists(tmp_dir)
+
+    def test_save_leaves_no_writer_state(self, tmp_path):
+        """正常写入后不留下临时目录、旧目录和写入锁文件"""
+        store = ColumnarCacheStore(str(tmp_path))
+        store.save('key', make_frame())
+        store.save('key', make_frame())
+
+        assert sorted(os.listdir(str(tmp_path))) == [ColumnarCacheStore.WRITERS_DIR, 'key']
+        assert os.listdir(os.path.join(str(tmp_path), ColumnarCacheStore.WRITERS_DIR)) == []
+
+
+class TestQuarantine:
+    def test_keeps_at_most_max_entries(self, tmp_path, monkeypatch):
+        """隔离的条目超过数量上限时删除最早隔离的"""
+        monkeypatch.setattr(ColumnarCacheStore, 'QUARANTINE_MAX_ENTRIES', 2)
+        store = ColumnarCacheStore(str(tmp_path))
+        paths = []
+        for _ in range(4):
+            store.save('key', make_frame())
+            paths.append(store.quarantine('key'))
+
+        remaining = [path for _, path in store._quarantined_dirs()]
+        assert remaining == paths[-2:]
+        assert store.quarantine_size() > 0
+
+    def test_removes_expired_entries(self, tmp_path):
+        """超过保留天数的隔离条目被删除"""
+        store = ColumnarCacheStore(str(tmp_path))
+        store.save('key', make_frame())
+        store.quarantine('key')
+
+        assert store.prune_quarantine(max_age_days=0) == 1
+        assert store.quarantine_size() == 0
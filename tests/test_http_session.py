@@ -0,0 +1,145 @@
+"""
+HTTP会话测试
+在本地HTTP服务器上验证客户端只作用于数据源的调用、实时请求不使用缓存和过期响应的清理
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from src.data_sources import AkshareDataSource
+from src.http_session import HttpResponseCache, PooledHttpClient
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """每次请求返回递增的计数，用于判断响应是否来自缓存"""
+
+    def do_GET(self):
+        with self.server.hits_lock:
+            self.server.hits += 1
+            body = str(self.server.hits).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """本地计数HTTP服务器"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    httpd.hits = 0
+    httpd.hits_lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    """安装到requests的带缓存客户端"""
+    client = PooledHttpClient(cache=HttpResponseCache(str(tmp_path / "http.sqlite3"), ttl=300))
+    client.install()
+    yield client
+    client.uninstall()
+
+
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}/data"
+
+
+class FakeAkshare:
+    """通过 requests 模块级函数访问测试服务器的akshare替身"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def stock_zh_a_spot_em(self):
+        value = requests.get(self.url, params={'fs': 'spot'}).text
+        return pd.DataFrame({'代码': ['000001'], '最新价': [value]})
+
+    def stock_zh_a_hist(self, symbol, period, start_date, end_date, adjust):
+        value = requests.get(self.url, params={'symbol': symbol, 'end': end_date}).text
+        return pd.DataFrame({'日期': [start_date], '收盘': [float(value)]})
+
+
+class TestScope:
+    def test_requests_outside_activate_bypass_client(self, server, client):
+        """其他库在数据源调用之外发出的请求不经过客户端和缓存"""
+        assert requests.get(url(server)).text == "1"
+        assert requests.get(url(server)).text == "2"
+        assert client.requests == 0
+
+    def test_requests_inside_activate_are_cached(self, server, client):
+        """激活期间相同的GET请求返回缓存的响应"""
+        with client.activate():
+            first = requests.get(url(server))
+            second = requests.get(url(server))
+
+        assert (first.text, second.text) == ("1", "1")
+        assert second.from_cache
+        assert server.hits == 1
+
+    def test_activate_is_per_thread(self, server, client):
+        """一个线程激活客户端时，其他线程的请求不受影响"""
+        results = []
+        with client.activate():
+            thread = threading.Thread(target=lambda: results.append(requests.get(url(server)).text))
+            thread.start()
+            thread.join()
+
+        assert client.requests == 0
+        assert results == ["1"]
+
+
+class TestIntradayTtl:
+    def test_spot_snapshot_is_never_cached(self, server, client):
+        """实时行情快照每次都重新请求"""
+        source = AkshareDataSource(ak_module=FakeAkshare(url(server)), http_client=client)
+
+        first = source.fetch_spot_snapshot()
+        second = source.fetch_spot_snapshot()
+
+        assert (first.loc['000001', 'close'], second.loc['000001', 'close']) == (1, 2)
+        assert client.cache_hits == 0
+
+    def test_history_is_cached_but_today_is_not(self, server, client):
+        """截止日期早于今天的日线使用缓存，截止到今天的日线每次重新请求"""
+        source = AkshareDataSource(ak_module=FakeAkshare(url(server)), http_client=client)
+        today = pd.Timestamp.now().strftime('%Y%m%d')
+
+        history = [source.fetch_daily('000001', '20240102', '20240329')['close'].iloc[0]
+                   for _ in range(2)]
+        intraday = [source.fetch_daily('000001', '20240102', today)['close'].iloc[0]
+                    for _ in range(2)]
+
+        assert history == [1, 1]
+        assert intraday == [2, 3]
+
+
+class TestPrune:
+    def test_put_prunes_expired_responses(self, tmp_path, monkeypatch):
+        """写入响应时按间隔删除过期的响应，不依赖安装客户端"""
+        monkeypatch.setattr(HttpResponseCache, 'PRUNE_INTERVAL', 2)
+        cache = HttpResponseCache(str(tmp_path / "http.sqlite3"), ttl=60)
+        cache.put("old", "http://x/old", 200, {}, None, b"old")
+        with cache._connect() as conn:
+            conn.execute("UPDATE responses SET created_at = ?", (time.time() - 3600,))
+
+        cache.put("a", "http://x/a", 200, {}, None, b"a")
+        assert cache.summary()['responses'] == 2
+        cache.put("b", "http://x/b", 200, {}, None, b"b")
+
+        assert cache.summary()['responses'] == 2
+        assert cache.get("old", ttl=86400) is None
+        assert cache.file_size() > 0
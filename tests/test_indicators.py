@@ -0,0 +1,61 @@
+"""
+技术指标计算测试
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import IndicatorCalculator
+
+
+def make_data(rows: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    index = pd.bdate_range('2024-01-02', periods=rows, name='date')
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99,
+                         'close': close, 'volume': rng.integers(1_000, 100_000, rows).astype(float)},
+                        index=index)
+
+
+class TestIndicatorCache:
+    def test_read_only_reuses_results_without_writing(self, tmp_path):
+        """只读模式读取已缓存的结果，但不写入新的结果"""
+        cache_dir = str(tmp_path / "indicators")
+        data = make_data()
+        warmed = IndicatorCalculator(cache_dir=cache_dir).calculate_indicator(data, 'SMA', {'timeperiod': 5})
+        reader = IndicatorCalculator(cache_dir=cache_dir, read_only=True)
+
+        cached = reader.calculate_indicator(data, 'SMA', {'timeperiod': 5})
+        reader.calculate_indicator(data, 'SMA', {'timeperiod': 10})
+        reader.calculate_indicator(make_data(seed=1), 'SMA', {'timeperiod': 5})
+
+        pd.testing.assert_frame_equal(cached, warmed)
+        assert len(reader.cache.list_keys()) == 1
+
+    def test_cache_size_is_capped_on_save(self, tmp_path, monkeypatch):
+        """写入时按间隔清理，缓存目录不超过容量上限"""
+        monkeypatch.setattr(IndicatorCalculator, 'CACHE_PRUNE_INTERVAL', 5)
+        calculator = IndicatorCalculator(cache_dir=str(tmp_path / "indicators"), cache_max_mb=0.02)
+
+        for seed in range(40):
+            calculator.calculate_indicator(make_data(seed=seed), 'SMA', {'timeperiod': 5})
+        calculator.prune_cache()
+
+        keys = calculator.cache.list_keys()
+        total = sum(calculator.cache.entry_size(key) for key in keys)
+        assert 0 < len(keys) < 40
+        assert total <= calculator.cache_max_bytes
+
+    def test_prune_removes_expired_entries(self, tmp_path):
+        """超过保留天数的条目被删除"""
+        calculator = IndicatorCalculator(cache_dir=str(tmp_path / "indicators"))
+        calculator.calculate_indicator(make_data(), 'RSI', {'timeperiod': 14})
+        key = calculator.cache.list_keys()[0]
+        old = calculator.cache.mtime(key) - 10 * 24 * 3600
+        meta_path = os.path.join(calculator.cache.entry_path(key), calculator.cache.META_FILE)
+        os.utime(meta_path, (old, old))
+
+        assert calculator.prune_cache() == 1
+        assert calculator.cache.list_keys() == []
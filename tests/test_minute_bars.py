@@ -0,0 +1,60 @@
+"""
+分钟线获取测试
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import DataFetcher
+from src.data_sources import LocalFileDataSource
+from src.intraday import resample_minute_bars
+from src.memory_cache import MemoryLRUCache
+
+
+def session_minutes(day: str) -> pd.DatetimeIndex:
+    """一个交易日的1分钟线时间（09:31-11:30，13:01-15:00）"""
+    morning = pd.date_range(f"{day} 09:31", f"{day} 11:30", freq='min')
+    afternoon = pd.date_range(f"{day} 13:01", f"{day} 15:00", freq='min')
+    return morning.append(afternoon)
+
+
+def write_minute_file(root, symbol: str, minutes: int, index: pd.DatetimeIndex, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.01, len(index))), 2)
+    frame = pd.DataFrame({'date': index.strftime('%Y-%m-%d %H:%M:%S'), 'open': close,
+                          'high': close + 0.01, 'low': close - 0.01, 'close': close,
+                          'volume': rng.integers(100, 1000, len(index))})
+    frame.to_csv(root / f"{symbol}.{minutes}min.csv", index=False)
+
+
+def make_fetcher(tmp_path):
+    return DataFetcher(cache_dir=str(tmp_path / "cache"), source=LocalFileDataSource(str(tmp_path / "data")),
+                       memory_cache=MemoryLRUCache())
+
+
+class TestMinuteFallback:
+    def test_missing_native_series_is_resampled_from_1min(self, tmp_path):
+        """本地只有1分钟线时，5分钟线由1分钟线按交易时段聚合"""
+        (tmp_path / "data").mkdir()
+        index = session_minutes('2024-03-04').append(session_minutes('2024-03-05'))
+        write_minute_file(tmp_path / "data", '000001', 1, index)
+        fetcher = make_fetcher(tmp_path)
+
+        bars = fetcher.get_stock_data('000001', '20240301', '20240331', '5min', adjust='')
+        one_minute = fetcher.get_stock_data('000001', '20240301', '20240331', '1min', adjust='')
+
+        assert len(bars) == 2 * 48
+        pd.testing.assert_frame_equal(bars, resample_minute_bars(one_minute, 5))
+
+    def test_native_series_is_preferred(self, tmp_path):
+        """数据源直接提供的周期不由1分钟线聚合"""
+        (tmp_path / "data").mkdir()
+        write_minute_file(tmp_path / "data", '000001', 1, session_minutes('2024-03-04'))
+        native = session_minutes('2024-03-04')[4::5]
+        write_minute_file(tmp_path / "data", '000001', 5, native, seed=1)
+        fetcher = make_fetcher(tmp_path)
+
+        bars = fetcher.get_stock_data('000001', '20240301', '20240331', '5min', adjust='')
+
+        expected = pd.read_csv(tmp_path / "data" / "000001.5min.csv")['close'].to_numpy()
+        np.testing.assert_allclose(bars['close'].to_numpy(), expected)
@@ -0,0 +1,48 @@
+"""
+旧版pickle缓存迁移测试
+"""
+
+import pandas as pd
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource
+
+
+class AkshareNamedSource(LatencyDataSource):
+    """以akshare名义登记缓存的模拟数据源（旧版缓存只能迁移到akshare数据源）"""
+
+    name = "akshare"
+
+
+def write_legacy_pickle(cache_dir, symbol: str) -> pd.DataFrame:
+    """按旧版格式（{symbol}_{period}.pkl，以日期为索引的DataFrame）写入缓存文件"""
+    data = AkshareNamedSource(latency=0).fetch_daily(symbol, '20240102', '20240329')
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    data.to_pickle(cache_dir / f"{symbol}_daily.pkl")
+    return data
+
+
+class TestMigratePickleCache:
+    def test_legacy_pickle_is_read_back_from_columnar_store(self, tmp_path):
+        """迁移后的数据从列式缓存读出，与旧版缓存一致且不再下载"""
+        cache_dir = tmp_path / "cache"
+        legacy = write_legacy_pickle(cache_dir, '000001')
+        source = AkshareNamedSource(latency=0)
+        fetcher = DataFetcher(cache_dir=str(cache_dir), source=source, memory_cache=MemoryLRUCache())
+
+        assert fetcher.migrate_pickle_cache(adjust='qfq') == 1
+
+        assert not (cache_dir / "000001_daily.pkl").exists()
+        data = fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+        assert source.calls == 0
+        pd.testing.assert_frame_equal(data[legacy.columns], legacy, check_freq=False,
+                                      check_dtype=False, check_index_type=False)
+
+    def test_startup_warns_about_legacy_pickles(self, tmp_path, caplog):
+        """缓存目录中有旧版pickle缓存时，初始化时提示迁移命令"""
+        write_legacy_pickle(tmp_path / "cache", '000001')
+
+        DataFetcher(cache_dir=str(tmp_path / "cache"), source=AkshareNamedSource(latency=0))
+
+        assert "--mode migrate" in caplog.text
@@ -0,0 +1,62 @@
+"""
+并发请求合并测试
+同一只未缓存股票的并发请求只下载一次：同一个DataFetcher内由SingleFlight合并，
+共享缓存目录的不同DataFetcher（不同进程）之间由条目的文件锁串行化
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource
+
+
+START, END = '20240102', '20240329'
+CALLERS = 8
+
+
+def fetch_together(fetchers, callers: int = CALLERS):
+    """callers 个线程同时（轮流使用各个DataFetcher）请求同一只股票"""
+    barrier = threading.Barrier(callers)
+
+    def fetch(i):
+        barrier.wait()
+        return fetchers[i % len(fetchers)].get_stock_data('000001', START, END, adjust='')
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        return list(executor.map(fetch, range(callers)))
+
+
+def assert_identical(frames):
+    for frame in frames[1:]:
+        # 下载的数据带有日期频率，从缓存读出的没有，只比较内容
+        pd.testing.assert_frame_equal(frame, frames[0], check_freq=False)
+
+
+class TestRequestCoalescing:
+    def test_concurrent_requests_download_once(self, tmp_path):
+        """同一个DataFetcher的并发请求合并为一次下载，所有调用者得到相同的数据"""
+        source = LatencyDataSource(latency=0.2)
+        fetcher = DataFetcher(cache_dir=str(tmp_path / "cache"), source=source,
+                              memory_cache=MemoryLRUCache())
+
+        frames = fetch_together([fetcher])
+
+        assert source.calls == 1
+        assert not frames[0].empty
+        assert_identical(frames)
+
+    def test_fetchers_sharing_cache_dir_download_once(self, tmp_path):
+        """共享缓存目录的两个DataFetcher由文件锁串行化，后拿到锁的直接读取缓存"""
+        source = LatencyDataSource(latency=0.2)
+        fetchers = [DataFetcher(cache_dir=str(tmp_path / "cache"), source=source,
+                                memory_cache=MemoryLRUCache())
+                    for _ in range(2)]
+
+        frames = fetch_together(fetchers)
+
+        assert source.calls == 1
+        assert_identical(frames)
@@ -0,0 +1,129 @@
+"""
+共享缓存测试
+在进程内Redis协议服务器上验证共享缓存的读写、过期、失效和服务器宕机时的降级
+"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from src.resp_server import InProcessRespServer
+from src.shared_cache import RespClient, SharedCache
+from tests.conftest import LatencyDataSource
+
+
+START, END = '20240102', '20240329'
+
+
+@pytest.fixture
+def server():
+    """进程内Redis协议服务器"""
+    with InProcessRespServer() as server:
+        yield server
+
+
+def make_cache(server, **kwargs):
+    """使用内置RespClient连接测试服务器的共享缓存"""
+    return SharedCache(server.url, client=RespClient.from_url(server.url), **kwargs)
+
+
+def make_frame():
+    index = pd.bdate_range('2024-01-02', periods=5, name='date')
+    return pd.DataFrame({'close': [1.0, 2.0, 3.0, 4.0, 5.0], 'volume': [10, 20, 30, 40, 50]},
+                        index=index)
+
+
+class TestSharedCache:
+    def test_put_get_roundtrip(self, server):
+        """写入的数据和元信息原样读回"""
+        cache = make_cache(server)
+        frame = make_frame()
+
+        cache.put('latency_000001_daily_none', frame, {'covered': [['2024-01-02', '2024-01-08']]})
+        data, fields = cache.get('latency_000001_daily_none')
+
+        pd.testing.assert_frame_equal(data, frame, check_freq=False)
+        assert fields == {'covered': [['2024-01-02', '2024-01-08']]}
+        assert cache.get('latency_000002_daily_none') is None
+
+    def test_entries_expire_after_ttl(self, server):
+        """条目超过TTL后不再返回"""
+        cache = make_cache(server, ttl=1)
+        cache.put('key', make_frame())
+        assert RespClient.from_url(server.url)._command('TTL', 'stip:key') in (0, 1)
+
+        time.sleep(1.1)
+
+        assert cache.get('key') is None
+
+    def test_delete_invalidates_entries(self, server):
+        """删除后其他客户端读不到该条目"""
+        writer, reader = make_cache(server), make_cache(server)
+        writer.put('a', make_frame())
+        writer.put('b', make_frame())
+
+        reader.delete(['a'])
+
+        assert writer.get('a') is None
+        assert writer.get('b') is not None
+
+    def test_stopped_server_degrades_to_miss(self):
+        """服务器停止后读写不抛出异常，读取返回未命中并在重试间隔内不再连接"""
+        server = InProcessRespServer().start()
+        cache = make_cache(server, retry_interval=60)
+        cache.put('key', make_frame())
+        assert cache.get('key') is not None
+
+        server.stop()
+
+        assert cache.get('key') is None
+        assert not cache.available
+        cache.put('key', make_frame())
+        cache.delete(['key'])
+
+
+class TestDataFetcherSharedCache:
+    def test_replica_reads_shared_entry_without_download(self, server, tmp_path):
+        """另一个副本（不同的本地缓存目录）从共享缓存取得数据，不访问数据源"""
+        source = LatencyDataSource(latency=0.01)
+        first = DataFetcher(cache_dir=str(tmp_path / "a"), source=source,
+                            memory_cache=MemoryLRUCache(), shared_cache=make_cache(server))
+        second = DataFetcher(cache_dir=str(tmp_path / "b"), source=source,
+                             memory_cache=MemoryLRUCache(), shared_cache=make_cache(server))
+
+        expected = first.get_stock_data('000001', START, END, adjust='')
+        calls = source.calls
+        data = second.get_stock_data('000001', START, END, adjust='')
+
+        assert source.calls == calls
+        pd.testing.assert_frame_equal(data, expected, check_freq=False)
+
+    def test_clear_cache_invalidates_shared_entries(self, server, tmp_path):
+        """清理某只股票的缓存同时删除共享缓存中的条目"""
+        source = LatencyDataSource(latency=0.01)
+        fetcher = DataFetcher(cache_dir=str(tmp_path / "a"), source=source,
+                              memory_cache=MemoryLRUCache(), shared_cache=make_cache(server))
+        fetcher.get_stock_data('000001', START, END, adjust='')
+        cache_key = fetcher._get_cache_key('000001')
+        assert fetcher.shared_cache.get(cache_key) is not None
+
+        fetcher.clear_cache('000001')
+
+        assert fetcher.shared_cache.get(cache_key) is None
+
+    def test_stopped_server_falls_back_to_source(self, tmp_path):
+        """共享缓存服务器不可用时照常从数据源下载"""
+        server = InProcessRespServer().start()
+        shared = make_cache(server)
+        server.stop()
+        source = LatencyDataSource(latency=0.01)
+        fetcher = DataFetcher(cache_dir=str(tmp_path / "a"), source=source,
+                              memory_cache=MemoryLRUCache(), shared_cache=shared)
+
+        data = fetcher.get_stock_data('000001', START, END, adjust='')
+
+        assert not data.empty
+        assert source.calls == 1
@@ -0,0 +1,99 @@
+"""
+行情快照刷新测试
+固定当前时间，验证只有收盘后到下一交易日开盘前的快照才会追加为已收盘交易日的K线
+"""
+
+import pandas as pd
+import pytest
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource, freeze_now
+
+
+# 2024年国庆休市：10月1日至7日，节前最后一个交易日为9月30日（周一）
+HOLIDAYS = pd.date_range('2024-10-01', '2024-10-07')
+SNAPSHOT_CLOSE = 123.45
+
+
+class SnapshotDataSource(LatencyDataSource):
+    """提供交易日历和固定行情快照的模拟数据源"""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.snapshots = 0
+
+    def fetch_spot_snapshot(self) -> pd.DataFrame:
+        self.snapshots += 1
+        return pd.DataFrame({'open': [120.0], 'high': [125.0], 'low': [119.0],
+                             'close': [SNAPSHOT_CLOSE], 'volume': [5000]},
+                            index=pd.Index(['000001'], name='symbol'))
+
+    def fetch_trade_calendar(self) -> pd.DatetimeIndex:
+        return pd.bdate_range('2024-01-01', '2024-12-31').difference(HOLIDAYS)
+
+
+def make_fetcher(tmp_path, monkeypatch, cached_until: str) -> DataFetcher:
+    """日线缓存截止到 cached_until 的DataFetcher"""
+    freeze_now(monkeypatch, '2024-09-28 12:00')
+    fetcher = DataFetcher(cache_dir=str(tmp_path / "cache"), source=SnapshotDataSource(),
+                          memory_cache=MemoryLRUCache())
+    fetcher.get_stock_data('000001', '20240902', cached_until, adjust='')
+    return fetcher
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    """日线缓存截止到9月27日（周五）的DataFetcher"""
+    return make_fetcher(tmp_path, monkeypatch, '20240927')
+
+
+def last_bar(fetcher: DataFetcher) -> pd.Series:
+    data = fetcher.get_stock_data('000001', '20240902', '20240930', adjust='')
+    return data.iloc[-1]
+
+
+class TestRefreshFromSnapshot:
+    def test_rejected_before_close(self, tmp_path, monkeypatch):
+        """交易日收盘前的快照是盘中行情，不能写成上一交易日（周五）的K线"""
+        fetcher = make_fetcher(tmp_path, monkeypatch, '20240926')
+        freeze_now(monkeypatch, '2024-09-30 10:00')
+
+        with pytest.raises(ValueError):
+            fetcher.refresh_from_snapshot()
+
+        assert fetcher.source.snapshots == 0
+        assert fetcher.find_cache_gaps('000001', '20240902', '20240927') == [
+            (pd.Timestamp('2024-09-27'), pd.Timestamp('2024-09-27'))]
+
+    def test_appended_after_close(self, fetcher, monkeypatch):
+        """收盘后的快照追加为当日K线"""
+        freeze_now(monkeypatch, '2024-09-30 16:00')
+
+        summary = fetcher.refresh_from_snapshot()
+
+        assert summary['trade_date'] == '20240930'
+        assert summary['updated'] == 1
+        bar = last_bar(fetcher)
+        assert bar.name == pd.Timestamp('2024-09-30')
+        assert bar['close'] == SNAPSHOT_CLOSE
+
+    @pytest.mark.parametrize('now', ['2024-10-03 12:00', '2024-10-08 09:00'])
+    def test_holiday_maps_to_last_session(self, fetcher, monkeypatch, now):
+        """节假日期间及节后开盘前的快照对应节前最后一个交易日"""
+        freeze_now(monkeypatch, now)
+
+        summary = fetcher.refresh_from_snapshot()
+
+        assert summary['trade_date'] == '20240930'
+        assert summary['updated'] == 1
+
+    def test_rejects_other_trade_date(self, fetcher, monkeypatch):
+        """快照不能写入它所对应交易日之外的日期"""
+        freeze_now(monkeypatch, '2024-10-03 12:00')
+
+        with pytest.raises(ValueError):
+            fetcher.refresh_from_snapshot(trade_date='20240927')
+        with pytest.raises(ValueError):
+            fetcher.refresh_from_snapshot(trade_date='20241003')
+        assert fetcher.source.snapshots == 0
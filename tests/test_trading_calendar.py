@@ -0,0 +1,185 @@
+"""
+交易日历测试
+以2024年沪深交易所的休市安排为固定日历，将查表结果与逐日遍历的参考实现比较，
+并验证回测按K线序号向量化计算的收益与逐个信号循环的旧实现一致
+"""
+
+import bisect
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import BacktestAnalyzer
+from src.trading_calendar import TradingCalendar
+
+
+# 2024年休市安排中落在周一至周五的日期
+HOLIDAYS_2024 = pd.DatetimeIndex(
+    ['2024-01-01']
+    + list(pd.bdate_range('2024-02-09', '2024-02-16'))   # 春节
+    + ['2024-04-04', '2024-04-05']                       # 清明节
+    + ['2024-05-01', '2024-05-02', '2024-05-03']         # 劳动节
+    + ['2024-06-10']                                     # 端午节
+    + ['2024-09-16', '2024-09-17']                       # 中秋节
+    + ['2024-10-01', '2024-10-02', '2024-10-03', '2024-10-04', '2024-10-07']  # 国庆节
+)
+
+
+@pytest.fixture(scope='module')
+def calendar() -> TradingCalendar:
+    return TradingCalendar.from_weekdays('2024-01-01', '2024-12-31', holidays=HOLIDAYS_2024)
+
+
+@pytest.fixture(scope='module')
+def sessions(calendar) -> list:
+    return list(calendar.sessions)
+
+
+def all_days() -> pd.DatetimeIndex:
+    """覆盖日历首尾之外的全部自然日"""
+    return pd.date_range('2023-12-20', '2025-01-10')
+
+
+class TestLookups:
+    def test_holidays_are_not_sessions(self, calendar):
+        """休市的工作日不是交易日"""
+        assert len(calendar) == len(pd.bdate_range('2024-01-01', '2024-12-31')) - len(HOLIDAYS_2024)
+        assert not calendar.is_session(HOLIDAYS_2024).any()
+        assert calendar.is_session(pd.Timestamp('2024-02-08'))
+        assert not calendar.is_session(pd.Timestamp('2024-02-10'))
+
+    def test_positions_match_linear_scan(self, calendar, sessions):
+        """向前/向后取交易日序号与逐个比较的结果一致（含日历首尾之外的日期）"""
+        days = all_days()
+        forward = calendar.positions(days, 'forward')
+        backward = calendar.positions(days, 'backward')
+
+        assert forward.tolist() == [bisect.bisect_left(sessions, day) for day in days]
+        assert backward.tolist() == [bisect.bisect_right(sessions, day) - 1 for day in days]
+
+    def test_rollback_next_previous_match_linear_scan(self, calendar, sessions):
+        """当天或之前、之前、之后的交易日与逐个比较的结果一致"""
+        for day in pd.date_range('2024-01-03', '2024-12-30'):
+            assert calendar.rollback(day) == max(s for s in sessions if s <= day)
+            assert calendar.previous_session(day) == max(s for s in sessions if s < day)
+            assert calendar.next_session(day) == min(s for s in sessions if s > day)
+
+    @pytest.mark.parametrize('n', [1, 3, -3, 10])
+    def test_offset_matches_linear_scan(self, calendar, sessions, n):
+        """偏移N个交易日：非交易日先取之后（向前偏移时取之前）的交易日，超出日历为NaT"""
+        days = pd.date_range('2024-01-01', '2024-12-31')
+        expected = []
+        for day in days:
+            base = bisect.bisect_left(sessions, day) if n >= 0 else bisect.bisect_right(sessions, day) - 1
+            target = base + n
+            expected.append(sessions[target] if 0 <= target < len(sessions) else pd.NaT)
+
+        result = calendar.offset(days, n)
+
+        assert list(result) == expected
+
+    def test_holiday_week_offset(self, calendar):
+        """春节前最后一个交易日之后的第一个交易日为节后首日"""
+        assert calendar.offset(pd.Timestamp('2024-02-08'), 1)[0] == pd.Timestamp('2024-02-19')
+        assert calendar.rollback('2024-10-06') == pd.Timestamp('2024-09-30')
+
+
+class TestRangeSlicing:
+    def test_sessions_in_range_skips_holidays(self, calendar):
+        """区间内的交易日跳过整个休市周"""
+        assert list(calendar.sessions_in_range('2024-02-08', '2024-02-19')) == [
+            pd.Timestamp('2024-02-08'), pd.Timestamp('2024-02-19')]
+        assert calendar.count_sessions('2024-02-08', '2024-02-19') == 2
+        assert calendar.count_sessions('2024-10-01', '2024-10-07') == 0
+        assert len(calendar.sessions_in_range('2024-10-01', '2024-10-07')) == 0
+
+    def test_range_matches_filtering(self, calendar, sessions):
+        """区间切片与逐个过滤的结果一致"""
+        for start, end in [('2024-01-01', '2024-12-31'), ('2024-04-03', '2024-05-06'),
+                           ('2023-06-01', '2024-01-05'), ('2024-12-30', '2025-03-01')]:
+            expected = [s for s in sessions if pd.Timestamp(start) <= s <= pd.Timestamp(end)]
+            assert list(calendar.sessions_in_range(start, end)) == expected
+            assert calendar.count_sessions(start, end) == len(expected)
+
+    def test_missing_sessions_are_suspensions_only(self, calendar):
+        """个股K线缺失的交易日为停牌日，节假日不算停牌"""
+        bars = calendar.sessions_in_range('2024-09-20', '2024-10-15')
+        suspended = pd.DatetimeIndex(['2024-09-26', '2024-10-09'])
+
+        missing = calendar.missing_sessions(bars.difference(suspended))
+
+        assert list(missing) == list(suspended)
+
+
+def legacy_signal_returns(data: pd.DataFrame, signals: pd.Series, holding_period: int,
+                          price_column: str = 'close'):
+    """向量化之前逐个信号循环的实现（按自然日计算持有期）"""
+    dates, returns = [], []
+    for signal_date in signals[signals].index:
+        if signal_date not in data.index:
+            continue
+        signal_price = data.loc[signal_date, price_column]
+        target_date = signal_date + pd.Timedelta(days=holding_period)
+        position = min(data.index.searchsorted(target_date, side='left'), len(data) - 1)
+        target_price = data[price_column].iloc[position]
+        dates.append(signal_date)
+        returns.append((target_price - signal_price) / signal_price)
+    return dates, returns
+
+
+@pytest.fixture(scope='module')
+def frame(calendar) -> pd.DataFrame:
+    """2024年全部交易日中随机停牌若干天的日线"""
+    rng = np.random.default_rng(7)
+    index = calendar.sessions
+    index = index[rng.random(len(index)) > 0.05]
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+    return pd.DataFrame({'close': close}, index=index)
+
+
+@pytest.fixture(scope='module')
+def signals(frame) -> pd.Series:
+    return pd.Series(np.random.default_rng(11).random(len(frame)) < 0.3, index=frame.index)
+
+
+class TestVectorizedSignalReturns:
+    @pytest.mark.parametrize('holding_period', [1, 3, 5, 10, 30, 400])
+    def test_calendar_days_match_legacy_loop(self, frame, signals, holding_period):
+        """按自然日计算持有期时与旧的循环实现结果一致"""
+        events, returns, periods = BacktestAnalyzer()._calculate_signal_returns(
+            frame, signals, holding_period, 'close')
+        dates, expected = legacy_signal_returns(frame, signals, holding_period)
+
+        assert [event.timestamp for event in events] == dates
+        np.testing.assert_allclose(returns, expected, rtol=0, atol=1e-15)
+        assert periods == [holding_period] * len(dates)
+
+    @pytest.mark.parametrize('holding_period', [1, 5, 20])
+    def test_trading_days_count_calendar_sessions(self, frame, signals, calendar, sessions,
+                                                  holding_period):
+        """按交易日计算持有期时停牌日也计入，目标日停牌时取之后第一根K线"""
+        _, returns, _ = BacktestAnalyzer()._calculate_signal_returns(
+            frame, signals, holding_period, 'close', trading_days=True, calendar=calendar)
+
+        prices = frame['close']
+        expected = []
+        for signal_date in signals[signals].index:
+            target = bisect.bisect_left(sessions, signal_date) + holding_period
+            if target < len(sessions):
+                position = min(frame.index.searchsorted(sessions[target]), len(frame) - 1)
+            else:
+                position = len(frame) - 1
+            expected.append((prices.iloc[position] - prices[signal_date]) / prices[signal_date])
+
+        np.testing.assert_allclose(returns, expected, rtol=0, atol=1e-15)
+
+    def test_trading_days_without_calendar_count_bars(self, frame, signals):
+        """没有交易日历时以K线为交易日"""
+        _, returns, _ = BacktestAnalyzer()._calculate_signal_returns(
+            frame, signals, 5, 'close', trading_days=True)
+
+        prices = frame['close'].to_numpy()
+        positions = np.flatnonzero(signals.to_numpy())
+        targets = np.minimum(positions + 5, len(prices) - 1)
+        np.testing.assert_allclose(returns, (prices[targets] - prices[positions]) / prices[positions])
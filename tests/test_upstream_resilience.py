@@ -0,0 +1,167 @@
+"""
+上游请求容错测试
+使用注入延迟的远程替身数据源验证单次请求超时、对冲请求、熔断和熔断期间返回已有缓存
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from src.concurrency import CircuitBreaker, UpstreamTimeoutError, hedged_call
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from tests.conftest import LatencyDataSource
+
+
+class ScriptedRemoteSource(LatencyDataSource):
+    """
+    按脚本注入延迟和网络错误的远程数据源
+
+    每次下载依次取 delays 中的延迟（用完后为0）；fail 为True时下载抛出ConnectionError。
+    """
+
+    name = "scripted"
+    remote = True
+
+    def __init__(self, delays=()):
+        super().__init__(latency=0)
+        self.delays = list(delays)
+        self.fail = False
+
+    def fetch_daily(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        with self._lock:
+            delay = self.delays.pop(0) if self.delays else 0
+        time.sleep(delay)
+        if self.fail:
+            with self._lock:
+                self.calls += 1
+            raise ConnectionError("上游连接被重置")
+        return super().fetch_daily(symbol, start_date, end_date)
+
+
+def make_fetcher(tmp_path, source, **kwargs) -> DataFetcher:
+    """不重试、不复用内存缓存的DataFetcher"""
+    return DataFetcher(cache_dir=str(tmp_path / "cache"), source=source, max_retries=0,
+                       memory_cache=MemoryLRUCache(), **kwargs)
+
+
+class TestTimeoutAndHedge:
+    def test_request_timeout_fires(self, tmp_path):
+        """上游超过单次请求超时仍未返回时放弃等待"""
+        source = ScriptedRemoteSource(delays=[1.0])
+        fetcher = make_fetcher(tmp_path, source, request_timeout=0.1)
+
+        started = time.monotonic()
+        # get_stock_data 把上游错误包装为ValueError
+        with pytest.raises(ValueError, match="超时"):
+            fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+
+        assert time.monotonic() - started < 0.5
+        assert fetcher.get_fetch_metrics()['timeouts'] == 1
+
+    def test_hedged_request_wins_over_slow_primary(self, tmp_path):
+        """主请求超过延迟分位数时发出对冲请求，取先返回的对冲请求的结果"""
+        source = ScriptedRemoteSource(delays=[1.0, 0.0])
+        fetcher = make_fetcher(tmp_path, source, request_timeout=5, hedge_percentile=50)
+        for _ in range(DataFetcher.HEDGE_MIN_SAMPLES):
+            fetcher.fetch_latency.record(0.05)
+
+        started = time.monotonic()
+        data = fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+
+        assert time.monotonic() - started < 0.5
+        assert not data.empty
+        metrics = fetcher.get_fetch_metrics()
+        assert (metrics['hedged'], metrics['hedge_wins']) == (1, 1)
+
+    def test_no_hedge_without_latency_samples(self, tmp_path):
+        """延迟样本不足时不发出对冲请求"""
+        source = ScriptedRemoteSource(delays=[0.2])
+        fetcher = make_fetcher(tmp_path, source, request_timeout=5, hedge_percentile=50)
+
+        fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+
+        assert source.calls == 1
+        assert fetcher.get_fetch_metrics()['hedged'] == 0
+
+    def test_hedged_call_raises_upstream_timeout(self):
+        """hedged_call 超时时抛出 UpstreamTimeoutError（TimeoutError，计入熔断失败）"""
+        events = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with pytest.raises(UpstreamTimeoutError):
+                hedged_call(executor, time.sleep, 0.5, timeout=0.05, on_event=events.append)
+        assert events == ['timeout']
+        assert issubclass(UpstreamTimeoutError, OSError)
+
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def setup(self, tmp_path):
+        """已缓存1-2月日线、熔断阈值为2的DataFetcher"""
+        source = ScriptedRemoteSource()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.3)
+        fetcher = make_fetcher(tmp_path, source, circuit_breaker=breaker)
+        cached = fetcher.get_stock_data('000001', '20240102', '20240229', adjust='')
+        return fetcher, source, breaker, cached
+
+    def test_opens_after_failures_and_serves_stale(self, setup):
+        """连续失败达到阈值后熔断，熔断期间返回缓存中的已有数据且不再请求上游"""
+        fetcher, source, breaker, cached = setup
+        source.fail = True
+
+        with pytest.raises(ValueError, match="上游连接被重置"):
+            fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        stale = fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+        assert breaker.state == CircuitBreaker.OPEN
+        pd.testing.assert_frame_equal(stale, cached, check_freq=False)
+
+        calls = source.calls
+        stale = fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+        pd.testing.assert_frame_equal(stale, cached, check_freq=False)
+        assert source.calls == calls
+        metrics = fetcher.get_fetch_metrics()
+        assert metrics['rejected'] == 1
+        assert metrics['stale_served'] == 2
+
+    def test_half_open_probe_closes_breaker(self, setup):
+        """冷却时间过后放行一个探测请求，成功则关闭熔断器并补齐缺口"""
+        fetcher, source, breaker, cached = setup
+        source.fail = True
+        for _ in range(2):
+            try:
+                fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+            except ValueError:
+                pass
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(breaker.reset_timeout)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        source.fail = False
+        data = fetcher.get_stock_data('000001', '20240102', '20240329', adjust='')
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert data.index[-1] > cached.index[-1]
+
+    def test_half_open_allows_single_probe(self):
+        """半开状态下只放行一个探测请求，探测失败时重新打开"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.05)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(breaker.allow())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results) == [False, False, False, True]
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened_count == 2
@@ -0,0 +1,55 @@
+"""
+缓存预热调度测试
+下一次预热时间按交易日历跳过周末和节假日休市，交易日历之外退回为跳过周末
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.data_fetcher import DataFetcher
+from src.memory_cache import MemoryLRUCache
+from src.warmup import CacheWarmer
+from tests.conftest import LatencyDataSource, freeze_now
+
+
+# 2024年国庆休市：10月1日至7日，节前最后一个交易日为9月30日（周一）
+HOLIDAYS = pd.date_range('2024-10-01', '2024-10-07')
+
+
+class CalendarDataSource(LatencyDataSource):
+    """提供2024年交易日历的模拟数据源"""
+
+    def __init__(self):
+        super().__init__(latency=0)
+
+    def fetch_trade_calendar(self) -> pd.DatetimeIndex:
+        return pd.bdate_range('2024-01-01', '2024-12-31').difference(HOLIDAYS)
+
+
+@pytest.fixture
+def warmer(tmp_path, monkeypatch):
+    """每个交易日15:30预热的CacheWarmer"""
+    freeze_now(monkeypatch, '2024-09-30 12:00')
+    fetcher = DataFetcher(cache_dir=str(tmp_path / "cache"), source=CalendarDataSource(),
+                          memory_cache=MemoryLRUCache())
+    return CacheWarmer(fetcher, symbols=[], run_at="15:30")
+
+
+class TestNextRunTime:
+    @pytest.mark.parametrize('now, expected', [
+        ('2024-09-30 12:00', '2024-09-30 15:30'),   # 交易日预热时间之前
+        ('2024-09-30 15:30', '2024-10-08 15:30'),   # 节前最后一个交易日预热时间已到
+        ('2024-10-03 09:00', '2024-10-08 15:30'),   # 休市的工作日
+        ('2024-10-05 20:00', '2024-10-08 15:30'),   # 休市期间的周末
+        ('2024-10-08 16:00', '2024-10-09 15:30'),
+    ])
+    def test_skips_exchange_holidays(self, warmer, now, expected):
+        """国庆休市期间不预热，节前收盘后的下一次预热为节后首个交易日"""
+        assert warmer.next_run_time(datetime.fromisoformat(now)) == datetime.fromisoformat(expected)
+
+    def test_falls_back_to_weekdays_beyond_calendar(self, warmer):
+        """交易日历之外按周一至周五预热"""
+        assert warmer.next_run_time(datetime(2024, 12, 31, 16, 0)) == datetime(2025, 1, 1, 15, 30)
+        assert warmer.next_run_time(datetime(2025, 1, 3, 16, 0)) == datetime(2025, 1, 6, 15, 30)